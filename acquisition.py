@@ -0,0 +1,173 @@
+"""Ядро опроса без Qt: его используют и GUI (data_acquisition.PollThread), и daemon.py.
+
+Здесь разбирается блок connection конфигурации, строки таблицы раскладываются
+по устройствам и группам опроса, и для каждого устройства создается свой
+DevicePoller: бэкенд опроса, фильтр изменений и получатели циклов (CycleValues).
+"""
+from async_acquisition import AsyncPollBackend, DEFAULT_MAX_IN_FLIGHT
+from block_acquisition import BlockPollBackend
+from change_filter import ChangeFilter, DEFAULT_FORCED_REFRESH
+from circuit_breaker import circuit_breakers, DEFAULT_FAILURE_THRESHOLD, DEFAULT_MAX_DELAY
+from devices import load_devices, split_by_device, DEVICE_SETTING_KEYS
+from metrics import metrics
+from modbus import connection_pool, DEFAULT_MAX_CONNECTIONS
+from poll_engine import DEFAULT_GAP_FILL
+from tag_compiler import compile_tags
+
+POLL_BACKENDS = {
+    "threads": BlockPollBackend,
+    "asyncio": AsyncPollBackend,
+}
+
+# Параметры блока connection и их значения по умолчанию
+CONNECTION_DEFAULTS = {
+    "ip": "192.168.56.2",
+    "port": 502,
+    "interval": 100,
+    "block_gap": DEFAULT_GAP_FILL,
+    "unit_id": 1,
+    "max_connections": DEFAULT_MAX_CONNECTIONS,
+    "backend": "threads",
+    "max_in_flight": DEFAULT_MAX_IN_FLIGHT,
+    "change_filter": True,
+    "forced_refresh": DEFAULT_FORCED_REFRESH,
+    "breaker_failures": DEFAULT_FAILURE_THRESHOLD,
+    "breaker_max_delay": DEFAULT_MAX_DELAY,
+    "write_verify": True,
+    "background_interval": 0,  # Период опроса тегов вне фокуса (не видны, не на графике), мс; 0 — выключено
+}
+
+
+def connection_settings(config):
+    """Блок connection конфигурации, дополненный значениями по умолчанию."""
+    settings = dict(CONNECTION_DEFAULTS)
+    settings.update(config.get("connection", {}))
+    return settings
+
+
+def configure_connections(settings):
+    """Применяет общие для всех ПЛК настройки: лимит пула соединений и параметры выключателей."""
+    connection_pool.max_connections = settings["max_connections"]
+    circuit_breakers.configure(failure_threshold=settings["breaker_failures"],
+                               max_delay=settings["breaker_max_delay"])
+
+
+def config_devices(settings, device_configs):
+    """Устройства конфигурации; устройство по умолчанию берет параметры из блока connection."""
+    return load_devices(device_configs, {key: settings[key] for key in DEVICE_SETTING_KEYS})
+
+
+def poll_periods(tag_settings, poll_groups, interval):
+    """Группа и период опроса строк, у которых они заданы: индекс строки -> (группа, период в мс).
+
+    Период тега важнее периода его группы; группа без периода в poll_groups
+    опрашивается с интервалом interval — интервалом устройства тегов. Остальные
+    теги идут в группу по умолчанию.
+    """
+    periods = {}
+    for row, settings in enumerate(tag_settings):
+        group, period = settings.get("group"), settings.get("period")
+        if group:
+            periods[row] = (group, period or poll_groups.get(group, interval))
+        elif period:
+            periods[row] = ("period", period)
+    return periods
+
+
+def create_change_filter(addresses, tag_settings, forced_refresh=DEFAULT_FORCED_REFRESH):
+    """Фильтр изменений для опроса addresses (TagTable или пары) с зонами нечувствительности из настроек тегов."""
+    deadbands = {row: (settings.get("deadband"), settings.get("deadband_pct"))
+                 for row, settings in enumerate(tag_settings)
+                 if settings.get("deadband") or settings.get("deadband_pct")}
+    return ChangeFilter(addresses, deadbands, forced_refresh)
+
+
+class DevicePoller:
+    """Опрос одного устройства: бэкенд из POLL_BACKENDS, фильтр изменений и получатели циклов.
+
+    consumers — функции, которые получают каждый цикл после фильтра (SnapshotBuffer.write,
+    Historian.append, запись в файл). on_failed(indices) вызывается при недопустимых
+    адресах и обрыве связи, on_breaker_changed(state) — при смене состояния выключателя.
+    Callback-и вызываются из потока опроса.
+    """
+
+    def __init__(self, name, device, addresses, periods=None, change_filter=None, consumers=(),
+                 on_failed=None, on_breaker_changed=None):
+        self.name = name
+        self.host = device["ip"]
+        self.port = device["port"]
+        self.change_filter = change_filter
+        self.consumers = list(consumers)
+        self.on_failed = on_failed
+        kwargs = {"unit_id": device["unit_id"], "gap_fill": device["block_gap"], "periods": periods,
+                  "on_results": self.publish, "on_failed": on_failed, "on_breaker_changed": on_breaker_changed}
+        if device["backend"] == "asyncio":
+            kwargs["max_in_flight"] = device["max_in_flight"]
+        self.backend = POLL_BACKENDS[device["backend"]](addresses, self.host, self.port, device["interval"],
+                                                        **kwargs)
+        self.scheduler = self.backend.scheduler
+        self.breaker = self.backend.breaker
+
+    def stats(self):
+        """Статистика для metrics: группы опроса, выключатель ПЛК, фильтр изменений."""
+        return {
+            "endpoint": f"{self.host}:{self.port}",
+            "backend": type(self.backend).__name__,
+            "groups": self.scheduler.stats(),
+            "breaker": self.breaker.stats(),
+            "change_filter": self.change_filter.stats() if self.change_filter is not None else None,
+        }
+
+    def set_focus(self, rows, background_interval=0):
+        """Строки rows опрашиваются с полной частотой, остальные — раз в background_interval мс.
+
+        rows=None или background_interval=0 — все строки с полной частотой.
+        """
+        self.scheduler.set_focus(rows, background_interval / 1000.0 if background_interval else None)
+
+    def publish(self, values):
+        if self.change_filter is not None:
+            values = self.change_filter.filter(values)
+        for consumer in self.consumers:
+            consumer(values)
+
+    def run(self):
+        """Блокирующий опрос до stop()."""
+        for index in self.scheduler.invalid:
+            print(f"Ошибка: недопустимый адрес для строки {index}")
+            if self.on_failed:
+                self.on_failed([index])
+
+        print(f"[{self.name}] Requests per cycle: {self.scheduler.requests_before} -> "
+              f"{self.scheduler.requests_after} ({len(self.scheduler.rows)} tags, {len(self.scheduler.blocks)} "
+              f"blocks, {len(self.scheduler.groups)} groups, {type(self.backend).__name__})")
+        metrics.add_source(f"device.{self.name}", self.stats)
+        self.backend.run()
+
+    def stop(self):
+        metrics.remove_source(f"device.{self.name}")
+        self.backend.stop()
+
+
+def build_pollers(addresses, tag_settings, devices, poll_groups, interval, change_filter=True,
+                  forced_refresh=DEFAULT_FORCED_REFRESH, factory=DevicePoller, **kwargs):
+    """Создает по опросчику на каждое устройство, к которому привязаны строки addresses.
+
+    factory(name, device, addresses, periods=..., change_filter=..., **kwargs) —
+    DevicePoller или обертка над ним (в GUI — data_acquisition.PollThread).
+    Адреса компилируются один раз (tag_compiler.compile_tags) с типом, порядком
+    слов из настроек строк и unit id устройства.
+    """
+    by_device, unknown = split_by_device(addresses, tag_settings, devices)
+    for index, address in unknown:
+        print(f"Ошибка: неизвестное устройство '{tag_settings[index].get('device')}' "
+              f"для строки {index} ({address})")
+    pollers = []
+    for name, device_addresses in by_device.items():
+        tags = compile_tags(device_addresses, tag_settings, devices[name]["unit_id"])
+        # Группа без своего периода опрашивается с интервалом устройства, как и группа по умолчанию
+        periods = poll_periods(tag_settings, poll_groups, devices[name].get("interval", interval))
+        pollers.append(factory(name, devices[name], tags, periods=periods,
+                               change_filter=create_change_filter(tags, tag_settings, forced_refresh)
+                               if change_filter else None, **kwargs))
+    return pollers
@@ -0,0 +1,293 @@
+import asyncio
+import struct
+import threading
+import time
+
+from pyModbusTCP.constants import EXP_DATA_ADDRESS
+
+from circuit_breaker import circuit_breakers, BREAKER_CHECK_INTERVAL, CLOSED
+from metrics import metrics, OK, TIMEOUT, ERROR, EXCEPTION
+from poll_engine import DEFAULT_GAP_FILL, MAX_REGISTERS_PER_REQUEST
+from scheduler import DeadlineScheduler, build_groups
+from tag_compiler import as_tag_table
+
+# Сколько запросов Modbus TCP может одновременно "висеть" на одном соединении
+DEFAULT_MAX_IN_FLIGHT = 4
+READ_HOLDING_REGISTERS = 0x03
+
+
+class ModbusExceptionResponse(Exception):
+    """ПЛК ответил исключением Modbus (функция | 0x80)."""
+
+    def __init__(self, function_code, exception_code):
+        super().__init__(f"Modbus exception {exception_code} for function {function_code}")
+        self.function_code = function_code
+        self.exception_code = exception_code
+
+
+class AsyncModbusConnection:
+    """Соединение Modbus TCP с конвейером запросов.
+
+    Запросы отправляются, не дожидаясь ответов на предыдущие; ответы
+    сопоставляются с запросами по transaction ID из заголовка MBAP.
+    """
+
+    def __init__(self, host, port=502, unit_id=1, timeout=1.0, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._pending = {}  # transaction id -> future
+        self._transaction_id = 0
+        self._in_flight = None
+        self._connect_lock = None
+
+    @property
+    def is_open(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    def _ensure_primitives(self):
+        # Примитивы asyncio создаются внутри работающего цикла событий
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+
+    async def open(self):
+        self._ensure_primitives()
+        async with self._connect_lock:
+            if self.is_open:
+                return
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+            self._reader_task = asyncio.create_task(self._read_responses())
+
+    async def close(self):
+        writer, self._writer = self._writer, None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        self._fail_pending(ConnectionError("connection closed"))
+
+    async def read_holding_registers(self, address, count):
+        """Читает count регистров начиная с address; возвращает список слов."""
+        self._ensure_primitives()
+        async with self._in_flight:
+            if not self.is_open:
+                await self.open()
+
+            self._transaction_id = (self._transaction_id + 1) & 0xFFFF
+            transaction_id = self._transaction_id
+            future = asyncio.get_running_loop().create_future()
+            self._pending[transaction_id] = future
+
+            # MBAP: transaction id, protocol id (0), длина, unit id; затем PDU
+            frame = struct.pack(">HHHBBHH", transaction_id, 0, 6, self.unit_id,
+                                READ_HOLDING_REGISTERS, address, count)
+            try:
+                self._writer.write(frame)
+                await self._writer.drain()
+                return await asyncio.wait_for(future, self.timeout)
+            except (asyncio.TimeoutError, OSError):
+                # После таймаута поток ответов рассинхронизирован — закрываем соединение
+                await self.close()
+                raise
+            finally:
+                self._pending.pop(transaction_id, None)
+
+    async def _read_responses(self):
+        try:
+            while True:
+                header = await self._reader.readexactly(7)
+                transaction_id, _, length, _ = struct.unpack(">HHHB", header)
+                pdu = await self._reader.readexactly(length - 1)
+                future = self._pending.get(transaction_id)
+                if future is None or future.done():
+                    continue  # Ответ на запрос, который уже отменен по таймауту
+
+                function_code = pdu[0]
+                if function_code & 0x80:
+                    future.set_exception(ModbusExceptionResponse(function_code & 0x7F, pdu[1]))
+                else:
+                    byte_count = pdu[1]
+                    future.set_result(list(struct.unpack(f">{byte_count // 2}H", pdu[2:2 + byte_count])))
+        except (asyncio.IncompleteReadError, OSError) as e:
+            self._fail_pending(ConnectionError(f"connection lost: {e}"))
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                writer.close()
+
+    def _fail_pending(self, error):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+
+class AsyncPollBackend:
+    """Опрос всех блоков PollEngine в цикле asyncio на одном фоновом потоке.
+
+    Каждая группа опроса (см. scheduler.build_groups) работает отдельной задачей
+    по своим дедлайнам, все задачи делят одно конвейерное соединение.
+    Результаты передаются через callback-и on_results(values: CycleValues) и
+    on_failed(indices), которые вызываются из фонового потока. on_failed
+    вызывается один раз при размыкании выключателя ПЛК, on_breaker_changed(state) —
+    при каждой смене его состояния.
+    """
+
+    def __init__(self, addresses, host, port=502, interval=500, unit_id=1,
+                 gap_fill=DEFAULT_GAP_FILL, max_count=MAX_REGISTERS_PER_REQUEST,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=1.0,
+                 on_results=None, on_failed=None, periods=None, on_breaker_changed=None):
+        tags = as_tag_table(addresses)
+        self.scheduler = DeadlineScheduler(build_groups(tags, interval, periods, max_count, gap_fill), tags.invalid)
+        self.interval = interval / 1000.0
+        # Свое соединение, а не из connection_pool: пул выдает блокирующие ModbusClient, а здесь
+        # нужен сокет asyncio, на котором висят сразу max_in_flight запросов. Это одно соединение на ПЛК
+        self.connection = AsyncModbusConnection(host, port, unit_id, timeout, max_in_flight)
+        self.breaker = circuit_breakers.get(host, port, unit_id)
+        self.endpoint = metrics.endpoint(host, port)  # Задержка и исходы запросов к ПЛК
+        self.on_results = on_results
+        self.on_failed = on_failed
+        self.on_breaker_changed = on_breaker_changed
+        self._loop = None
+        self._stop_event = None
+        self._thread = None
+        self.is_running = True
+
+    def start(self):
+        """Запускает цикл asyncio на отдельном потоке."""
+        self._thread = threading.Thread(target=self.run, name="AsyncPollBackend", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """Блокирующий запуск цикла опроса в текущем потоке."""
+        asyncio.run(self._main())
+
+    def stop(self):
+        """Останавливает цикл опроса; безопасно вызывать из любого потока."""
+        self.is_running = False
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    async def poll_once(self, engine, block_mask=None):
+        """Один цикл опроса группы: все блоки (или отмеченные в block_mask) отправляются конвейером,
+        ответы собираются вместе."""
+        numbers = range(len(engine.blocks)) if block_mask is None else \
+            [number for number, hot in enumerate(block_mask.tolist()) if hot]
+        words = await asyncio.gather(*(self._read_block(engine.blocks[number]) for number in numbers),
+                                     return_exceptions=True)
+        responses = [None] * len(engine.blocks)
+        for number, response in zip(numbers, words):
+            responses[number] = response
+        rejected = {number for number, response in zip(numbers, words)
+                    if isinstance(response, ModbusExceptionResponse) and response.exception_code == EXP_DATA_ADDRESS}
+        return engine.decode_cycle(responses, block_mask, rejected)
+
+    async def _read_block(self, block):
+        """Чтение одного блока с учетом времени и исхода запроса в метриках ПЛК."""
+        started = time.perf_counter()
+        try:
+            words = await self.connection.read_holding_registers(block.start, block.count)
+        except asyncio.TimeoutError:
+            self.endpoint.record(time.perf_counter() - started, TIMEOUT)
+            raise
+        except ModbusExceptionResponse:
+            self.endpoint.record(time.perf_counter() - started, EXCEPTION)
+            raise
+        except Exception:
+            self.endpoint.record(time.perf_counter() - started, ERROR)
+            raise
+        self.endpoint.record(time.perf_counter() - started, OK)
+        return words
+
+    async def _sleep(self, delay):
+        """Пауза, которую прерывает остановка."""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _poll_group(self, group):
+        while self.is_running and not self._stop_event.is_set():
+            if not self.breaker.is_closed:
+                # Пробу отправляет первая проснувшаяся группа, остальные ждут ее результата
+                if self.breaker.allow():
+                    await self._probe()
+                else:
+                    await self._sleep(max(self.breaker.time_until_probe(), BREAKER_CHECK_INTERVAL))
+                continue
+
+            delay = group.deadline - self.scheduler.clock()
+            if delay > 0:
+                await self._sleep(delay)
+                continue
+
+            block_mask = self.scheduler.begin(group)
+            if block_mask is not None and not block_mask.any():
+                continue
+            try:
+                values, failed = await self.poll_once(group.engine, block_mask)
+                # Цикл неудачен, только если не прочитан ни один блок
+                if failed and not len(values.index):
+                    self._record_failure()
+                else:
+                    self._record_success()
+                    if len(values.index) and self.on_results:
+                        self.on_results(values)
+            except Exception as e:
+                print(f"Connection error in async poll ({group.name}): {e}")
+                self._record_failure()
+            self.scheduler.complete(group)
+
+    async def _probe(self):
+        """Единственный пробный запрос при разомкнутом выключателе: один регистр первого блока."""
+        blocks = self.scheduler.blocks
+        try:
+            if blocks:
+                await self.connection.read_holding_registers(blocks[0].start, 1)
+        except Exception as e:
+            self._record_failure()
+            print(f"Probe failed ({self.connection.host}:{self.connection.port}): {e}; "
+                  f"next in {self.breaker.time_until_probe():.1f} s")
+            return
+        self._record_success()
+        self.scheduler.start()  # Все группы возобновляют опрос сразу
+
+    def _record_failure(self):
+        previous = self.breaker.record_failure()
+        if self.breaker.state != previous:
+            if self.on_breaker_changed:
+                self.on_breaker_changed(self.breaker.state)
+            if previous == CLOSED:
+                print(f"PLC {self.connection.host}:{self.connection.port} unreachable, polling paused "
+                      f"(next probe in {self.breaker.time_until_probe():.1f} s)")
+                if self.on_failed:
+                    self.on_failed(self.scheduler.rows)
+
+    def _record_success(self):
+        previous = self.breaker.record_success()
+        if previous != self.breaker.state:
+            print(f"PLC {self.connection.host}:{self.connection.port} reachable again, polling resumed")
+            if self.on_breaker_changed:
+                self.on_breaker_changed(self.breaker.state)
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        try:
+            self.scheduler.start()
+            await asyncio.gather(*(self._poll_group(group) for group in self.scheduler.groups))
+        finally:
+            await self.connection.close()
@@ -0,0 +1,160 @@
+"""Бенчмарк опроса без GUI на локальном симуляторе ПЛК (simulator.py).
+
+Симулятор работает в отдельном процессе, поэтому CPU, потоки и сокеты
+считаются только для опроса. Для каждого механизма опроса (threads, asyncio)
+и числа тегов (10, 100, 1000, 5000) опрос идет DURATION секунд, измеряются:
+запросы/с, теги/с, загрузка CPU, число потоков и сокетов, перцентили
+длительности цикла, неудачные циклы. Результаты пишутся в JSON (--json) для
+сравнения между изменениями.
+Запуск: python bench_acquisition.py [--latency 2 --jitter 1 --json results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from acquisition import DevicePoller, CONNECTION_DEFAULTS
+from circuit_breaker import circuit_breakers
+from modbus import connection_pool
+
+TAG_COUNTS = (10, 100, 1000, 5000)
+BACKENDS = ("threads", "asyncio")
+FIRST_REGISTER = 10000
+DURATION = 5.0  # Секунд измерения на один прогон
+WARMUP = 1.0  # Секунд до начала измерения: соединения открыты, первые циклы прошли
+PORT = 15503
+
+
+def count_sockets():
+    """Открытые сокеты процесса (Linux, /proc); None, если посчитать нельзя."""
+    try:
+        descriptors = os.listdir("/proc/self/fd")
+    except OSError:
+        return None
+    sockets = 0
+    for fd in descriptors:
+        try:
+            sockets += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            pass  # Дескриптор уже закрыт (в том числе тот, через который читался список)
+    return sockets
+
+
+def start_simulator(args):
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulator.py"),
+               "--port", str(args.port), "--range", f"{FIRST_REGISTER}:{2 * max(args.tags)}",
+               "--latency", str(args.latency), "--jitter", str(args.jitter),
+               "--drop-rate", str(args.drop_rate), "--exception-rate", str(args.exception_rate), "--seed", "1"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # Строка о запуске: сервер уже принимает соединения
+    return process
+
+
+def run_once(backend, tag_count, args):
+    addresses = [(row, str(FIRST_REGISTER + 2 * row)) for row in range(tag_count)]
+    device = {key: CONNECTION_DEFAULTS[key] for key in ("unit_id", "block_gap", "max_in_flight")}
+    device.update({"ip": "127.0.0.1", "port": args.port, "interval": args.interval, "backend": backend})
+    delivered = [0]
+
+    def count(values):
+        delivered[0] += len(values.index)
+
+    poller = DevicePoller(backend, device, addresses, consumers=[count])
+    thread = threading.Thread(target=poller.run, daemon=True)
+    thread.start()
+    time.sleep(WARMUP)
+
+    groups = poller.scheduler.groups
+    cycles_before = [group.cycles for group in groups]
+    delivered_before = delivered[0]
+    failures_before = poller.breaker.trips
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    threads = 0
+    sockets = 0 if count_sockets() is not None else None
+    while time.perf_counter() - start < args.duration:
+        time.sleep(0.2)
+        threads = max(threads, threading.active_count())
+        if sockets is not None:
+            sockets = max(sockets, count_sockets())
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_before
+    cycles = [group.cycles - before for group, before in zip(groups, cycles_before)]
+    latencies = np.concatenate([group.latencies() for group in groups]) * 1000
+
+    poller.stop()
+    thread.join()
+    connection_pool.close_all()
+    circuit_breakers.configure(**circuit_breakers.settings)  # Следующий прогон — с закрытым выключателем
+
+    requests = sum(c * group.engine.requests_after for c, group in zip(cycles, groups))
+    return {
+        "backend": backend,
+        "tags": tag_count,
+        "interval_ms": args.interval,
+        "duration_s": round(elapsed, 3),
+        "cycles": sum(cycles),
+        "requests_per_cycle": sum(group.engine.requests_after for group in groups),
+        "requests_per_s": round(requests / elapsed, 1),
+        "tags_per_s": round((delivered[0] - delivered_before) / elapsed, 1),
+        "cpu_percent": round(cpu / elapsed * 100, 1),
+        "threads": threads,
+        "sockets": sockets,
+        "latency_ms": {f"p{p}": round(float(np.percentile(latencies, p)), 3) if len(latencies) else None
+                       for p in (50, 90, 99)},
+        "latency_max_ms": round(float(latencies.max()), 3) if len(latencies) else None,
+        "breaker_trips": poller.breaker.trips - failures_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк опроса на локальном симуляторе Modbus TCP")
+    parser.add_argument("--tags", type=int, nargs="+", default=list(TAG_COUNTS))
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--interval", type=int, default=100, help="период опроса, мс")
+    parser.add_argument("--duration", type=float, default=DURATION, help="длительность измерения, с")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа симулятора, мс")
+    parser.add_argument("--jitter", type=float, default=0.0, help="разброс задержки, ± мс")
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--exception-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--json", help="файл для результатов в JSON")
+    args = parser.parse_args()
+
+    simulator = start_simulator(args)
+    results = []
+    try:
+        for backend in args.backends:
+            for tag_count in args.tags:
+                result = run_once(backend, tag_count, args)
+                results.append(result)
+                latency = result["latency_ms"]
+                print(f"{backend:8} {tag_count:5} тегов: {result['requests_per_s']:8.1f} запр/с, "
+                      f"{result['tags_per_s']:9.1f} тег/с, CPU {result['cpu_percent']:5.1f}%, "
+                      f"потоков {result['threads']}, сокетов {result['sockets']}, цикл p50/p90/p99 "
+                      f"{latency['p50']}/{latency['p90']}/{latency['p99']} мс", flush=True)
+    finally:
+        simulator.terminate()
+        simulator.wait()
+
+    if args.json:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "simulator": {"latency_ms": args.latency, "jitter_ms": args.jitter, "drop_rate": args.drop_rate,
+                          "exception_rate": args.exception_rate},
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Результаты записаны в {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Микробенчмарк: декодирование по одному тегу против декодирования блока NumPy.
+
+Запуск: python bench_decode.py
+"""
+import random
+import timeit
+
+import numpy as np
+from pyModbusTCP.utils import decode_ieee
+
+from decoding import decode_registers, format_bit_strings, NO_BIT
+from utils import dword_to_bit_string
+
+TAG_COUNTS = (10, 100, 1000)
+REPEATS = 5
+
+
+def decode_per_tag(words, offsets, bit_positions):
+    """Прежний путь опроса потоком на тег: decode_ieee/round/сдвиги для каждого тега отдельно."""
+    results = []
+    for offset, bit_position in zip(offsets, bit_positions):
+        word1, word2 = words[offset], words[offset + 1]
+        dword_value = (word2 << 16) | word1
+        float_value = round(decode_ieee(dword_value), 6)
+        bit_string = dword_to_bit_string([word1, word2])
+        if bit_position != NO_BIT:
+            word1 = (word1 >> bit_position) & 1
+        results.append([float_value, dword_value, word1, bit_string])
+    return results
+
+
+def decode_block(words, offsets, bit_positions):
+    """Новый путь: один проход NumPy на весь блок."""
+    real, dword, word = decode_registers(words, offsets, bit_positions)
+    return [list(values) for values in zip(real.tolist(), dword.tolist(), word.tolist(), format_bit_strings(dword))]
+
+
+def make_block(tag_count):
+    words = [random.randrange(0x10000) for _ in range(tag_count * 2)]
+    offsets = list(range(0, tag_count * 2, 2))
+    bit_positions = [random.randrange(16) if random.random() < 0.2 else NO_BIT for _ in range(tag_count)]
+    return words, offsets, bit_positions
+
+
+def main():
+    random.seed(1)
+    print(f"{'tags':>6} {'per-tag, us':>12} {'block, us':>10} {'speedup':>8}")
+    for tag_count in TAG_COUNTS:
+        words, offsets, bit_positions = make_block(tag_count)
+        words_array = np.array(words, dtype=np.uint16)
+        offsets_array = np.array(offsets, dtype=np.intp)
+        bits_array = np.array(bit_positions, dtype=np.int64)
+
+        # Оба пути должны давать одинаковые значения (NaN сравниваются как строки)
+        expected = decode_per_tag(words, offsets, bit_positions)
+        actual = decode_block(words_array, offsets_array, bits_array)
+        assert [list(map(str, row)) for row in expected] == [list(map(str, row)) for row in actual]
+
+        number = max(1, 20000 // tag_count)
+        per_tag = min(timeit.repeat(lambda: decode_per_tag(words, offsets, bit_positions),
+                                    number=number, repeat=REPEATS)) / number
+        block = min(timeit.repeat(lambda: decode_block(words_array, offsets_array, bits_array),
+                                  number=number, repeat=REPEATS)) / number
+        print(f"{tag_count:>6} {per_tag * 1e6:>12.1f} {block * 1e6:>10.1f} {per_tag / block:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
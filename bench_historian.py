@@ -0,0 +1,84 @@
+"""Бенчмарк архива: 1000 тегов × 10 Гц.
+
+1. Пропускная способность писателя: циклы подаются без пауз, измеряется,
+   сколько выборок в секунду уходит на диск.
+2. Работа в реальном времени: циклы подаются с частотой 10 Гц, измеряются
+   время append() в потоке опроса, отброшенные циклы и глубина очереди.
+Запуск: python bench_historian.py
+"""
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from historian import Historian, list_chunks, open_chunk
+from poll_engine import CycleValues
+
+TAG_COUNT = 1000
+POLL_RATE = 10  # Гц
+THROUGHPUT_CYCLES = 3000
+REALTIME_SECONDS = 5
+
+
+def make_cycle(rng):
+    index = np.arange(TAG_COUNT, dtype=np.int64)
+    dword = rng.integers(0, 2 ** 32, TAG_COUNT, dtype=np.uint32)
+    with np.errstate(invalid="ignore"):
+        real = np.round(dword.view(np.float32).astype(np.float64), 6)
+    word = (dword & 0xFFFF).astype(np.int64)
+    return CycleValues(index, real, dword, word, time.monotonic())
+
+
+def bench_throughput(directory, rng):
+    cycle = make_cycle(rng)
+    historian = Historian(directory, queue_size=THROUGHPUT_CYCLES)
+    historian.set_tags({i: str(1344 + 2 * i) for i in range(TAG_COUNT)})
+    historian.start()
+    start = time.perf_counter()
+    for _ in range(THROUGHPUT_CYCLES):
+        historian.append(cycle)
+    historian.stop()
+    elapsed = time.perf_counter() - start
+    samples = historian.written
+    print(f"Писатель: {samples} выборок за {elapsed:.2f} с — {samples / elapsed / 1e6:.2f} млн/с "
+          f"(нужно {TAG_COUNT * POLL_RATE / 1e6:.2f} млн/с), отброшено {historian.dropped}")
+
+
+def bench_realtime(directory, rng):
+    historian = Historian(directory)
+    historian.set_tags({i: str(1344 + 2 * i) for i in range(TAG_COUNT)})
+    historian.start()
+    period = 1.0 / POLL_RATE
+    append_times = []
+    max_queued = 0
+    deadline = time.monotonic()
+    for _ in range(REALTIME_SECONDS * POLL_RATE):
+        cycle = make_cycle(rng)
+        start = time.perf_counter()
+        historian.append(cycle)
+        append_times.append(time.perf_counter() - start)
+        max_queued = max(max_queued, historian.stats()["queued"])
+        deadline += period
+        time.sleep(max(0.0, deadline - time.monotonic()))
+    historian.stop()
+
+    append_us = np.array(append_times) * 1e6
+    rows = sum(open_chunk(path)[0]["count"] for path in list_chunks(directory))
+    print(f"Реальное время {REALTIME_SECONDS} с: append() среднее {append_us.mean():.1f} мкс, "
+          f"максимум {append_us.max():.1f} мкс; очередь до {max_queued} циклов; "
+          f"отброшено {historian.dropped}; в архиве {rows} выборок")
+
+
+def main():
+    rng = np.random.default_rng(1)
+    for bench in (bench_throughput, bench_realtime):
+        directory = tempfile.mkdtemp(prefix="historian_bench_")
+        try:
+            bench(directory, rng)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Бенчмарк перерисовки графика в зависимости от длины истории.
+
+Сравнивает отрисовку всей истории как есть с прореживанием HistorySeries.decimate
+для полного диапазона и для приближенного участка (1% истории).
+Запуск: python bench_plot.py  (по умолчанию без окна, платформа Qt offscreen)
+"""
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pyqtgraph as pg  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from decimation import HistorySeries  # noqa: E402
+
+HISTORY_LENGTHS = (10_000, 100_000, 1_000_000)
+PLOT_WIDTH = 1000
+REPEATS = 5
+
+
+def fill_series(length):
+    series = HistorySeries(length)
+    values = np.random.default_rng(1).normal(size=length).cumsum()
+    for i, value in enumerate(values.tolist()):
+        series.append(i * 0.1, value)
+    return series
+
+
+def time_redraw(widget, line, t, y):
+    """Время setData + отрисовки одного кадра, мс (лучшее из REPEATS)."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        line.setData(t, y)
+        widget.grab()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def time_decimate(series, x_min, x_max):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        series.decimate(x_min, x_max, PLOT_WIDTH)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    app = QApplication.instance() or QApplication([])
+    widget = pg.PlotWidget()
+    widget.resize(PLOT_WIDTH, 400)
+    widget.show()
+    line = widget.plot()
+    app.processEvents()
+
+    print(f"{'points':>9} {'raw, ms':>9} {'full, ms':>9} {'zoom, ms':>9} {'decimate full/zoom, ms':>23}")
+    for length in HISTORY_LENGTHS:
+        series = fill_series(length)
+        t, y = series.view()
+        zoom = (t[len(t) // 2], t[len(t) // 2 + len(t) // 100])
+
+        raw = time_redraw(widget, line, t, y)
+        full = time_redraw(widget, line, *series.decimate(None, None, PLOT_WIDTH))
+        zoomed = time_redraw(widget, line, *series.decimate(zoom[0], zoom[1], PLOT_WIDTH))
+        decimate_full = time_decimate(series, None, None)
+        decimate_zoom = time_decimate(series, *zoom)
+        print(f"{length:>9} {raw:>9.2f} {full:>9.2f} {zoomed:>9.2f} {decimate_full:>11.3f} / {decimate_zoom:.3f}")
+
+
+if __name__ == "__main__":
+    main()
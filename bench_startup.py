@@ -0,0 +1,104 @@
+"""Бенчмарк запуска GUI: время импорта и время до первого значения.
+
+Каждый запуск — отдельный процесс (чистый интерпретатор, как при старте
+приложения) с конфигурацией из --config, без диалога. Измеряются:
+импорт main_window, показ окна, заполнение таблицы, первое прочитанное значение
+от локального сервера Modbus. Проверяется, что pyqtgraph при запуске не импортируется.
+Запуск: python bench_startup.py
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 5
+TAG_COUNT = 500
+PORT = 15502
+TIMEOUT = 10.0  # Секунд на ожидание первого значения
+
+
+def child(config_path):
+    """Один запуск окна; время каждого этапа отсчитывается от начала импортов приложения."""
+    started = time.perf_counter()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    from main_window import MainWindow
+    imported = time.perf_counter()
+
+    app = QApplication(sys.argv[:1])
+    window = MainWindow(config_path=config_path)
+    window.show()
+    shown = time.perf_counter()  # Конфигурация еще не загружена: она читается первым шагом цикла событий
+
+    deadline = time.monotonic() + TIMEOUT
+    while not window.tag_model.rowCount() and time.monotonic() < deadline:
+        app.processEvents()
+    filled = time.perf_counter()
+
+    window.update_connection_params(window.ip, window.port, window.interval, True)
+    while not window.tag_model.valid.any() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    first_value = time.perf_counter()
+
+    result = {
+        "import": imported - started,
+        "shown": shown - started,
+        "filled": filled - started,
+        "first_value": first_value - started if window.tag_model.valid.any() else None,
+        "pyqtgraph": "pyqtgraph" in sys.modules,
+    }
+    window.close()
+    print(json.dumps(result))
+
+
+def main():
+    # numpy и сервер импортируются только в родительском процессе, чтобы не попасть в замер импорта
+    import numpy as np
+    from pyModbusTCP.server import ModbusServer
+
+    server = ModbusServer(host="127.0.0.1", port=PORT, no_block=True)
+    server.start()
+    server.data_bank.set_holding_registers(1344, [1] * (2 * TAG_COUNT))
+    config = {
+        "connection": {"ip": "127.0.0.1", "port": PORT, "interval": 100},
+        "table_data": [{"address": str(1344 + 2 * i), "comment": f"tag {i}"} for i in range(TAG_COUNT)],
+        "plot_state": [[0, "REAL"]],
+    }
+    directory = tempfile.mkdtemp(prefix="startup_bench_")
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+
+    results = []
+    try:
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, __file__, "--child", config_path], capture_output=True,
+                                    text=True, cwd=directory, timeout=TIMEOUT * 3).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result["process"] = time.perf_counter() - start
+            results.append(result)
+    finally:
+        server.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{TAG_COUNT} тегов, {RUNS} запусков, медиана:")
+    for key, title in (("import", "импорт main_window"), ("shown", "окно показано"),
+                       ("filled", "таблица заполнена"), ("first_value", "первое значение"),
+                       ("process", "процесс целиком (с закрытием)")):
+        values = [r[key] for r in results if r[key] is not None]
+        text = f"{np.median(values) * 1000:.0f} мс" if values else "нет данных"
+        print(f"  {title}: {text}")
+    if any(r["pyqtgraph"] for r in results):
+        print("ВНИМАНИЕ: pyqtgraph импортируется при запуске")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        main()
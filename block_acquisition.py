@@ -0,0 +1,118 @@
+import threading
+
+from circuit_breaker import circuit_breakers, BREAKER_CHECK_INTERVAL, CLOSED
+from metrics import metrics
+from modbus import connection_pool
+from poll_engine import DEFAULT_GAP_FILL, MAX_REGISTERS_PER_REQUEST
+from scheduler import DeadlineScheduler, build_groups
+from tag_compiler import as_tag_table
+
+
+class BlockPollBackend:
+    """Опрос склеенными блоками регистров через общий пул соединений на одном фоновом потоке.
+
+    Группы тегов опрашиваются по своим дедлайнам (DeadlineScheduler), а не через
+    sleep(interval). При потере связи выключатель ПЛК останавливает весь опрос и
+    шлет одну пробу с растущей паузой. Интерфейс callback-ов тот же, что у
+    async_acquisition.AsyncPollBackend.
+    """
+
+    def __init__(self, addresses, host, port=502, interval=500, unit_id=1,
+                 gap_fill=DEFAULT_GAP_FILL, max_count=MAX_REGISTERS_PER_REQUEST,
+                 on_results=None, on_failed=None, periods=None, on_breaker_changed=None):
+        tags = as_tag_table(addresses)
+        self.scheduler = DeadlineScheduler(build_groups(tags, interval, periods, max_count, gap_fill), tags.invalid)
+        self.interval = interval / 1000.0
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.breaker = circuit_breakers.get(host, port, unit_id)
+        self.endpoint = metrics.endpoint(host, port)  # Задержка и исходы запросов к ПЛК
+        self.on_results = on_results
+        self.on_failed = on_failed
+        self.on_breaker_changed = on_breaker_changed
+        self.is_running = True
+        self._wake = threading.Event()  # Прерывает ожидание дедлайна при остановке
+        self._thread = None
+
+    def start(self):
+        """Запускает опрос на отдельном потоке."""
+        self._thread = threading.Thread(target=self.run, name="BlockPollBackend", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """Блокирующий цикл опроса в текущем потоке."""
+        self.scheduler.start()
+        while self.is_running:
+            if not self.breaker.is_closed:
+                if self.breaker.allow():
+                    self.probe()
+                else:
+                    # Пока пробу шлет другой опросчик этого ПЛК, ждать нечего: проверяем выключатель с паузой
+                    self._wake.wait(max(self.breaker.time_until_probe(), BREAKER_CHECK_INTERVAL))
+                continue
+
+            group, delay = self.scheduler.next_group()
+            if delay > 0:
+                self._wake.wait(delay)
+                continue
+
+            block_mask = self.scheduler.begin(group)
+            if block_mask is not None and not block_mask.any():
+                continue
+            try:
+                with connection_pool.connection(self.host, self.port, self.unit_id) as mb_client:
+                    values, failed = group.engine.poll_once(mb_client, self.endpoint, block_mask)
+                # Цикл неудачен, только если не прочитан ни один блок
+                if failed and not len(values.index):
+                    self.record_failure()
+                else:
+                    self.record_success()
+                    if len(values.index) and self.on_results:
+                        self.on_results(values)
+
+            except Exception as e:
+                print(f"Connection error in block poll ({group.name}): {e}")
+                self.record_failure()
+            self.scheduler.complete(group)
+
+    def stop(self):
+        """Останавливает опрос; безопасно вызывать из любого потока."""
+        self.is_running = False
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def probe(self):
+        """Единственный пробный запрос при разомкнутом выключателе: один регистр первого блока."""
+        blocks = self.scheduler.blocks
+        try:
+            if blocks:
+                with connection_pool.connection(self.host, self.port, self.unit_id) as mb_client:
+                    words = mb_client.read_holding_registers(blocks[0].start, 1)
+                if not isinstance(words, list) or len(words) != 1:
+                    raise ConnectionError(f"no response: {words}")
+        except Exception as e:
+            self.record_failure()
+            print(f"Probe failed ({self.host}:{self.port}): {e}; next in {self.breaker.time_until_probe():.1f} s")
+            return
+        self.record_success()
+        self.scheduler.start()  # Все группы возобновляют опрос сразу
+
+    def record_failure(self):
+        previous = self.breaker.record_failure()
+        if self.breaker.state != previous:
+            if self.on_breaker_changed:
+                self.on_breaker_changed(self.breaker.state)
+            if previous == CLOSED:
+                print(f"PLC {self.host}:{self.port} unreachable, polling paused "
+                      f"(next probe in {self.breaker.time_until_probe():.1f} s)")
+                if self.on_failed:
+                    self.on_failed(self.scheduler.rows)
+
+    def record_success(self):
+        previous = self.breaker.record_success()
+        if previous != self.breaker.state:
+            print(f"PLC {self.host}:{self.port} reachable again, polling resumed")
+            if self.on_breaker_changed:
+                self.on_breaker_changed(self.breaker.state)
@@ -0,0 +1,76 @@
+import numpy as np
+
+from poll_engine import CycleValues
+from tag_compiler import as_tag_table
+
+# Через сколько секунд неизменившийся тег все равно передается дальше
+DEFAULT_FORCED_REFRESH = 10.0
+
+
+class ChangeFilter:
+    """Пропускает к таблице, графикам и архиву только изменившиеся значения.
+
+    Для тегов с зоной нечувствительности (deadband) сравнивается REAL с последним
+    переданным значением: изменение должно превысить абсолютный порог или
+    процент от этого значения. Остальные теги (DWORD/WORD) сравниваются точно по
+    сырым регистрам, битовые — по значению бита. Каждый тег передается хотя бы
+    раз в forced_refresh секунд, даже если не менялся.
+    Вызывается из потока опроса; один фильтр — на один поток.
+    """
+
+    def __init__(self, addresses, deadbands=None, forced_refresh=DEFAULT_FORCED_REFRESH):
+        # addresses: TagTable или пары (индекс строки, адрес); deadbands: индекс строки -> (абсолютная, в процентах)
+        tags = as_tag_table(addresses)
+        size = max(int(tags.rows.max(initial=-1)), max(tags.invalid, default=-1)) + 1
+        self.forced_refresh = forced_refresh
+        self.absolute = np.zeros(size, dtype=np.float64)
+        self.percent = np.zeros(size, dtype=np.float64)
+        self.is_bit = np.zeros(size, dtype=bool)
+        self.is_bit[tags.rows] = tags.descriptors["bit"] >= 0
+        for index, (absolute, percent) in (deadbands or {}).items():
+            if 0 <= index < size:
+                self.absolute[index] = absolute or 0.0
+                self.percent[index] = percent or 0.0
+        self.analog = (self.absolute > 0) | (self.percent > 0)
+
+        self.last_real = np.zeros(size, dtype=np.float64)
+        self.last_dword = np.zeros(size, dtype=np.uint32)
+        self.last_word = np.zeros(size, dtype=np.int64)
+        self.last_sent = np.full(size, -np.inf)  # Время последней передачи; -inf — еще не передавался
+        self.delivered = 0
+        self.suppressed = 0
+
+    def filter(self, values):
+        """Оставляет в CycleValues только теги, которые нужно передать дальше."""
+        index = values.index
+        if not len(index):
+            return values
+
+        due = values.timestamp - self.last_sent[index] >= self.forced_refresh
+        raw_changed = values.dword != self.last_dword[index]
+        exact_changed = np.where(self.is_bit[index], values.word != self.last_word[index], raw_changed)
+        last_real = self.last_real[index]
+        threshold = np.maximum(self.absolute[index], self.percent[index] / 100.0 * np.abs(last_real))
+        # ~(<=): переход в NaN или из NaN тоже считается изменением
+        analog_changed = raw_changed & ~(np.abs(values.real - last_real) <= threshold)
+        send = due | np.where(self.analog[index], analog_changed, exact_changed)
+
+        sent = int(np.count_nonzero(send))
+        self.delivered += sent
+        self.suppressed += len(index) - sent
+        if sent == len(index):
+            rows = index
+        else:
+            if not sent:
+                return CycleValues(index[:0], values.real[:0], values.dword[:0], values.word[:0], values.timestamp)
+            rows = index[send]
+            values = CycleValues(rows, values.real[send], values.dword[send], values.word[send], values.timestamp)
+
+        self.last_real[rows] = values.real
+        self.last_dword[rows] = values.dword
+        self.last_word[rows] = values.word
+        self.last_sent[rows] = values.timestamp
+        return values
+
+    def stats(self):
+        return {"delivered": self.delivered, "suppressed": self.suppressed}
@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+
+# Состояния автомата: связь есть / связь потеряна, опрос остановлен / идет пробный запрос
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Сколько циклов подряд должно не удаться, чтобы опрос ПЛК остановился
+DEFAULT_FAILURE_THRESHOLD = 3
+# Пауза перед первой пробой и ее верхняя граница, секунды; пауза удваивается после каждой неудачной пробы
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+# Разброс паузы (доля), чтобы несколько клиентов не стучались в ПЛК одновременно
+DEFAULT_JITTER = 0.2
+# Как часто опрос, ждущий чужой пробы (HALF_OPEN, time_until_probe() == 0), проверяет выключатель, с
+BREAKER_CHECK_INTERVAL = 0.05
+
+
+class CircuitBreaker:
+    """Автоматический выключатель опроса одного ПЛК.
+
+    После failure_threshold неудачных циклов подряд опрос всех тегов
+    останавливается (OPEN). По истечении паузы allow() разрешает ровно одну
+    пробу (HALF_OPEN); успех возвращает полный опрос одним шагом (CLOSED),
+    неудача снова размыкает цепь с удвоенной паузой.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, jitter=DEFAULT_JITTER, clock=time.monotonic):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0  # Неудачных циклов подряд
+        self.attempt = 0  # Неудачных проб подряд, от нее зависит пауза
+        self.trips = 0  # Сколько раз цепь размыкалась
+        self.next_probe = 0.0
+
+    @property
+    def is_closed(self):
+        return self.state == CLOSED
+
+    def allow(self):
+        """Можно ли сейчас отправлять запросы. В состоянии OPEN разрешает одну пробу после паузы."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() >= self.next_probe:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def time_until_probe(self):
+        return max(0.0, self.next_probe - self.clock()) if self.state == OPEN else 0.0
+
+    def record_success(self):
+        """Возвращает состояние до вызова, чтобы вызывающий мог сообщить о восстановлении связи."""
+        with self._lock:
+            previous = self.state
+            self.state = CLOSED
+            self.failures = 0
+            self.attempt = 0
+            return previous
+
+    def record_failure(self):
+        """Учитывает неудачный цикл или пробу; возвращает состояние до вызова."""
+        with self._lock:
+            previous = self.state
+            self.failures += 1
+            if previous == HALF_OPEN or (previous == CLOSED and self.failures >= self.failure_threshold):
+                delay = min(self.max_delay, self.base_delay * 2 ** self.attempt)
+                delay *= 1 + random.uniform(-self.jitter, self.jitter)
+                self.attempt += 1
+                if previous == CLOSED:
+                    self.trips += 1
+                self.state = OPEN
+                self.next_probe = self.clock() + delay
+            return previous
+
+    def stats(self):
+        return {"state": self.state, "failures": self.failures, "trips": self.trips,
+                "next_probe": self.time_until_probe()}
+
+
+class CircuitBreakerRegistry:
+    """Выключатели по ключу (host, port, unit_id): все потоки опроса одного ПЛК делят один."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._breakers = {}
+        self.settings = {}  # Параметры для новых выключателей (failure_threshold, max_delay, ...)
+
+    def get(self, host, port, unit_id=1):
+        key = (host, int(port), int(unit_id))
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(**self.settings)
+            return breaker
+
+    def configure(self, **settings):
+        """Задает параметры; уже созданные выключатели пересоздаются при следующем get()."""
+        with self._lock:
+            self.settings = settings
+            self._breakers.clear()
+
+
+circuit_breakers = CircuitBreakerRegistry()
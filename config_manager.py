@@ -1,5 +1,13 @@
 import json
 
+# Файл для хранения настроек и конфигурации таблицы
+config_file = 'config.json'
+table_config_file = 'table_config.json'
+
+# Глубина истории графика по умолчанию, секунд
+DEFAULT_PLOT_HISTORY = 4 * 3600
+
+
 def save_config(file_path, config_data):
     with open(file_path, 'w') as f:
         json.dump(config_data, f, indent=4)
@@ -0,0 +1,131 @@
+"""Опрос ПЛК без GUI: та же конфигурация JSON, что и у SWG Viewer, без PySide6 и pyqtgraph.
+
+Каждый цикл опроса (после фильтра изменений) пишется в stdout или в файл одной
+строкой JSON:
+    {"time": 1760770800.123, "device": "default", "tags": [{"row": 0, "address": "1344",
+     "real": 21.5, "dword": 1102577664, "word": 0}, ...]}
+Если в конфигурации включен архив (historian), циклы пишутся и в него.
+С --metrics (или ключом metrics конфигурации) метрики опроса периодически
+записываются в JSON-файл (см. metrics.py).
+
+Запуск:
+    python daemon.py table_config.json --output values.jsonl --duration 60 --metrics metrics.json
+"""
+import argparse
+import json
+import math
+import signal
+import sys
+import threading
+import time
+
+from acquisition import build_pollers, configure_connections, connection_settings, config_devices
+from config_manager import load_config
+from historian import Historian, DEFAULT_CHUNK_SECONDS
+from metrics import metrics
+
+
+class JsonLinesWriter:
+    """Пишет циклы опроса строками JSON; вызывается из потоков опроса всех устройств."""
+
+    def __init__(self, stream, addresses):
+        self.stream = stream
+        self.addresses = addresses
+        self.lines = 0
+        self._lock = threading.Lock()
+        self._wall_offset = time.time() - time.monotonic()  # CycleValues.timestamp — монотонное время
+
+    def consumer(self, device):
+        """Получатель циклов одного устройства для DevicePoller."""
+        return lambda values: self.write(device, values)
+
+    def write(self, device, values):
+        if not len(values.index):
+            return
+        tags = [{"row": row, "address": self.addresses[row],
+                 "real": real if math.isfinite(real) else None, "dword": dword, "word": word}
+                for row, real, dword, word in zip(values.index.tolist(), values.real.tolist(),
+                                                  values.dword.tolist(), values.word.tolist())]
+        line = json.dumps({"time": round(values.timestamp + self._wall_offset, 3), "device": device,
+                           "tags": tags}, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+            self.lines += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Опрос ПЛК SWG Viewer без GUI, вывод в JSON lines")
+    parser.add_argument("config", help="файл конфигурации JSON (как у GUI)")
+    parser.add_argument("--output", help="файл для строк JSON (по умолчанию stdout)")
+    parser.add_argument("--duration", type=float, help="время работы, с (по умолчанию до Ctrl+C/SIGTERM)")
+    parser.add_argument("--metrics", help="файл JSON для метрик опроса (по умолчанию metrics.path конфигурации)")
+    parser.add_argument("--metrics-interval", type=float, help="период записи метрик, с")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    metrics_settings = {"path": "", "interval": 60, **config.get("metrics", {})}
+    metrics_path = args.metrics or metrics_settings["path"]
+    metrics_interval = max(1.0, args.metrics_interval or metrics_settings["interval"])
+    settings = connection_settings(config)
+    configure_connections(settings)
+    table_data = config.get("table_data", [])
+    addresses = [row_data.get("address", "") for row_data in table_data]
+    tag_settings = [{key: value for key, value in row_data.items() if key not in ("address", "comment")}
+                    for row_data in table_data]
+
+    stream = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    writer = JsonLinesWriter(stream, addresses)
+    historian = None
+    historian_settings = config.get("historian", {})
+    if historian_settings.get("enabled"):
+        historian = Historian(historian_settings.get("directory", "history"),
+                              chunk_bytes=historian_settings.get("chunk_mb", 64) * 1024 * 1024,
+                              chunk_seconds=historian_settings.get("chunk_seconds", DEFAULT_CHUNK_SECONDS))
+        historian.set_tags({row: address for row, address in enumerate(addresses) if address},
+                           {row: tag.get("word_order") for row, tag in enumerate(tag_settings)
+                            if addresses[row] and tag.get("word_order")})
+        historian.start()
+
+    # Служебные сообщения опроса идут в stderr, чтобы не смешиваться с данными в stdout
+    sys.stdout = sys.stderr
+    pollers = build_pollers([(row, address) for row, address in enumerate(addresses) if address], tag_settings,
+                            config_devices(settings, config.get("devices", [])), config.get("poll_groups", {}),
+                            settings["interval"], settings["change_filter"], settings["forced_refresh"])
+    for poller in pollers:
+        poller.consumers.append(writer.consumer(poller.name))
+        if historian is not None:
+            poller.consumers.append(historian.append)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    threads = [threading.Thread(target=poller.run, name=f"poll-{poller.name}", daemon=True) for poller in pollers]
+    for thread in threads:
+        thread.start()
+    print(f"Polling {len(pollers)} devices, {sum(len(p.scheduler.rows) for p in pollers)} tags")
+
+    finish = time.monotonic() + args.duration if args.duration is not None else None
+    while True:
+        timeout = metrics_interval if metrics_path else None
+        if finish is not None:
+            remaining = max(0.0, finish - time.monotonic())
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        if stop_event.wait(timeout) or (finish is not None and time.monotonic() >= finish):
+            break
+        metrics.dump(metrics_path)
+    if metrics_path:
+        metrics.dump(metrics_path)  # Итоговый снимок, пока устройства еще зарегистрированы
+    for poller in pollers:
+        poller.stop()
+    for thread in threads:
+        thread.join()
+    if historian is not None:
+        historian.stop()
+    print(f"Stopped: {writer.lines} lines written")
+    if args.output:
+        stream.close()
+
+
+if __name__ == "__main__":
+    main()
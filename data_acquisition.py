@@ -1,87 +1,79 @@
-import re
-from time import sleep
 from PySide6.QtCore import QThread, Signal
-from modbus import ModbusClient, FloatModbusClient
-from utils import *
+from acquisition import DevicePoller
+from write_queue import WriteQueue
 
-# Класс потока, который будет считывать значения с заданным интервалом
-class CounterThread(QThread):
-    updated_value = Signal(int, list)  # Индекс адреса
+# Поток Qt вокруг acquisition.DevicePoller: опрос одного устройства тем механизмом, что задан
+# в конфигурации (threads или asyncio). Сам опрос Qt не использует, поток только переводит
+# callback-и ядра в сигналы; значения передаются в GUI через потокобезопасный SnapshotBuffer.
+class PollThread(QThread):
     connection_lost = Signal(int)  # Обрыв связи
+    plan_ready = Signal(int, int)  # Запросов за цикл до и после склейки
+    breaker_changed = Signal(str)  # Новое состояние выключателя ПЛК
 
-    def __init__(self, index, address, host='192.168.56.2', port=502, interval=500):
+    def __init__(self, device_name, device, addresses, snapshot, periods=None, historian=None, change_filter=None):
         super().__init__()
-        self.index = index
-        self.address = address
-        self.interval = interval / 1000.0  # Переводим миллисекунды в секунды
-        self.is_running = True
-        self.host = host
-        self.port = port
-        self.mb_client = ModbusClient(host=host, port=port, auto_open=True, timeout=1)
-        self.mb_float_read_from_client = FloatModbusClient(host=host, port=port, auto_open=True, timeout=1)
-        self.register = 0
+        self.device = device_name
+        self.snapshot = snapshot
+        self.historian = historian  # Необязательный архив: каждый цикл ставится в очередь записи
+        consumers = [snapshot.write] + ([historian.append] if historian is not None else [])
+        self.poller = DevicePoller(device_name, device, addresses, periods=periods, change_filter=change_filter,
+                                   consumers=consumers, on_failed=self.emit_failed,
+                                   on_breaker_changed=self.breaker_changed.emit)
+        self.host = self.poller.host
+        self.port = self.poller.port
+        self.scheduler = self.poller.scheduler
+        self.breaker = self.poller.breaker
+        self.change_filter = change_filter
 
     def run(self):
-        max_retries = 1  # Установите одну попытку для экономии ресурсов
-
-        if not self.address:
-            print(f"Ошибка: пустой адрес для потока {self.index}")
-            self.connection_lost.emit(self.index)
-            return
-
-        try:
-            self.register = int(self.address)
-        except ValueError:
-            print(f"Ошибка: недопустимый адрес '{self.address}' для потока {self.index}")
-            self.connection_lost.emit(self.index)
-            return
-
-        bit_match = re.match(r"^(\d+)\.(\d+)$", str(self.address))
-        if bit_match:
-            self.register = int(bit_match.group(1))
-            bit_position = int(bit_match.group(2))
-        else:
-            self.register = int(self.address)
-            bit_position = None
-
-        while self.is_running:
-            try:
-                if not self.mb_client.is_open:
-                    self.mb_client.open()
-
-                float_value, word1, word2, dword_value, bit_string = None, 0, 0, 0, 'Ошибка'
-
-                # Попытка чтения float с одной попыткой
-                float_result = self.mb_float_read_from_client.read_float(self.register, 1)
-                if float_result and isinstance(float_result, list):
-                    float_value = float_result[0]
-
-                # Попытка чтения holding registers
-                holding_registers = self.mb_client.read_holding_registers(self.register, 2)
-                if isinstance(holding_registers, list) and len(holding_registers) >= 2:
-                    word1, word2 = holding_registers[0], holding_registers[1]
-                    dword_value = (word2 << 16) | word1
-                    bit_string = dword_to_bit_string(holding_registers)
-
-                    if bit_position is not None:
-                        bit_value = (word1 >> bit_position) & 1
-                        word1 = bit_value
-
-                # Проверка перед обновлением значений
-                if float_value is not None and holding_registers is not None:
-                    self.updated_value.emit(self.index, [
-                        float_value, dword_value, word1, bit_string
-                    ])
-                else:
-                    print(f"Failed to read from address {self.register}")
-
-            except Exception as e:
-                print(f"Connection error at address {self.register}: {e}")
-                self.connection_lost.emit(self.index)
-
-            sleep(self.interval)
+        self.plan_ready.emit(self.scheduler.requests_before, self.scheduler.requests_after)
+        self.poller.run()
+
+    def set_focus(self, rows, background_interval=0):
+        self.poller.set_focus(rows, background_interval)
+
+    def emit_failed(self, indices):
+        if indices:
+            self.connection_lost.emit(indices[0])
 
     def stop(self):
-        self.is_running = False
-        self.mb_client.close()
-        self.wait()
\ No newline at end of file
+        self.poller.stop()
+        self.wait()
+
+
+# Поток Qt вокруг write_queue.WriteQueue: запись в один ПЛК отдельно от опроса,
+# результаты пачки приходят в GUI сигналом write_done (список пар (WriteItem, ошибка или None))
+class WriteThread(QThread):
+    write_done = Signal(list)
+
+    def __init__(self, device_name, device, verify=True):
+        super().__init__()
+        self.device = device_name
+        self.queue = WriteQueue(device["ip"], device["port"], device["unit_id"], verify=verify,
+                                on_done=self.write_done.emit)
+
+    def run(self):
+        self.queue.run()
+
+    def put(self, items):
+        self.queue.put(items)
+
+    def stop(self):
+        self.queue.stop()
+        self.wait()
+
+
+# Поток воспроизведения архива: вместо опроса ПЛК записанные циклы пишутся в тот же SnapshotBuffer
+class ReplayThread(QThread):
+    def __init__(self, source, snapshot):
+        super().__init__()
+        self.source = source  # replay.ReplaySource
+        self.snapshot = snapshot
+
+    def run(self):
+        self.source.run(self.snapshot.write)
+
+    def stop(self):
+        self.source.stop()
+        self.wait()
+
@@ -0,0 +1,145 @@
+import numpy as np
+
+from ring_buffer import RingSeries
+
+# Размеры корзин уровней пирамиды минимумов/максимумов (в точках исходных данных)
+LEVEL_FACTORS = (16, 256, 4096)
+# Сколько точек на пиксель рисуется при прореживании (минимум и максимум)
+POINTS_PER_PIXEL = 2
+
+
+def _reduce(t_min, y_min, t_max, y_max, size):
+    """Сворачивает группы по size элементов в (время и значение минимума, время и значение максимума)."""
+    n = len(y_min)
+    full = n // size * size
+    lo_parts, hi_parts = [], []
+    if full:
+        starts = np.arange(0, full, size)
+        lo_parts.append(y_min[:full].reshape(-1, size).argmin(axis=1) + starts)
+        hi_parts.append(y_max[:full].reshape(-1, size).argmax(axis=1) + starts)
+    if full < n:
+        lo_parts.append(np.array([full + y_min[full:].argmin()]))
+        hi_parts.append(np.array([full + y_max[full:].argmax()]))
+    i_lo = np.concatenate(lo_parts)
+    i_hi = np.concatenate(hi_parts)
+    return t_min[i_lo], y_min[i_lo], t_max[i_hi], y_max[i_hi]
+
+
+def _interleave(t_min, y_min, t_max, y_max):
+    """Склеивает минимумы и максимумы в одну линию, сохраняя порядок по времени внутри пикселя."""
+    min_first = t_min <= t_max
+    t = np.empty(2 * len(t_min), dtype=np.float64)
+    y = np.empty(2 * len(y_min), dtype=np.float64)
+    t[0::2] = np.where(min_first, t_min, t_max)
+    y[0::2] = np.where(min_first, y_min, y_max)
+    t[1::2] = np.where(min_first, t_max, t_min)
+    y[1::2] = np.where(min_first, y_max, y_min)
+    return t, y
+
+
+def minmax_decimate(t, y, bins):
+    """Пиковое прореживание: не больше двух точек (минимум и максимум) на каждый из bins интервалов."""
+    if len(y) <= POINTS_PER_PIXEL * bins:
+        return t, y
+    return _interleave(*_reduce(t, y, t, y, -(-len(y) // bins)))
+
+
+class _MinMaxLevel:
+    """Один уровень пирамиды: минимум и максимум (с временем) для каждой корзины из factor точек."""
+
+    def __init__(self, factor, buckets):
+        self.factor = factor
+        self.buckets = buckets
+        # Как и в RingSeries, каждая корзина хранится дважды, чтобы срезы были непрерывными
+        self.t_min = np.zeros(2 * buckets, dtype=np.float64)
+        self.y_min = np.zeros(2 * buckets, dtype=np.float64)
+        self.t_max = np.zeros(2 * buckets, dtype=np.float64)
+        self.y_max = np.zeros(2 * buckets, dtype=np.float64)
+
+    def add(self, number, timestamp, value):
+        """Учитывает точку с абсолютным номером number."""
+        slot = (number // self.factor) % self.buckets
+        mirror = slot + self.buckets
+        if number % self.factor == 0:
+            self.t_min[slot] = self.t_min[mirror] = timestamp
+            self.y_min[slot] = self.y_min[mirror] = value
+            self.t_max[slot] = self.t_max[mirror] = timestamp
+            self.y_max[slot] = self.y_max[mirror] = value
+            return
+        if value < self.y_min[slot]:
+            self.t_min[slot] = self.t_min[mirror] = timestamp
+            self.y_min[slot] = self.y_min[mirror] = value
+        if value > self.y_max[slot]:
+            self.t_max[slot] = self.t_max[mirror] = timestamp
+            self.y_max[slot] = self.y_max[mirror] = value
+
+    def view(self, first, last):
+        """Корзины с абсолютными номерами [first, last) как непрерывные срезы."""
+        start = first % self.buckets
+        stop = start + (last - first)
+        return self.t_min[start:stop], self.y_min[start:stop], self.t_max[start:stop], self.y_max[start:stop]
+
+
+class HistorySeries(RingSeries):
+    """Длинная история линии графика с прореживанием под видимый диапазон.
+
+    Помимо кольцевого буфера ведется пирамида минимумов/максимумов, поэтому
+    стоимость decimate() зависит от ширины графика в пикселях, а не от длины истории.
+    """
+
+    def __init__(self, capacity):
+        factors = [factor for factor in LEVEL_FACTORS if factor * 4 <= capacity]
+        if factors:
+            # Емкость кратна самой крупной корзине, чтобы корзины не пересекали границу кольца
+            capacity = -(-int(capacity) // factors[-1]) * factors[-1]
+        super().__init__(capacity)
+        self.total = 0  # Сколько точек добавлено за все время
+        # +1 корзина: самая старая может быть заполнена лишь частично
+        self.levels = [_MinMaxLevel(factor, self.capacity // factor + 1) for factor in factors]
+
+    def append(self, timestamp, value):
+        super().append(timestamp, value)
+        for level in self.levels:
+            level.add(self.total, timestamp, value)
+        self.total += 1
+
+    def clear(self):
+        super().clear()
+        self.total = 0
+
+    def decimate(self, x_min=None, x_max=None, pixels=1000):
+        """Точки для отрисовки диапазона [x_min, x_max] шириной pixels.
+
+        Если точек в диапазоне мало, возвращаются исходные данные без копирования;
+        иначе — не больше POINTS_PER_PIXEL точек на пиксель с сохранением пиков.
+        """
+        t, y = self.view()
+        count = len(t)
+        if not count:
+            return t, y
+
+        # Одна точка за краем диапазона с каждой стороны, чтобы линия не обрывалась
+        lo = 0 if x_min is None else max(0, int(np.searchsorted(t, x_min, "left")) - 1)
+        hi = count if x_max is None else min(count, int(np.searchsorted(t, x_max, "right")) + 1)
+        bins = max(1, int(pixels))
+        visible = hi - lo
+        if visible <= POINTS_PER_PIXEL * bins:
+            return t[lo:hi], y[lo:hi]
+
+        # Самый грубый уровень, у которого на каждый пиксель еще приходится хотя бы одна корзина
+        level = None
+        for candidate in self.levels:
+            if visible // candidate.factor >= bins:
+                level = candidate
+        if level is None:
+            t_lo, y_lo = t[lo:hi], y[lo:hi]
+            return _interleave(*_reduce(t_lo, y_lo, t_lo, y_lo, -(-visible // bins)))
+
+        first_number = self.total - count
+        first_bucket = (first_number + lo) // level.factor
+        if first_bucket * level.factor < first_number:
+            # Самая старая корзина частично содержит уже вытесненные точки — пропускаем ее (меньше пикселя)
+            first_bucket += 1
+        last_bucket = (first_number + hi - 1) // level.factor + 1
+        buckets = level.view(first_bucket, last_bucket)
+        return _interleave(*_reduce(*buckets, -(-(last_bucket - first_bucket) // bins)))
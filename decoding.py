@@ -0,0 +1,51 @@
+import numpy as np
+
+# Позиции символов '0'/'1' в строке вида 0000_0000_..._0000 (32 бита, "_" через каждые 4)
+_BIT_CHAR_POSITIONS = np.array([i + i // 4 for i in range(32)])
+_BIT_STRING_LENGTH = 32 + 7
+NO_BIT = -1  # Значение в массиве битов для тегов без ".бит" в адресе
+
+
+def decode_registers(words, offsets, bit_positions=None, high_first=None, single=None):
+    """Декодирует теги блока за один проход NumPy.
+
+    words — прочитанные регистры (uint16), offsets — смещение первого регистра
+    каждого тега в words, bit_positions — номер бита или NO_BIT.
+    Порядок слов как в ПЛК: младшее слово первым; high_first — маска тегов со
+    старшим словом первым, single — маска тегов из одного регистра (старшее слово 0).
+    Возвращает (real, dword, word): float64, uint32 и int64 массивы; word — первый регистр тега.
+    """
+    words = np.asarray(words, dtype=np.uint16)
+    offsets = np.asarray(offsets, dtype=np.intp)
+
+    # Пары слов (младшее, старшее) в little-endian раскладке — это готовые uint32/float32
+    pairs = np.empty((len(offsets), 2), dtype="<u2")
+    pairs[:, 0] = words[offsets]
+    if single is not None and np.any(single):
+        pairs[:, 1] = np.where(single, 0, words[np.minimum(offsets + 1, len(words) - 1)])
+    else:
+        pairs[:, 1] = words[offsets + 1]
+    first = pairs[:, 0].astype(np.int64)
+    if high_first is not None and np.any(high_first):
+        pairs[high_first] = pairs[high_first][:, ::-1]
+    dword = pairs.view("<u4").ravel()
+    with np.errstate(invalid="ignore"):  # Сигнальные NaN в регистрах — обычные данные, не ошибка
+        real = np.round(pairs.view("<f4").ravel().astype(np.float64), 6)
+
+    word = first
+    if bit_positions is not None:
+        bit_positions = np.asarray(bit_positions, dtype=np.int64)
+        has_bit = bit_positions >= 0
+        if has_bit.any():
+            shifted = word >> np.where(has_bit, bit_positions, 0)
+            word = np.where(has_bit, shifted & 1, word)
+    return real, dword.astype(np.uint32), word
+
+
+def format_bit_strings(dword):
+    """Форматирует массив DWORD в строки '2#xxxx_xxxx_...' (как utils.dword_to_bit_string)."""
+    dword = np.asarray(dword, dtype=np.uint32)
+    bits = np.unpackbits(dword.astype(">u4").view(np.uint8).reshape(-1, 4), axis=1)
+    chars = np.full((len(dword), _BIT_STRING_LENGTH), ord("_"), dtype=np.uint8)
+    chars[:, _BIT_CHAR_POSITIONS] = bits + ord("0")
+    return ["2#" + s.decode("ascii") for s in chars.view(f"S{_BIT_STRING_LENGTH}").ravel()]
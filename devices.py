@@ -0,0 +1,68 @@
+from circuit_breaker import CLOSED
+
+# Устройство для строк таблицы без ключа device: его параметры задает блок connection
+DEFAULT_DEVICE = "default"
+# Параметры устройства в списке devices конфигурации; незаданные берутся из блока connection
+DEVICE_SETTING_KEYS = ("ip", "port", "unit_id", "interval", "backend", "block_gap", "max_in_flight")
+
+
+def load_devices(device_configs, defaults):
+    """Словарь имя -> параметры устройства.
+
+    device_configs — список devices из конфигурации, defaults — параметры
+    подключения по умолчанию (блок connection). Устройство DEFAULT_DEVICE есть
+    всегда, даже если ни одна строка к нему не привязана.
+    """
+    devices = {DEFAULT_DEVICE: dict(defaults, name=DEFAULT_DEVICE)}
+    for entry in device_configs or []:
+        device = dict(defaults)
+        device.update({key: entry[key] for key in DEVICE_SETTING_KEYS if key in entry})
+        device["name"] = str(entry.get("name") or f"{device['ip']}:{device['port']}")
+        devices[device["name"]] = device
+    return devices
+
+
+def split_by_device(addresses, tag_settings, devices):
+    """Раскладывает пары (индекс строки, адрес) по устройствам строк; порядок устройств — как в devices.
+
+    Строки с неизвестным устройством не опрашиваются и возвращаются отдельным списком.
+    """
+    by_device = {}
+    unknown = []
+    for index, address in addresses:
+        settings = tag_settings[index] if index < len(tag_settings) else {}
+        name = settings.get("device") or DEFAULT_DEVICE
+        if name in devices:
+            by_device.setdefault(name, []).append((index, address))
+        else:
+            unknown.append((index, address))
+    return {name: by_device[name] for name in devices if name in by_device}, unknown
+
+
+def device_stats(name, host, port, group_stats, state):
+    """Пропускная способность и задержка одного устройства по статистике его групп опроса.
+
+    state — состояние выключателя ПЛК: пока связи нет, пропускная способность нулевая.
+    """
+    online = state == CLOSED
+    cycles_rate = sum(s["rate"] for s in group_stats)
+    latency = (sum(s["latency"] * s["rate"] for s in group_stats) / cycles_rate if cycles_rate
+               else max((s["latency"] for s in group_stats), default=0.0))
+    return {
+        "name": name,
+        "host": f"{host}:{port}",
+        "state": state,
+        "tags": sum(s["tags"] for s in group_stats),
+        "tags_rate": sum(s["tags"] * s["rate"] for s in group_stats) if online else 0.0,
+        "requests_rate": sum(s["requests"] * s["rate"] for s in group_stats) if online else 0.0,
+        "latency": latency,  # Среднее время цикла, мс, с весом по частоте групп
+        "latency_max": max((s["latency_max"] for s in group_stats), default=0.0),
+        "overruns": sum(s["overruns"] for s in group_stats),
+    }
+
+
+def format_device_stats(stats):
+    """Статистика устройств для журнала и строки состояния, по строке на устройство."""
+    return "\n".join(f"{s['name']} ({s['host']}, {s['state']}): {s['tags']} тегов, {s['tags_rate']:.0f} тег/с, "
+                     f"{s['requests_rate']:.0f} запр/с, цикл {s['latency']:.1f}/{s['latency_max']:.1f} мс, "
+                     f"пропущено {s['overruns']}" for s in stats)
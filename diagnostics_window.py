@@ -0,0 +1,99 @@
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QFontDatabase
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QPushButton, QFileDialog, QLabel
+
+from metrics import metrics
+
+# Период обновления окна, мс
+REFRESH_INTERVAL = 1000
+
+
+def format_ms(seconds):
+    return "—" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def format_snapshot(snapshot):
+    """Текстовая сводка снимка metrics.snapshot(): ПЛК, устройства и группы, гистограммы GUI."""
+    lines = [f"Время работы: {snapshot['uptime_s']:.0f} с", "", "Запросы к ПЛК (задержка, мс):"]
+    for key, endpoint in snapshot["endpoints"].items():
+        latency = endpoint["latency_s"]
+        lines.append(f"  {key}: {endpoint['requests']} запросов, ok {endpoint['ok']}, "
+                     f"таймаут {endpoint['timeout']}, ошибка {endpoint['error']}, исключение {endpoint['exception']}; "
+                     f"p50 {format_ms(latency['p50'])}, p90 {format_ms(latency['p90'])}, "
+                     f"p99 {format_ms(latency['p99'])}, макс. {format_ms(latency['max'] or None)}")
+
+    lines += ["", "Устройства и группы опроса:"]
+    for name, source in snapshot["sources"].items():
+        breaker = source["breaker"]
+        lines.append(f"  {name} ({source['endpoint']}, {source['backend']}): выключатель {breaker['state']}, "
+                     f"срабатываний {breaker['trips']}")
+        for group in source["groups"]:
+            lines.append(f"    {group['name']}: {group['tags']} тегов, {group['requests']} запросов/цикл, "
+                         f"{group['rate']:.1f} Гц при периоде {group['period']:.0f} мс, "
+                         f"джиттер {group['jitter']:.1f} мс, цикл {group['latency']:.1f}/{group['latency_max']:.1f} мс, "
+                         f"пропущено {group['overruns']}")
+        if source["change_filter"] is not None:
+            lines.append(f"    фильтр изменений: передано {source['change_filter']['delivered']}, "
+                         f"отброшено {source['change_filter']['suppressed']}")
+
+    lines += ["", "GUI:"]
+    for name, histogram in snapshot["histograms"].items():
+        if name.endswith("_s"):
+            values = (f"p50 {format_ms(histogram['p50'])}, p90 {format_ms(histogram['p90'])}, "
+                      f"p99 {format_ms(histogram['p99'])}, макс. {format_ms(histogram['max'] or None)} мс")
+        else:
+            values = f"p50 {histogram['p50']}, p90 {histogram['p90']}, p99 {histogram['p99']}, макс. {histogram['max']:g}"
+        lines.append(f"  {name}: {histogram['count']} раз; {values}")
+    return "\n".join(lines)
+
+
+# Окно диагностики: метрики опроса и отрисовки, обновляются раз в секунду, пока окно открыто
+class DiagnosticsWindow(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setWindowFlags(Qt.Window)
+        self.setWindowTitle("Диагностика")
+        self.setGeometry(420, 420, 900, 500)
+
+        self.text = QPlainTextEdit(self)
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.status_label = QLabel("", self)
+        save_button = QPushButton("Сохранить JSON", self)
+        save_button.clicked.connect(self.save_json)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.status_label)
+        button_layout.addStretch()
+        button_layout.addWidget(save_button)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.text)
+        layout.addLayout(button_layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(REFRESH_INTERVAL)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        scroll = self.text.verticalScrollBar().value()
+        self.text.setPlainText(format_snapshot(metrics.snapshot()))
+        self.text.verticalScrollBar().setValue(scroll)
+
+    def save_json(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить метрики", "metrics.json", "JSON Files (*.json)")
+        if not file_path:
+            return
+        try:
+            metrics.dump(file_path)
+            self.status_label.setText(f"Сохранено: {file_path}")
+        except OSError as e:
+            self.status_label.setText(f"Ошибка записи: {e}")
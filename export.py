@@ -0,0 +1,331 @@
+"""Потоковый экспорт архива (historian) в CSV или столбцовые файлы.
+
+Архив читается блоками по chunk_rows строк, поэтому память не зависит от
+длины экспортируемого интервала. Передискретизация (last, mean, minmax)
+выполняется по ходу чтения: для незавершенной корзины в памяти держатся
+только накопленные значения по тегам (последнее, сумма и число, min/max).
+
+Запуск без GUI:
+    python export.py history out.csv --tags 1344,1346 --start "2026-10-18 08:00" --resample 1 --method mean
+"""
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+from historian import list_chunks, open_chunk, tag_word_layout, word_from_raw, META_FILE
+
+EXPORT_FORMATS = ("csv", "columns")
+RESAMPLE_METHODS = ("last", "mean", "minmax")
+# Типы столбцов значений в столбцовом формате; остальные — float64
+VALUE_DTYPES = {"raw": "<u4", "word": "<i8"}
+# Строк архива на один шаг экспорта
+DEFAULT_CHUNK_ROWS = 256 * 1024
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def value_columns(resample, method):
+    """Имена столбцов значений в результате экспорта.
+
+    Без передискретизации: REAL, DWORD (raw) и WORD — как в таблице при опросе.
+    """
+    if not resample:
+        return ["value", "raw", "word"]
+    return ["min", "max"] if method == "minmax" else ["value"]
+
+
+def _aggregate(buckets, columns, values, method, column_count):
+    """Сворачивает строки в одну на (корзина, тег); порядок строк внутри группы — по времени."""
+    key = buckets * column_count + columns
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    value = values[order]
+    starts = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+    if method == "last":
+        ends = np.concatenate((starts[1:], [len(key)])) - 1
+        result = {"value": value[ends]}
+    elif method == "mean":
+        counts = np.diff(np.concatenate((starts, [len(key)])))
+        result = {"value": np.add.reduceat(value, starts) / counts}
+    else:
+        result = {"min": np.minimum.reduceat(value, starts), "max": np.maximum.reduceat(value, starts)}
+    return key[starts] // column_count, key[starts] % column_count, result
+
+
+def _concat(parts):
+    """Склеивает результаты (t, columns, values) по порядку; None, если склеивать нечего."""
+    parts = [part for part in parts if part is not None]
+    if len(parts) < 2:
+        return parts[0] if parts else None
+    return (np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts]),
+            {name: np.concatenate([part[2][name] for part in parts]) for name in parts[0][2]})
+
+
+class _Resampler:
+    """Передискретизация потока: отдает только завершенные корзины.
+
+    Строки незавершенной (последней) корзины не хранятся: они сразу сворачиваются
+    в накопленные значения по тегам — последнее, сумма и число, min и max, — и
+    корзина отдается целиком, когда приходит строка следующей корзины.
+    Строки потока идут по времени; строка, опоздавшая в уже завершенную корзину,
+    не теряется, а отдается отдельной строкой этой корзины.
+    """
+
+    def __init__(self, period, method, column_count):
+        self.period = period
+        self.method = method
+        self.column_count = column_count
+        self._bucket = None  # Номер незавершенной корзины
+        self._count = np.zeros(column_count, dtype=np.int64)
+        self._last = np.zeros(column_count, dtype=np.float64)
+        self._sum = np.zeros(column_count, dtype=np.float64)
+        self._min = np.full(column_count, np.inf)
+        self._max = np.full(column_count, -np.inf)
+
+    def feed(self, t, columns, values):
+        if not len(t):
+            return None
+        buckets = np.floor(t / self.period).astype(np.int64)
+        latest = int(buckets.max())
+        parts = []
+        if self._bucket is not None:
+            same = buckets == self._bucket
+            self._fold(columns[same], values[same])
+            if latest > self._bucket:
+                parts.append(self._close())
+            buckets, columns, values = buckets[~same], columns[~same], values[~same]
+        if self._bucket is None:
+            # Самая поздняя корзина блока копится дальше
+            self._bucket = latest
+            tail = buckets == latest
+            self._fold(columns[tail], values[tail])
+            buckets, columns, values = buckets[~tail], columns[~tail], values[~tail]
+
+        # Остальные корзины блока завершены (или опоздали): отдаются сразу
+        parts.append(self._emit(buckets, columns, values))
+        result = _concat(parts)
+        if result is not None and len(result[0]) > 1 and (np.diff(result[0]) < 0).any():
+            order = np.argsort(result[0], kind="stable")
+            result = (result[0][order], result[1][order], {name: value[order] for name, value in result[2].items()})
+        return result
+
+    def flush(self):
+        if self._bucket is None:
+            return None
+        return self._close()
+
+    def _fold(self, columns, values):
+        """Добавляет строки незавершенной корзины к накопленным значениям."""
+        if not len(columns):
+            return
+        np.add.at(self._count, columns, 1)
+        if self.method == "last":
+            reverse = columns[::-1]
+            tags, first = np.unique(reverse, return_index=True)
+            self._last[tags] = values[::-1][first]
+        elif self.method == "mean":
+            np.add.at(self._sum, columns, values)
+        else:
+            np.minimum.at(self._min, columns, values)
+            np.maximum.at(self._max, columns, values)
+
+    def _close(self):
+        """Отдает незавершенную корзину и сбрасывает накопленные значения."""
+        tags = np.flatnonzero(self._count)
+        if self.method == "last":
+            result = {"value": self._last[tags].copy()}
+        elif self.method == "mean":
+            result = {"value": self._sum[tags] / self._count[tags]}
+        else:
+            result = {"min": self._min[tags].copy(), "max": self._max[tags].copy()}
+        t = np.full(len(tags), self._bucket * self.period, dtype=np.float64)
+        self._bucket = None
+        self._count[:] = 0
+        self._sum[:] = 0.0
+        self._min[:] = np.inf
+        self._max[:] = -np.inf
+        return (t, tags, result) if len(tags) else None
+
+    def _emit(self, buckets, columns, values):
+        if not len(buckets):
+            return None
+        buckets, columns, result = _aggregate(buckets, columns, values, self.method, self.column_count)
+        return buckets * self.period, columns, result
+
+
+def local_offsets(t):
+    """Сдвиг местного времени от UTC для каждой метки t (с учетом перехода на летнее время).
+
+    Сдвиг меняется только на целой секунде, поэтому localtime вызывается один раз
+    на каждую встречающуюся секунду, а не на каждую строку.
+    """
+    seconds, inverse = np.unique(np.floor(t), return_inverse=True)
+    offsets = np.array([time.localtime(second).tm_gmtoff for second in seconds.tolist()], dtype=np.int64)
+    return offsets[inverse].astype("timedelta64[s]")
+
+
+class _CsvWriter:
+    def __init__(self, output, addresses, names):
+        self.addresses = np.array(addresses, dtype=object)
+        self.names = names
+        self._file = open(output, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(["time", "timestamp", "address"] + names)
+
+    def write(self, t, columns, values):
+        stamps = np.datetime_as_string((t * 1000).astype("datetime64[ms]") + local_offsets(t), unit="ms")
+        self._writer.writerows(zip(np.char.replace(stamps, "T", " ").tolist(),
+                                   np.round(t, 3).tolist(), self.addresses[columns].tolist(),
+                                   *(values[name].tolist() for name in self.names)))
+
+    def close(self, **meta):
+        self._file.close()
+
+
+class _ColumnWriter:
+    """Столбцовый формат: папка с файлом <столбец>.bin на каждый столбец и meta.json (читается np.memmap)."""
+
+    def __init__(self, output, addresses, names):
+        os.makedirs(output, exist_ok=True)
+        self.output = output
+        self.addresses = list(addresses)
+        self.dtypes = {"timestamp": "<f8", "tag": "<i4"}
+        self.dtypes.update({name: VALUE_DTYPES.get(name, "<f8") for name in names})
+        self.names = names
+        self.count = 0
+        self._files = {name: open(os.path.join(output, f"{name}.bin"), "wb") for name in self.dtypes}
+
+    def write(self, t, columns, values):
+        arrays = dict(values, timestamp=t, tag=columns)
+        for name, dtype in self.dtypes.items():
+            self._files[name].write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes())
+        self.count += len(t)
+
+    def close(self, **meta):
+        for f in self._files.values():
+            f.close()
+        meta.update({"columns": self.dtypes, "addresses": self.addresses, "count": self.count})
+        with open(os.path.join(self.output, META_FILE), "w") as f:
+            json.dump(meta, f, indent=4)
+
+
+def export_history(directory, output, addresses=None, start=None, end=None, fmt="csv",
+                   resample=None, method="last", chunk_rows=DEFAULT_CHUNK_ROWS, progress=None):
+    """Экспортирует архив directory в output и возвращает число записанных строк.
+
+    addresses — адреса тегов (None — все), start/end — границы по времени Unix,
+    resample — ширина корзины в секундах (None — без передискретизации),
+    progress(доля) вызывается после каждого блока.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+    if resample and method not in RESAMPLE_METHODS:
+        raise ValueError(f"Неизвестный способ передискретизации: {method}")
+
+    chunks = []
+    for path in list_chunks(directory):
+        meta, _ = open_chunk(path)
+        if meta["count"]:
+            chunks.append((path, meta))
+    if addresses is None:
+        addresses = []
+        for _, meta in chunks:
+            addresses.extend(address for address in meta["tags"].values() if address not in addresses)
+    addresses = list(addresses)
+    column_of = {address: column for column, address in enumerate(addresses)}
+
+    names = value_columns(resample, method)
+    writer = (_CsvWriter if fmt == "csv" else _ColumnWriter)(output, addresses, names)
+    resampler = _Resampler(resample, method, len(addresses)) if resample else None
+    written = 0
+    total_rows = sum(meta["count"] for _, meta in chunks) or 1
+    done_rows = 0
+
+    def emit(result):
+        nonlocal written
+        if result is not None:
+            writer.write(*result)
+            written += len(result[0])
+
+    try:
+        for path, meta in chunks:
+            _, columns = open_chunk(path)
+            timestamps = columns["timestamp"]
+            count = len(timestamps)
+            # Номер тега фрагмента -> столбец экспорта (-1 — тег не выбран)
+            remap = np.full(max(meta["tags"], default=-1) + 1, -1, dtype=np.int64)
+            for tag, address in meta["tags"].items():
+                remap[tag] = column_of.get(address, -1)
+            high_first, bits = tag_word_layout(meta)
+
+            lo = 0 if start is None else int(np.searchsorted(timestamps, start, "left"))
+            hi = count if end is None else int(np.searchsorted(timestamps, end, "left"))
+            for position in range(lo, hi, chunk_rows):
+                stop = min(hi, position + chunk_rows)
+                tags = np.array(columns["tag"][position:stop])
+                known = tags < len(remap)
+                selected = np.full(len(tags), -1, dtype=np.int64)
+                selected[known] = remap[tags[known]]
+                mask = selected >= 0
+                t = np.array(timestamps[position:stop])[mask]
+                tag_columns = selected[mask]
+                value = np.array(columns["value"][position:stop])[mask]
+                if resampler is not None:
+                    emit(resampler.feed(t, tag_columns, value))
+                elif len(t):
+                    raw = np.array(columns["raw"][position:stop])[mask]
+                    tag = tags[mask]
+                    emit((t, tag_columns, {"value": value, "raw": raw,
+                                           "word": word_from_raw(raw, high_first[tag], bits[tag])}))
+                if progress:
+                    progress(min(1.0, (done_rows + stop) / total_rows))
+            done_rows += count
+        if resampler is not None:
+            emit(resampler.flush())
+    finally:
+        writer.close(source=os.path.abspath(directory), start=start, end=end, resample=resample,
+                     method=method if resample else None)
+    return written
+
+
+def parse_time(text):
+    """Время вида '2026-10-18 08:00[:00]' (местное) или число секунд Unix."""
+    if text is None:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    for fmt in (TIME_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(text, fmt))
+        except ValueError:
+            continue
+    raise ValueError(f"Не удалось разобрать время: {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт архива SWG Viewer в CSV или столбцовые файлы")
+    parser.add_argument("history", help="папка архива")
+    parser.add_argument("output", help="файл CSV или папка для столбцового формата")
+    parser.add_argument("--tags", help="адреса через запятую (по умолчанию все)")
+    parser.add_argument("--start", help="начало интервала: 'ГГГГ-ММ-ДД ЧЧ:ММ[:СС]' или секунды Unix")
+    parser.add_argument("--end", help="конец интервала (не включая)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--resample", type=float, help="ширина корзины передискретизации, с")
+    parser.add_argument("--method", choices=RESAMPLE_METHODS, default="last")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    addresses = [tag.strip() for tag in args.tags.split(",")] if args.tags else None
+    started = time.perf_counter()
+    rows = export_history(args.history, args.output, addresses, parse_time(args.start), parse_time(args.end),
+                          args.format, args.resample, args.method, args.chunk_rows)
+    print(f"Экспортировано {rows} строк в {args.output} за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
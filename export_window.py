@@ -0,0 +1,136 @@
+from PySide6.QtCore import Qt, QThread, Signal, QDateTime
+from PySide6.QtWidgets import (
+    QWidget, QFormLayout, QLineEdit, QPushButton, QLabel, QComboBox, QDoubleSpinBox, QDateTimeEdit,
+    QCheckBox, QFileDialog, QHBoxLayout
+)
+
+from export import export_history, EXPORT_FORMATS, RESAMPLE_METHODS
+
+
+# Экспорт идет в отдельном потоке, чтобы GUI не замирал на длинных интервалах
+class ExportThread(QThread):
+    progress = Signal(float)
+    done = Signal(int, str)  # Число строк и текст ошибки (пустой, если ошибки нет)
+
+    def __init__(self, kwargs):
+        super().__init__()
+        self.kwargs = kwargs
+
+    def run(self):
+        try:
+            rows = export_history(progress=self.progress.emit, **self.kwargs)
+            self.done.emit(rows, "")
+        except Exception as e:
+            self.done.emit(0, str(e))
+
+
+# Окно экспорта архива в CSV или столбцовые файлы
+class ExportWindow(QWidget):
+    def __init__(self, history_directory, addresses):
+        super().__init__()
+        self.setWindowFlags(Qt.Window)
+        self.setWindowTitle("Экспорт архива")
+        self.setGeometry(400, 400, 420, 320)
+        self.thread = None
+
+        self.layout = QFormLayout(self)
+
+        self.history_input = QLineEdit(history_directory, self)
+        history_button = QPushButton("...", self)
+        history_button.clicked.connect(self.choose_history)
+        history_row = QHBoxLayout()
+        history_row.addWidget(self.history_input)
+        history_row.addWidget(history_button)
+
+        self.format_combo = QComboBox(self)
+        self.format_combo.addItems(EXPORT_FORMATS)
+
+        self.output_input = QLineEdit(self)
+        output_button = QPushButton("...", self)
+        output_button.clicked.connect(self.choose_output)
+        output_row = QHBoxLayout()
+        output_row.addWidget(self.output_input)
+        output_row.addWidget(output_button)
+
+        # Теги: выбранные в основной таблице или все записанные
+        self.tags_input = QLineEdit(", ".join(addresses), self)
+        self.tags_input.setPlaceholderText("Все теги архива")
+
+        # Интервал времени; если флажок снят — весь архив
+        self.range_checkbox = QCheckBox("Только интервал", self)
+        now = QDateTime.currentDateTime()
+        self.start_input = QDateTimeEdit(now.addSecs(-3600), self)
+        self.end_input = QDateTimeEdit(now, self)
+        for edit in (self.start_input, self.end_input):
+            edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+
+        # Передискретизация: 0 — без нее
+        self.resample_input = QDoubleSpinBox(self)
+        self.resample_input.setRange(0, 86400)
+        self.resample_input.setDecimals(3)
+        self.resample_input.setSuffix(" с")
+        self.method_combo = QComboBox(self)
+        self.method_combo.addItems(RESAMPLE_METHODS)
+
+        self.export_button = QPushButton("Экспорт", self)
+        self.export_button.clicked.connect(self.start_export)
+        self.status_label = QLabel("", alignment=Qt.AlignCenter)
+
+        self.layout.addRow(QLabel("Архив:"), history_row)
+        self.layout.addRow(QLabel("Формат:"), self.format_combo)
+        self.layout.addRow(QLabel("Файл/папка:"), output_row)
+        self.layout.addRow(QLabel("Теги:"), self.tags_input)
+        self.layout.addRow(self.range_checkbox)
+        self.layout.addRow(QLabel("С:"), self.start_input)
+        self.layout.addRow(QLabel("По:"), self.end_input)
+        self.layout.addRow(QLabel("Корзина:"), self.resample_input)
+        self.layout.addRow(QLabel("Способ:"), self.method_combo)
+        self.layout.addRow(self.export_button)
+        self.layout.addRow(self.status_label)
+
+    def choose_history(self):
+        directory = QFileDialog.getExistingDirectory(self, "Папка архива", self.history_input.text())
+        if directory:
+            self.history_input.setText(directory)
+
+    def choose_output(self):
+        if self.format_combo.currentText() == "csv":
+            path, _ = QFileDialog.getSaveFileName(self, "Экспорт в CSV", "", "CSV Files (*.csv)")
+        else:
+            path = QFileDialog.getExistingDirectory(self, "Папка для столбцовых файлов")
+        if path:
+            self.output_input.setText(path)
+
+    def start_export(self):
+        output = self.output_input.text().strip()
+        if not output:
+            self.status_label.setText("Укажите файл или папку для экспорта.")
+            return
+        tags = [tag.strip() for tag in self.tags_input.text().split(",") if tag.strip()]
+        use_range = self.range_checkbox.isChecked()
+        kwargs = {
+            "directory": self.history_input.text().strip(),
+            "output": output,
+            "addresses": tags or None,
+            "start": self.start_input.dateTime().toSecsSinceEpoch() if use_range else None,
+            "end": self.end_input.dateTime().toSecsSinceEpoch() if use_range else None,
+            "fmt": self.format_combo.currentText(),
+            "resample": self.resample_input.value() or None,
+            "method": self.method_combo.currentText(),
+        }
+        self.export_button.setEnabled(False)
+        self.status_label.setText("Экспорт...")
+        self.thread = ExportThread(kwargs)
+        self.thread.progress.connect(self.show_progress)
+        self.thread.done.connect(self.finish_export)
+        self.thread.start()
+
+    def show_progress(self, fraction):
+        self.status_label.setText(f"Экспорт... {fraction * 100:.0f}%")
+
+    def finish_export(self, rows, error):
+        self.export_button.setEnabled(True)
+        if error:
+            self.status_label.setText(f"Ошибка экспорта: {error}")
+        else:
+            self.status_label.setText(f"Экспортировано строк: {rows}")
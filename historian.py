@@ -0,0 +1,267 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from tag_compiler import HIGH_FIRST, WORD_ORDERS, parse_address
+
+# Столбцы архива: время (секунды Unix), номер тега, DWORD тега (после перестановки слов по word_order),
+# значение REAL. Порядок слов каждого тега хранится в meta.json (word_orders): по нему
+# из raw восстанавливается WORD — первый регистр тега (word_from_raw)
+COLUMNS = (("timestamp", "<f8"), ("tag", "<i4"), ("raw", "<u4"), ("value", "<f8"))
+ROW_BYTES = sum(np.dtype(dtype).itemsize for _, dtype in COLUMNS)
+META_FILE = "meta.json"
+
+# Новый фрагмент начинается, когда текущий превышает размер или возраст
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+DEFAULT_CHUNK_SECONDS = 3600
+# Сколько циклов опроса может ждать записи; при переполнении новые циклы отбрасываются
+DEFAULT_QUEUE_SIZE = 1000
+# Сколько циклов писатель склеивает в одну запись на диск
+MAX_BATCH_CYCLES = 200
+# Как часто писатель просыпается без данных, чтобы проверить возраст фрагмента, с
+IDLE_CHECK_INTERVAL = 1.0
+
+
+class _Chunk:
+    """Открытый фрагмент архива: по одному файлу на столбец плюс meta.json."""
+
+    def __init__(self, path, tags, word_orders):
+        self.path = path
+        self.tags = tags
+        self.word_orders = word_orders
+        self.count = 0
+        self.started = time.time()
+        os.makedirs(path)
+        self.files = {name: open(os.path.join(path, f"{name}.bin"), "wb") for name, _ in COLUMNS}
+        self.write_meta(closed=False)
+
+    @property
+    def size(self):
+        return self.count * ROW_BYTES
+
+    def write_meta(self, closed):
+        meta = {
+            "columns": dict(COLUMNS),
+            "tags": {str(index): address for index, address in self.tags.items()},
+            "word_orders": {str(index): order for index, order in self.word_orders.items()},
+            "started": self.started,
+            "count": self.count,
+            "closed": closed,
+        }
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump(meta, f, indent=4)
+
+    def append(self, columns):
+        for name, dtype in COLUMNS:
+            self.files[name].write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+        for f in self.files.values():
+            f.flush()  # Читатели (воспроизведение, экспорт) видят данные без закрытия фрагмента
+        self.count += len(columns["timestamp"])
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.write_meta(closed=True)
+
+
+class Historian:
+    """Архив значений тегов на диске с фоновым писателем.
+
+    append() только кладет цикл опроса в ограниченную очередь и никогда не ждет
+    диск: если писатель не успевает, цикл отбрасывается и учитывается в dropped.
+    Писатель склеивает накопившиеся циклы и дописывает их в столбцовые файлы
+    текущего фрагмента; фрагменты читаются через np.memmap (open_chunk).
+    """
+
+    def __init__(self, directory, chunk_bytes=DEFAULT_CHUNK_BYTES, chunk_seconds=DEFAULT_CHUNK_SECONDS,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        self.directory = directory
+        self.chunk_bytes = chunk_bytes
+        self.chunk_seconds = chunk_seconds
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._thread = None
+        self._chunk = None
+        self._tags = {}
+        self._word_orders = {}
+        # Смещение монотонных часов опроса относительно системных: в архиве время Unix
+        self._wall_offset = time.time() - time.monotonic()
+        self.appended = 0  # Циклов принято в очередь
+        self.dropped = 0  # Циклов отброшено из-за переполнения очереди
+        self.written = 0  # Выборок записано на диск
+        self.chunks = 0  # Фрагментов начато
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="Historian", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Дописывает очередь, закрывает текущий фрагмент и останавливает писателя."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def set_tags(self, tags, word_orders=None):
+        """Задает соответствие номер тега -> адрес; следующие циклы пишутся в новый фрагмент.
+
+        word_orders — порядок слов тегов {номер тега: 'lo_hi' | 'hi_lo'}, по умолчанию 'lo_hi'.
+        """
+        self._queue.put(("tags", (dict(tags), dict(word_orders or {}))))
+
+    def append(self, values):
+        """Ставит цикл опроса (CycleValues) в очередь записи; вызывается из потока опроса."""
+        if not len(values.index):
+            return True
+        try:
+            self._queue.put_nowait(("values", values))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.appended += 1
+        return True
+
+    def stats(self):
+        return {
+            "appended": self.appended,
+            "dropped": self.dropped,
+            "written": self.written,
+            "chunks": self.chunks,
+            "queued": self._queue.qsize(),
+        }
+
+    # --- Поток писателя ---
+
+    def _run(self):
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=IDLE_CHECK_INTERVAL)
+                except queue.Empty:
+                    self._rollover_if_needed()
+                    continue
+                if item is None:
+                    return
+
+                batch = []
+                while item is not None:
+                    kind, payload = item
+                    if kind == "tags":
+                        self._write_batch(batch)
+                        batch = []
+                        self._tags, self._word_orders = payload
+                        self._close_chunk()
+                    else:
+                        batch.append(payload)
+                    if len(batch) >= MAX_BATCH_CYCLES:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                self._write_batch(batch)
+                if item is None:
+                    return
+        finally:
+            self._close_chunk()
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+        # Циклы разных устройств приходят в порядке постановки в очередь, а не чтения:
+        # воспроизведение и экспорт ищут время через searchsorted, поэтому пачка упорядочивается
+        # по времени (сортировка устойчивая, у всех строк цикла одно время)
+        batch = sorted(batch, key=lambda v: v.timestamp)
+        columns = {
+            "timestamp": np.concatenate([np.full(len(v.index), v.timestamp + self._wall_offset) for v in batch]),
+            "tag": np.concatenate([v.index for v in batch]),
+            "raw": np.concatenate([v.dword for v in batch]),
+            "value": np.concatenate([v.real for v in batch]),
+        }
+        self._rollover_if_needed()
+        if self._chunk is None:
+            self._open_chunk()
+        try:
+            self._chunk.append(columns)
+            self.written += len(columns["timestamp"])
+        except OSError as e:
+            print(f"Ошибка записи архива {self._chunk.path}: {e}")
+
+    def _rollover_if_needed(self):
+        chunk = self._chunk
+        if chunk is not None and (chunk.size >= self.chunk_bytes or time.time() - chunk.started >= self.chunk_seconds):
+            self._close_chunk()
+
+    def _open_chunk(self):
+        self.chunks += 1
+        name = time.strftime("%Y%m%d-%H%M%S") + f"_{self.chunks:06d}"
+        self._chunk = _Chunk(os.path.join(self.directory, name), self._tags, self._word_orders)
+
+    def _close_chunk(self):
+        if self._chunk is not None:
+            self._chunk.close()
+            self._chunk = None
+
+
+def list_chunks(directory):
+    """Пути фрагментов архива в порядке записи."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory)
+                   if os.path.isfile(os.path.join(directory, name, META_FILE)))
+    return [os.path.join(directory, name) for name in names]
+
+
+def open_chunk(path):
+    """Открывает фрагмент без чтения в память: (meta, {столбец: np.memmap}).
+
+    Для незакрытого фрагмента число строк берется по длине файлов.
+    """
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    sizes = [os.path.getsize(os.path.join(path, f"{name}.bin")) // np.dtype(dtype).itemsize
+             for name, dtype in COLUMNS]
+    count = min(sizes)
+    columns = {}
+    for name, dtype in COLUMNS:
+        if count:
+            columns[name] = np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(count,))
+        else:
+            columns[name] = np.zeros(0, dtype=dtype)
+    meta["count"] = count
+    meta["tags"] = {int(index): address for index, address in meta["tags"].items()}
+    # Фрагменты без word_orders записаны до их появления: все теги с младшим словом первым
+    meta["word_orders"] = {int(index): order for index, order in meta.get("word_orders", {}).items()}
+    return meta, columns
+
+
+def tag_word_layout(meta):
+    """Массивы по номеру тега фрагмента: (старшее слово первым, номер бита или -1)."""
+    size = max(meta["tags"], default=-1) + 1
+    high_first = np.zeros(size, dtype=bool)
+    bits = np.full(size, -1, dtype=np.int64)
+    for tag, address in meta["tags"].items():
+        high_first[tag] = meta["word_orders"].get(tag) == WORD_ORDERS[HIGH_FIRST]
+        parsed = parse_address(address)
+        if parsed is not None and parsed[1] is not None:
+            bits[tag] = parsed[1]
+    return high_first, bits
+
+
+def word_from_raw(raw, high_first, bits):
+    """Восстанавливает WORD из столбца raw так же, как decode_registers при опросе.
+
+    WORD — первый регистр тега: у тегов 'hi_lo' он в старшей половине DWORD.
+    Для тегов-битов (bits >= 0) WORD — значение бита.
+    """
+    raw = np.asarray(raw).astype(np.int64)
+    word = np.where(high_first, raw >> 16, raw & 0xFFFF)
+    has_bit = bits >= 0
+    if has_bit.any():
+        word = np.where(has_bit, (word >> np.where(has_bit, bits, 0)) & 1, word)
+    return word
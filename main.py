@@ -1,3 +1,4 @@
+import argparse
 import sys
 
 from PySide6.QtGui import QIcon
@@ -5,8 +6,12 @@ from PySide6.QtWidgets import QApplication
 from main_window import MainWindow
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="SWG Viewer")
+    parser.add_argument("--config", help="файл конфигурации JSON; без него файл выбирается в диалоге")
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setWindowIcon(QIcon("app_icon.ico"))
-    window = MainWindow()
+    window = MainWindow(config_path=args.config)
     window.show()
     sys.exit(app.exec())
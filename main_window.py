@@ -1,41 +1,98 @@
+import csv
 import json
-import re
+import time
+
+import numpy as np
 
 from PySide6.QtGui import QColor, QPixmap, QPainter, QAction
 from PySide6.QtWidgets import (
-    QWidget, QLabel, QVBoxLayout, QHBoxLayout, QTableWidget, QPushButton, QFileDialog, QMessageBox, QLineEdit,
-    QHeaderView, QFormLayout, QTableWidgetItem, QMenu
+    QWidget, QLabel, QVBoxLayout, QHBoxLayout, QTableView, QPushButton, QFileDialog, QMessageBox, QLineEdit,
+    QHeaderView, QFormLayout, QMenu, QComboBox, QSlider
 )
 from PySide6.QtCore import QSize, QTimer, Qt
-from pyModbusTCP.client import ModbusClient
 
-from data_acquisition import CounterThread
-from plot_window import PlotWindow, table_config_file
+from acquisition import CONNECTION_DEFAULTS, build_pollers, configure_connections, connection_settings
+from async_acquisition import DEFAULT_MAX_IN_FLIGHT
+from change_filter import DEFAULT_FORCED_REFRESH
+from circuit_breaker import circuit_breakers, OPEN, HALF_OPEN, DEFAULT_FAILURE_THRESHOLD, DEFAULT_MAX_DELAY
+from data_acquisition import PollThread, ReplayThread, WriteThread
+from devices import load_devices, device_stats, format_device_stats, DEVICE_SETTING_KEYS, DEFAULT_DEVICE
+from export_window import ExportWindow
+from historian import Historian, DEFAULT_CHUNK_BYTES, DEFAULT_CHUNK_SECONDS
+from metrics import metrics, SIZE_BUCKETS
+from modbus import connection_pool, DEFAULT_MAX_CONNECTIONS
+from config_manager import table_config_file, DEFAULT_PLOT_HISTORY
+from poll_engine import DEFAULT_GAP_FILL
+from replay import ReplaySource, AS_FAST_AS_POSSIBLE
+from scheduler import format_group_stats
 from settings_window import SettingsWindow
+from update_bus import SnapshotBuffer, DEFAULT_DISPLAY_RATE
+from tag_table_model import TagTableModel, REAL_COLUMN, WORD_COLUMN, COMMENT_COLUMN, TAG_SETTING_KEYS
+from tag_compiler import parse_address, format_address
+from tag_import import (burner_address, burner_word, parse_ranges, generate_burner_tags, load_tag_csv, merge_tags,
+                        BURNERS, WORDS)
+from write_queue import make_write, load_recipe
 # from config_manager import save_config, load_config
 
 
+# Скорости воспроизведения архива: подпись и множитель (0 — без пауз)
+REPLAY_SPEEDS = (("1×", 1.0), ("10×", 10.0), ("100×", 100.0), ("Макс.", AS_FAST_AS_POSSIBLE))
+REPLAY_SLIDER_STEPS = 1000
+
+
 # Основной класс приложения
 class MainWindow(QWidget):
-    def __init__(self):
+    def __init__(self, config_path=None):
         super().__init__()
 
         # Устанавливаем текущий путь конфигурации в None до загрузки
         self.settings_window = None
+        self.export_window = None
+        self.diagnostics_window = None
         self.current_config_path = None
 
         # Установка начальных значений для конфигурации
         self.ip = "192.168.56.2"
         self.port = 502
         self.interval = 100
+        self.block_gap = DEFAULT_GAP_FILL  # Допустимый разрыв между склеиваемыми диапазонами регистров
+        self.unit_id = 1
+        self.max_connections = DEFAULT_MAX_CONNECTIONS  # Лимит соединений пула на один ПЛК
+        self.backend = "threads"  # Механизм опроса: "threads" или "asyncio"
+        self.max_in_flight = DEFAULT_MAX_IN_FLIGHT  # Запросов "в полете" на соединение (asyncio)
+        self.display_rate = DEFAULT_DISPLAY_RATE  # Частота обновления таблицы, Гц (не зависит от опроса)
+        self.poll_groups = {}  # Группа опроса -> период в мс (теги ссылаются на группу в table_data)
+        # Дополнительные ПЛК (ключ devices): строки таблицы привязываются к ним ключом device,
+        # остальные опрашиваются по параметрам блока connection
+        self.device_configs = []
+        self.change_filter = True  # Передавать в GUI и архив только изменившиеся значения
+        self.forced_refresh = DEFAULT_FORCED_REFRESH  # Период принудительной передачи неизменных тегов, с
+        self.breaker_failures = DEFAULT_FAILURE_THRESHOLD  # Неудачных циклов подряд до остановки опроса ПЛК
+        self.breaker_max_delay = DEFAULT_MAX_DELAY  # Предельная пауза между пробами связи, с
+        self.write_verify = True  # Проверять запись чтением
+        # Период опроса строк вне фокуса (не видны в таблице и не на графике), мс; 0 — все с полной частотой
+        self.background_interval = 0
+        self.poll_focus = None  # Фокус, последним переданный потокам опроса
+        self.write_threads = {}  # Устройство -> WriteThread: очереди записи, создаются при первой записи
+        self.snapshot = None  # Буфер последних значений, куда пишет поток опроса
+        # Архив значений на диске (ключ historian в конфигурации), по умолчанию выключен
+        self.historian_settings = {"enabled": False, "directory": "history",
+                                   "chunk_mb": DEFAULT_CHUNK_BYTES // (1024 * 1024),
+                                   "chunk_seconds": DEFAULT_CHUNK_SECONDS}
+        self.historian = None
+        # Периодическая запись метрик в JSON (ключ metrics): пустой путь — не записывать
+        self.metrics_settings = {"path": "", "interval": 60}
+        self.refresh_histogram = metrics.histogram("gui.table_refresh_s")
+        self.batch_histogram = metrics.histogram("gui.batch_size", SIZE_BUCKETS)
+        self.replay_thread = None  # Воспроизведение архива вместо опроса ПЛК
         self.online = False  # По умолчанию приложение оффлайн
-        self.mb_client = None  # Инициализация клиента как None
 
         # Инициализация графиков и линий
-        self.plot_data = []  # Список для хранения добавленных тегов на график
+        self.plot_data = []  # Линии графика: пары (номер тега, столбец), см. TagTableModel.tag_ids
 
         # Инициализация графиков и линий
         self.plot_lines = {}  # Словарь для хранения линий графика
+        self.plot_history = DEFAULT_PLOT_HISTORY  # Глубина истории линий графика, секунд
 
         # Добавляем метку для отображения пути к текущей конфигурации
         self.config_path_label = QLabel("Конфигурация не загружена", self)
@@ -64,7 +121,6 @@ class MainWindow(QWidget):
 
         # Устанавливаем размер окна из конфигурации
         # self.resize(self.config.get('window_size', QSize(800, 400)))
-        self.mb_client = ModbusClient(host=self.ip, port=self.port, auto_open=True, timeout=1)
         # Список адресов и потоков
         self.addresses = []
         self.threads = []
@@ -119,9 +175,12 @@ class MainWindow(QWidget):
         self.add_to_plot_btn.clicked.connect(self.add_selected_to_plot)
         self.remove_from_plot_btn.clicked.connect(self.remove_selected_from_plot)
 
-        # Таблица для отображения данных
-        self.table = QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(["Address", "REAL", "DWORD", "WORD", "BOOL", "Комментарий"])
+        # Таблица для отображения данных: значения хранятся в модели, а не в ячейках
+        self.tag_model = TagTableModel(self)
+        self.table = QTableView(self)
+        self.table.setModel(self.tag_model)
+        self.tag_model.dataChanged.connect(self.handle_model_data_changed)
+        self.tag_model.write_requested.connect(self.write_tag_value)
         self.table.horizontalHeader().setSectionResizeMode(
             QHeaderView.Interactive)  # Разрешаем изменять ширину столбцов
 
@@ -130,17 +189,20 @@ class MainWindow(QWidget):
         self.table.horizontalHeader().customContextMenuRequested.connect(self.show_column_menu)
 
 
-        # Обработчик изменения ячейки
-        self.table.itemChanged.connect(self.handle_item_changed)
-        self.table.itemSelectionChanged.connect(self.handle_selection_change)
+        # Обработчик выбора ячейки
+        self.table.selectionModel().selectionChanged.connect(self.handle_selection_change)
 
         # Метка состояния подключения
         self.connection_status_label = QLabel("")
         self.update_connection_status()  # Устанавливаем начальный статус
 
+        # Метка с числом запросов за цикл опроса
+        self.poll_stats_label = QLabel("")
+
         # Таймер для периодической проверки состояния подключения
         self.connection_timer = QTimer(self)
         self.connection_timer.timeout.connect(self.update_connection_status)
+        self.connection_timer.timeout.connect(self.refresh_poll_stats_label)
         self.connection_timer.start(5000)  # Проверка каждые 5 секунд
 
         # Макет для ввода данных и кнопок
@@ -150,6 +212,21 @@ class MainWindow(QWidget):
         input_layout.addRow(self.calculate_button)
         input_layout.addRow("Вычисленный адрес:", self.address_input)
         input_layout.addRow("Комментарий:", self.comment_input)
+        # Массовое добавление: диапазоны горелок и слов или импорт из CSV
+        self.burner_range_input = QLineEdit(self)
+        self.burner_range_input.setPlaceholderText("Горелки, например 0-20")
+        self.word_range_input = QLineEdit(self)
+        self.word_range_input.setPlaceholderText("Слова, например 3-9 или 1,5,7-9")
+        self.generate_button = QPushButton("Добавить диапазон", self)
+        self.generate_button.clicked.connect(self.add_burner_range)
+        self.import_button = QPushButton("Импорт CSV", self)
+        self.import_button.clicked.connect(self.import_tags)
+        range_layout = QHBoxLayout()
+        range_layout.addWidget(self.burner_range_input)
+        range_layout.addWidget(self.word_range_input)
+        range_layout.addWidget(self.generate_button)
+        range_layout.addWidget(self.import_button)
+        input_layout.addRow("Диапазон:", range_layout)
 
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.add_button)
@@ -157,39 +234,72 @@ class MainWindow(QWidget):
         button_layout.addWidget(self.settings_button)
         button_layout.addWidget(self.save_button)
         button_layout.addWidget(self.load_button)
+        self.recipe_button = QPushButton("Записать рецепт", self)
+        self.recipe_button.clicked.connect(self.write_recipe)
+        button_layout.addWidget(self.recipe_button)
 
         # Основной макет
         layout = QVBoxLayout()
 
         button_layout.addWidget(self.add_to_plot_btn)
         # button_layout.addWidget(self.remove_from_plot_btn)
+        # Воспроизведение архива: скорость, перемотка и остановка
+        self.replay_button = QPushButton("Воспроизвести архив", self)
+        self.replay_button.clicked.connect(self.open_replay)
+        self.replay_speed_combo = QComboBox(self)
+        for text, speed in REPLAY_SPEEDS:
+            self.replay_speed_combo.addItem(text, speed)
+        self.replay_speed_combo.currentIndexChanged.connect(self.change_replay_speed)
+        self.replay_slider = QSlider(Qt.Horizontal, self)
+        self.replay_slider.setRange(0, REPLAY_SLIDER_STEPS)
+        self.replay_slider.setEnabled(False)
+        self.replay_slider.sliderReleased.connect(self.seek_replay)
+        self.replay_stop_button = QPushButton("Стоп", self)
+        self.replay_stop_button.setEnabled(False)
+        self.replay_stop_button.clicked.connect(self.stop_replay)
+        self.replay_position_label = QLabel("", self)
+        replay_layout = QHBoxLayout()
+        replay_layout.addWidget(self.replay_button)
+        replay_layout.addWidget(self.replay_speed_combo)
+        replay_layout.addWidget(self.replay_slider)
+        replay_layout.addWidget(self.replay_position_label)
+        replay_layout.addWidget(self.replay_stop_button)
+        self.export_button = QPushButton("Экспорт архива", self)
+        self.export_button.clicked.connect(self.open_export_window)
+        replay_layout.addWidget(self.export_button)
+        self.diagnostics_button = QPushButton("Диагностика", self)
+        self.diagnostics_button.clicked.connect(self.open_diagnostics_window)
+        replay_layout.addWidget(self.diagnostics_button)
+
         layout.addLayout(input_layout)
         layout.addLayout(button_layout)
+        layout.addLayout(replay_layout)
         layout.addWidget(self.plot_button)
         layout.addWidget(self.table)
         layout.addWidget(self.connection_status_label)  # Добавляем метку состояния подключения
+        layout.addWidget(self.poll_stats_label)
         layout.addWidget(self.config_path_label)  # Добавляем метку в нижнюю часть окна
         self.setLayout(layout)
 
-        # Таймер для обновления графика
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_plot)
-        self.timer.start(self.interval)
+        # Таймер кадров: таблица обновляется с фиксированной частотой, а не на каждый цикл опроса
+        self.display_timer = QTimer(self)
+        self.display_timer.timeout.connect(self.refresh_display)
+        self.display_timer.start(int(1000 / self.display_rate))
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.dump_metrics)
 
-        # Загружаем конфигурацию, если она доступна
-        try:
-            self.load_config()
-        except FileNotFoundError:
-            # Если файл не найден, просто оставляем начальные значения
-            self.config_path_label.setText("Конфигурация не загружена")
+        # Конфигурация загружается после первого показа окна: окно появляется сразу,
+        # таблица заполняется следующим шагом цикла событий
+        self.config_path_label.setText("Конфигурация не загружена")
+        QTimer.singleShot(0, lambda: self.load_config(config_path))
 
     def show_column_menu(self, pos):
         """Показать меню для выбора видимых столбцов."""
         menu = QMenu(self)
 
         # Добавляем чекбоксы для каждого столбца
-        for col in range(self.table.columnCount()):
-            column_name = self.table.horizontalHeaderItem(col).text()
+        for col in range(self.tag_model.columnCount()):
+            column_name = self.tag_model.headerData(col, Qt.Horizontal)
             action = QAction(column_name, self)
             action.setCheckable(True)
             action.setChecked(not self.table.isColumnHidden(col))
@@ -208,7 +318,7 @@ class MainWindow(QWidget):
     def save_plot_data(self):
         """Сохранение текущей конфигурации графиков в файл и обновление plot_data."""
         if self.plot_window:
-            self.plot_data = [(row, col) for row, col in self.plot_window.lines]
+            self.plot_data = [(tag_id, col) for tag_id, col in self.plot_window.lines]
 
             config = {
                 'plot_data': self.plot_data,
@@ -226,22 +336,14 @@ class MainWindow(QWidget):
         """Обработка ввода адреса для чтения значений из Modbus."""
         address_text = self.address_input.text().strip()
 
-        # Проверка, существует ли объект mb_client
-        if not hasattr(self, 'mb_client'):
-            print("Error: mb_client is not initialized")
-            return
-
-        # Проверяем, соответствует ли формат "число.число" для адресов с битами
-        match = re.match(r"^(\d+)\.(\d+)$", address_text)
-        if match:
-            # Извлекаем номер регистра и позицию бита
-            register = int(match.group(1))
-            bit_position = int(match.group(2))
-
-            # Проверка, что номер бита находится в диапазоне от 0 до 15
-            if 0 <= bit_position <= 15:
-                # Чтение регистра Modbus
-                holding_registers = self.mb_client.read_holding_registers(register, 1)
+        # Адреса с битами в формате "регистр.бит"; номер бита от 0 до 15 проверяет parse_address
+        parsed = parse_address(address_text)
+        if "." in address_text:
+            if parsed is not None:
+                register, bit_position = parsed
+                # Чтение регистра Modbus через общий пул соединений
+                with connection_pool.connection(self.ip, self.port, self.unit_id) as mb_client:
+                    holding_registers = mb_client.read_holding_registers(register, 1)
                 if isinstance(holding_registers, list) and len(holding_registers) > 0:
                     # Получаем значение регистра
                     register_value = holding_registers[0]
@@ -250,23 +352,18 @@ class MainWindow(QWidget):
                     bit_value = (register_value >> bit_position) & 1
 
                     # Устанавливаем значение в таблице
-                    current_row = self.table.currentRow()
+                    current_row = self.table.currentIndex().row()
                     if current_row == -1:
                         # Если строка не выбрана, добавляем новую строку
-                        current_row = self.table.rowCount()
-                        self.table.insertRow(current_row)
-                        self.table.setItem(current_row, 0, QTableWidgetItem(address_text))  # Вставляем адрес
-
-                    # Обновляем значение бита
-                    self.table.setItem(current_row, 3, QTableWidgetItem(str(bit_value)))
+                        current_row = self.tag_model.append_row(address_text)
 
-                    # Устанавливаем DWORD и REAL в 0, так как это битовый адрес
-                    self.table.setItem(current_row, 1, QTableWidgetItem("0.0"))  # REAL
-                    self.table.setItem(current_row, 2, QTableWidgetItem("0"))  # DWORD
+                    # Значение бита в WORD, DWORD и REAL в 0, так как это битовый адрес
+                    self.tag_model.update_values([current_row], np.array([0.0]),
+                                                 np.array([0], dtype=np.uint32), np.array([bit_value]))
                 else:
                     print(f"Error: Could not read register {register}")
             else:
-                print("Error: Bit position must be between 0 and 15")
+                print("Error: Invalid bit address, bit position must be between 0 and 15")
         else:
             print("Error: Invalid address format. Use 'register.bit', e.g., 6564.1")
 
@@ -279,15 +376,18 @@ class MainWindow(QWidget):
         # Закрываем окно графика, если оно открыто
         if hasattr(self, 'plot_window') and self.plot_window is not None:
             self.plot_window.close()
+        if self.diagnostics_window is not None:
+            self.diagnostics_window.close()
         # Останавливаем все потоки
         self.stop_all_threads()
+        self.stop_replay()
+        self.stop_historian()
         # Закрываем главное окно
         event.accept()
 
     def open_plot_window(self):
         """Открыть окно графика и восстановить линии графиков из данных."""
-        if not self.plot_window:
-            self.plot_window = PlotWindow(self)  # Создаем новое окно
+        self.ensure_plot_window()
 
         # Восстанавливаем линии из plot_data
         self.update_graphs()
@@ -297,12 +397,12 @@ class MainWindow(QWidget):
 
     def add_selected_to_plot(self):
         """Добавить выбранную строку и столбец на график с меткой."""
-        selected = self.table.selectedItems()
+        selected = self.table.selectionModel().selectedIndexes()
         if selected:
             row = selected[0].row()
             column = selected[0].column()
-            column_name = self.table.horizontalHeaderItem(column).text()
-            key = (row, column_name)
+            column_name = self.tag_model.headerData(column, Qt.Horizontal)
+            key = (self.tag_model.tag_id(row), column_name)
 
             # Добавляем тег в plot_data, если его там нет
             if key not in self.plot_data:
@@ -310,18 +410,16 @@ class MainWindow(QWidget):
 
             # Если окно графиков открыто, добавляем линию на график
             if self.plot_window and self.plot_window.isVisible():
-                address_item = self.table.item(row, 0)
-                address = address_item.text() if address_item else "Unknown"
-                self.plot_window.add_line(key, f"{address} ({column_name})")
+                self.add_plot_line(key)
 
     def remove_selected_from_plot(self):
         """Удалить выбранную линию с графика и из сохраненных данных."""
-        selected = self.table.selectedItems()
+        selected = self.table.selectionModel().selectedIndexes()
         if selected:
             row = selected[0].row()
             column = selected[0].column()
-            column_name = self.table.horizontalHeaderItem(column).text()
-            key = (row, column_name)
+            column_name = self.tag_model.headerData(column, Qt.Horizontal)
+            key = (self.tag_model.tag_id(row), column_name)
 
             # Удаляем тег из plot_data, если он там есть
             if key in self.plot_data:
@@ -333,11 +431,11 @@ class MainWindow(QWidget):
 
     def handle_selection_change(self):
         """Активируем кнопки добавления и удаления графика при выборе строки и столбца."""
-        selected_items = self.table.selectedItems()
+        selected_items = self.table.selectionModel().selectedIndexes()
         if selected_items:
             selected_item = selected_items[0]
             # Проверяем, выбран ли нужный столбец (REAL, DWORD или WORD)
-            if selected_item.column() in [1, 2, 3]:  # Столбцы для REAL, DWORD, WORD
+            if REAL_COLUMN <= selected_item.column() <= WORD_COLUMN:
                 self.add_to_plot_btn.setEnabled(True)
                 self.remove_from_plot_btn.setEnabled(True)
             else:
@@ -347,34 +445,63 @@ class MainWindow(QWidget):
             self.add_to_plot_btn.setEnabled(False)
             self.remove_from_plot_btn.setEnabled(False)
 
-    def update_plot(self):
-        """Обновляем линии графика и значения таблицы на экране 'Графики'."""
-        if self.plot_window is None:
-            return  # Окно графика не открыто
-
-        for key in self.plot_window.lines:
-            row, column_name = key
-            column_index = {"REAL": 1, "DWORD": 2, "WORD": 3}.get(column_name, None)
-            if column_index is not None:
-                item = self.table.item(row, column_index)
-                if item:
-                    try:
-                        new_value = float(item.text())
-                    except ValueError:
-                        new_value = 0.0
-                    # Обновляем линию на графике
-                    self.plot_window.update_line(key, new_value)
-
-                    # Обновляем значение в таблице на экране "Графики"
-                    address = self.table.item(row, 0).text() if self.table.item(row, 0) else ""
-                    comment = self.table.item(row, 5).text() if self.table.item(row, 5) else ""
-                    self.plot_window.update_tag_value(f"{address} ({column_name})", new_value, comment)
+    def ensure_plot_window(self):
+        """Создает окно графика, если его еще нет, и подписывает его на выборки опроса."""
+        if not self.plot_window:
+            # pyqtgraph импортируется только при первом открытии графика: без него запуск быстрее
+            from plot_window import PlotWindow
+            self.plot_window = PlotWindow(self, self.plot_capacity())  # Создаем новое окно
+            self.plot_window.lines_changed.connect(self.update_plot_subscriptions)
+        return self.plot_window
+
+    def plotted_rows(self):
+        """Строки таблицы, выведенные на график."""
+        tag_ids = self.plot_window.keys_by_tag.keys() if self.plot_window else []
+        rows = [self.tag_model.row_of(tag_id) for tag_id in tag_ids]
+        return [row for row in rows if row is not None]
+
+    def update_plot_subscriptions(self):
+        """Просит буфер опроса сохранять каждую выборку строк, выведенных на график."""
+        if self.snapshot is not None:
+            self.snapshot.subscribe(self.plotted_rows())
+
+    def update_poll_focus(self):
+        """Передает потокам опроса строки в фокусе: видимые в таблице и выведенные на график.
+
+        Остальные строки опрашиваются раз в background_interval. Пока пишется архив,
+        все строки опрашиваются с полной частотой.
+        """
+        if not self.background_interval or self.historian is not None:
+            focus = None
+        else:
+            visible = ()
+            if not self.isMinimized():
+                first = self.table.rowAt(0)
+                last = self.table.rowAt(self.table.viewport().height() - 1)
+                if first >= 0:
+                    visible = range(first, (last if last >= 0 else self.tag_model.rowCount() - 1) + 1)
+            focus = (visible, frozenset(self.plotted_rows()))
+        if focus == self.poll_focus:
+            return
+        self.poll_focus = focus
+        rows = None if focus is None else set(focus[0]) | focus[1]
+        for thread in self.threads:
+            thread.set_focus(rows, self.background_interval)
+
+    def handle_model_data_changed(self, top_left, bottom_right, roles=()):
+        """Передает отредактированный комментарий в таблицу тегов графика."""
+        if self.plot_window and top_left.column() <= COMMENT_COLUMN <= bottom_right.column():
+            for row in range(top_left.row(), bottom_right.row() + 1):
+                self.plot_window.update_tag_comment(self.tag_model.tag_id(row), self.tag_model.comment(row))
+
+    def plot_capacity(self):
+        """Число точек истории на линию: глубина истории при текущем интервале опроса."""
+        return max(1000, int(self.plot_history * 1000 / max(1, self.interval)))
 
     def get_column_index(self, column_name):
         """Получает индекс столбца по имени."""
-        header = self.table.horizontalHeader()
-        for col in range(header.count()):
-            if header.model().headerData(col, Qt.Horizontal) == column_name:
+        for col in range(self.tag_model.columnCount()):
+            if self.tag_model.headerData(col, Qt.Horizontal) == column_name:
                 return col
         return None  # Если столбец не найден
 
@@ -385,33 +512,28 @@ class MainWindow(QWidget):
             self.plot_window.clear_all_graph_data()
 
         # Восстанавливаем графики
-        for row, column_name in plot_state:
-            # Получаем адрес и комментарий из основной таблицы на основании строки `row`
-            address_item = self.table.item(row, 0)
-            comment_item = self.table.item(row, 5)
-
-            if address_item:
-                address = address_item.text()
-                label = f"{address} ({column_name})"
-                comment = comment_item.text() if comment_item else ""
-
-                # Получаем текущее значение в зависимости от типа
-                if column_name == "REAL":
-                    current_value_item = self.table.item(row, 1)
-                elif column_name == "DWORD":
-                    current_value_item = self.table.item(row, 2)
-                elif column_name == "WORD":
-                    current_value_item = self.table.item(row, 3)
-                else:
-                    current_value_item = None
-
-                current_value = float(current_value_item.text()) if current_value_item else 0.0
-
-                # Добавляем линию на график с восстановленными данными
-                self.plot_window.add_line((row, column_name), label, current_value, comment)
-
-    def load_config(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Загрузить конфигурацию", "", "JSON Files (*.json)")
+        for tag_id, column_name in plot_state:
+            self.add_plot_line((tag_id, column_name))
+
+    def add_plot_line(self, key):
+        """Добавляет линию (номер тега, столбец) с адресом, значением и комментарием строки тега.
+
+        Возвращает False, если тега с таким номером в таблице нет.
+        """
+        tag_id, column_name = key
+        row = self.tag_model.row_of(tag_id)
+        if row is None or self.plot_window is None:
+            return False
+        if key not in self.plot_window.lines:
+            address = self.tag_model.address(row) or "Unknown"
+            self.plot_window.add_line(key, f"{address} ({column_name})", self.tag_model.value(row, column_name),
+                                      self.tag_model.comment(row))
+        return True
+
+    def load_config(self, file_path=None):
+        """Загружает конфигурацию из file_path или из файла, выбранного в диалоге."""
+        if not file_path:
+            file_path, _ = QFileDialog.getOpenFileName(self, "Загрузить конфигурацию", "", "JSON Files (*.json)")
         if not file_path:
             return  # Если файл не выбран, выходим из функции
 
@@ -421,21 +543,32 @@ class MainWindow(QWidget):
                 config = json.load(f)
 
             # Загрузка настроек подключения
-            connection = config.get("connection", {})
-            self.ip = connection.get("ip", "192.168.56.2")
-            self.port = connection.get("port", 502)
-            self.interval = connection.get("interval", 100)
+            # (разбор общий с daemon.py; имена атрибутов окна совпадают с ключами блока connection)
+            settings = connection_settings(config)
+            for key in CONNECTION_DEFAULTS:
+                setattr(self, key, settings[key])
+            configure_connections(settings)
+            self.display_rate = max(1, settings.get("display_rate", DEFAULT_DISPLAY_RATE))
+            self.display_timer.setInterval(int(1000 / self.display_rate))
+
+            self.plot_history = config.get("plot_history", DEFAULT_PLOT_HISTORY)
+            self.poll_groups = config.get("poll_groups", {})
+            self.device_configs = config.get("devices", [])
+            self.stop_historian()  # Новый архив будет открыт с настройками загруженной конфигурации
+            self.historian_settings.update(config.get("historian", {}))
+            self.metrics_settings.update(config.get("metrics", {}))
+            self.start_metrics_dump()
 
             # Обновление таблицы в главном окне
             self.update_main_table_from_config(config.get("table_data", []))
+            self.apply_column_settings(config.get("column_settings", {}))
 
-            # Проверяем, создано ли окно графика, и создаем его при необходимости
-            if not self.plot_window:
-                self.plot_window = PlotWindow(self)
-
-            # Восстановление графиков из `plot_state`
+            # Восстановление графиков из `plot_state`; если окно графика еще не открывалось,
+            # линии будут добавлены при его открытии (update_graphs)
             plot_state = config.get("plot_state", [])
-            self.plot_window.clear_and_load_graph_data(plot_state)  # Используем метод для загрузки данных на график
+            self.plot_data = [(tag_id, column_name) for tag_id, column_name in plot_state]
+            if self.plot_window:
+                self.plot_window.clear_and_load_graph_data(plot_state)  # Используем метод для загрузки данных на график
 
             # Обновление текущего пути конфигурации
             self.current_config_path = file_path
@@ -449,7 +582,7 @@ class MainWindow(QWidget):
     def reset_all_data(self):
         """Полностью сбрасывает текущие данные из таблицы и графиков."""
         # Очистка основной таблицы
-        self.table.setRowCount(0)
+        self.tag_model.set_rows([])
 
         # Остановка всех потоков
         self.stop_all_threads()
@@ -461,64 +594,34 @@ class MainWindow(QWidget):
 
     def update_main_table_from_config(self, table_data):
         """Обновляет основную таблицу на основании данных конфигурации."""
-        self.table.setRowCount(0)  # Полностью очищаем текущие данные в таблице
-
-        for row_data in table_data:
-            row_position = self.table.rowCount()
-            self.table.insertRow(row_position)
-            self.table.setItem(row_position, 0, QTableWidgetItem(row_data.get("address", "")))
-            self.table.setItem(row_position, 1, QTableWidgetItem(str(row_data.get("REAL", "0.0"))))
-            self.table.setItem(row_position, 2, QTableWidgetItem(str(row_data.get("DWORD", "0"))))
-            self.table.setItem(row_position, 3, QTableWidgetItem(str(row_data.get("WORD", "0"))))
-            self.table.setItem(row_position, 4, QTableWidgetItem(row_data.get("BOOL", "Ошибка")))
-            self.table.setItem(row_position, 5, QTableWidgetItem(row_data.get("comment", "")))
+        # Модель заполняется целиком, одним сбросом вместо вставки строк по одной.
+        # В старых конфигурациях номеров тегов нет, а plot_state ссылается на строки —
+        # тогда номером тега становится номер строки, и старый plot_state остается верным
+        tag_ids = [row_data.get("id", row) for row, row_data in enumerate(table_data)]
+        if not all("id" in row_data for row_data in table_data) or len(set(tag_ids)) != len(tag_ids):
+            tag_ids = list(range(len(table_data)))
+        self.tag_model.set_rows([(row_data.get("address", ""), row_data.get("comment", ""))
+                                 for row_data in table_data],
+                                [{key: row_data[key] for key in TAG_SETTING_KEYS if row_data.get(key)}
+                                 for row_data in table_data],
+                                tag_ids)
+
+    def apply_column_settings(self, column_settings):
+        """Восстанавливает ширину и видимость столбцов из конфигурации."""
+        for col, width in enumerate(column_settings.get("widths", [])[:self.tag_model.columnCount()]):
+            self.table.setColumnWidth(col, width)
+        for col, visible in enumerate(column_settings.get("visibility", [])[:self.tag_model.columnCount()]):
+            self.table.setColumnHidden(col, not visible)
 
     def restore_plot_data(self, plot_state):
         """Восстанавливает данные для графиков из конфигурационного файла."""
-        for row, column_name in plot_state:
-            key = (row, column_name)
-            if self.plot_window and key not in self.plot_window.lines:
-                address_item = self.table.item(row, 0)
-                address = address_item.text() if address_item else "Unknown"
-
-                # Получение текущего значения в зависимости от столбца
-                column_index = {"REAL": 1, "DWORD": 2, "WORD": 3}.get(column_name)
-                current_value_item = self.table.item(row, column_index) if column_index is not None else None
-                current_value = float(current_value_item.text()) if current_value_item else 0.0
-
-                # Получение комментария
-                comment_item = self.table.item(row, 5)
-                comment = comment_item.text() if comment_item else ""
-
-                # Добавление линии на график
-                self.plot_window.add_line(key, f"{address} ({column_name})", current_value, comment)
+        for tag_id, column_name in plot_state:
+            self.add_plot_line((tag_id, column_name))
 
     def update_graphs(self):
         """Восстановить графики из plot_data при открытии окна графика."""
-        for row, column_name in self.plot_data:
-            key = (row, column_name)
-            if self.plot_window and key not in self.plot_window.lines:
-                address_item = self.table.item(row, 0)
-                address = address_item.text() if address_item else "Unknown"
-
-                # Получение текущего значения в зависимости от столбца
-                if column_name == "REAL":
-                    current_value_item = self.table.item(row, 1)
-                elif column_name == "DWORD":
-                    current_value_item = self.table.item(row, 2)
-                elif column_name == "WORD":
-                    current_value_item = self.table.item(row, 3)
-                else:
-                    current_value_item = None
-
-                current_value = float(current_value_item.text()) if current_value_item else 0.0
-
-                # Получение комментария
-                comment_item = self.table.item(row, 5)
-                comment = comment_item.text() if comment_item else ""
-
-                # Передача адреса, текущего значения и комментария
-                self.plot_window.add_line(key, f"{address} ({column_name})", current_value, comment)
+        for key in self.plot_data:
+            self.add_plot_line(tuple(key))
 
     def open_settings_window(self):
         """Открыть окно настроек подключения."""
@@ -538,6 +641,7 @@ class MainWindow(QWidget):
         print(f"Update connection: IP={self.ip}, port={self.port}, interval={self.interval}, online={self.online}")
 
         if self.online:
+            self.stop_replay()  # Живой опрос заменяет воспроизведение
             self.connect_to_modbus()  # Подключаемся
             self.start_all_threads()  # Запускаем потоки
         else:
@@ -550,77 +654,241 @@ class MainWindow(QWidget):
 
     def reset_tag_values(self):
         """Обнуляет значения всех тегов в таблице."""
-        for row in range(self.table.rowCount()):
-            self.table.setItem(row, 1, QTableWidgetItem("0.0"))  # REAL
-            self.table.setItem(row, 2, QTableWidgetItem("0"))    # DWORD
-            self.table.setItem(row, 3, QTableWidgetItem("0"))    # WORD
-            self.table.setItem(row, 4, QTableWidgetItem("Ошибка"))  # BOOL
+        self.tag_model.reset_values()
         print("All tag values reset to zero.")
 
+    def devices(self):
+        """Устройства конфигурации; устройство по умолчанию берет параметры из настроек подключения."""
+        return load_devices(self.device_configs, {key: getattr(self, key) for key in DEVICE_SETTING_KEYS})
+
     def start_all_threads(self):
-        """Запуск всех потоков для чтения данных."""
+        """Запуск потоков опроса: на каждое устройство свой поток, планировщик и соединение."""
         self.threads = []  # Сбрасываем список потоков
-        for row in range(self.table.rowCount()):
-            address_item = self.table.item(row, 0)
-            if address_item:
-                address = address_item.text()
-                thread = CounterThread(row, address, self.ip, self.port, self.interval)
-                thread.updated_value.connect(self.update_table)
-                thread.connection_lost.connect(self.handle_connection_lost)
-                self.threads.append(thread)
-                thread.start()
-        print("All threads started")
-
-    def stop_all_threads(self):
-        """Останавливаем все потоки чтения данных."""
+        addresses = [(row, address) for row, address in enumerate(self.tag_model.addresses) if address]
+
+        self.snapshot = SnapshotBuffer(self.tag_model.rowCount())
+        self.update_plot_subscriptions()
+        historian = self.ensure_historian()
+        if historian is not None:
+            # Номера строк в архиве относятся к этим адресам; порядок слов нужен, чтобы восстановить WORD
+            tag_settings = self.tag_model.tag_settings
+            historian.set_tags(dict(addresses), {row: tag_settings[row]["word_order"] for row, _ in addresses
+                                                 if tag_settings[row].get("word_order")})
+
+        threads = build_pollers(addresses, self.tag_model.tag_settings, self.devices(), self.poll_groups,
+                                self.interval, self.change_filter, self.forced_refresh, factory=PollThread,
+                                snapshot=self.snapshot, historian=historian)
+        for thread in threads:
+            thread.connection_lost.connect(self.handle_connection_lost)
+            thread.plan_ready.connect(self.update_poll_stats)
+            thread.breaker_changed.connect(self.update_connection_status)
+            self.threads.append(thread)
+            thread.start()
+        self.poll_focus = None  # Фокус новым потокам передаст ближайший кадр
+        self.tag_model.writable = True
+        print(f"All threads started ({len(self.threads)} devices)")
+
+    def ensure_historian(self):
+        """Запускает архив, если он включен в конфигурации; возвращает его или None."""
+        settings = self.historian_settings
+        if self.historian is None and settings.get("enabled"):
+            self.historian = Historian(settings.get("directory", "history"),
+                                       chunk_bytes=settings.get("chunk_mb", 64) * 1024 * 1024,
+                                       chunk_seconds=settings.get("chunk_seconds", DEFAULT_CHUNK_SECONDS))
+            self.historian.start()
+            print(f"Historian started: {self.historian.directory}")
+        return self.historian
+
+    def stop_historian(self):
+        """Дописывает и закрывает архив."""
+        if self.historian is not None:
+            self.historian.stop()
+            self.historian = None
+
+    def restart_all_threads(self):
+        """Перезапускает опрос после изменения списка адресов; очереди записи продолжают работать."""
+        if self.online:
+            self.stop_poll_threads()
+            self.start_all_threads()
+
+    def update_poll_stats(self, requests_before, requests_after):
+        """Запоминает, сколько запросов за цикл экономит склейка блоков (сумма по всем устройствам)."""
+        self.requests_per_cycle = (sum(thread.scheduler.requests_before for thread in self.threads),
+                                   sum(thread.scheduler.requests_after for thread in self.threads))
+        self.refresh_poll_stats_label()
+
+    def refresh_poll_stats_label(self):
+        """Показывает число запросов за цикл, статистику групп опроса и счетчики пула соединений."""
+        pool_stats = connection_pool.stats()
+        text = (f"Соединений: открыто {pool_stats['opened']}, переиспользовано {pool_stats['reused']}, "
+                f"активно {pool_stats['open']}")
+        requests_per_cycle = getattr(self, 'requests_per_cycle', None)
+        if requests_per_cycle:
+            text = f"Запросов за цикл: {requests_per_cycle[0]} → {requests_per_cycle[1]}; {text}"
+        if len(self.threads) > 1:
+            stats = [device_stats(thread.device, thread.host, thread.port, thread.scheduler.stats(),
+                                  thread.breaker.state) for thread in self.threads]
+            text = f"{text}\nУстройства:\n{format_device_stats(stats)}"
+        elif self.threads:
+            text = f"{text}\nГруппы: {format_group_stats(self.threads[0].scheduler.stats())}"
+        filters = [thread.change_filter for thread in self.threads if thread.change_filter is not None]
+        if filters:
+            delivered = sum(f.delivered for f in filters)
+            suppressed = sum(f.suppressed for f in filters)
+            share = suppressed / (delivered + suppressed) * 100 if delivered + suppressed else 0.0
+            text = f"{text}\nИзменений: передано {delivered}, подавлено {suppressed} ({share:.0f}%)"
+        if self.historian is not None:
+            history_stats = self.historian.stats()
+            text = (f"{text}\nАрхив: записано {history_stats['written']}, отброшено циклов "
+                    f"{history_stats['dropped']}, фрагментов {history_stats['chunks']}")
+        self.poll_stats_label.setText(text)
+
+    def stop_poll_threads(self):
+        """Останавливаем потоки опроса."""
         for thread in self.threads:
             # Отключаем сигналы от потока
             try:
-                thread.updated_value.disconnect(self.update_table)
                 thread.connection_lost.disconnect(self.handle_connection_lost)
+                thread.plan_ready.disconnect(self.update_poll_stats)
+                thread.breaker_changed.disconnect(self.update_connection_status)
             except TypeError:
                 pass  # Сигнал уже отключен
 
             thread.stop()  # Останавливаем поток
             thread.wait()  # Дожидаемся завершения потока
         self.threads.clear()
+
+    def stop_all_threads(self):
+        """Останавливаем потоки опроса и записи."""
+        self.stop_poll_threads()
+        self.tag_model.writable = False
+        for thread in self.write_threads.values():
+            # Очередь дописывает то, что в ней уже стоит; результаты придут сигналом write_done
+            thread.stop()
+        self.write_threads.clear()
         print("All threads stopped")
 
-    def connect_to_modbus(self):
-        """Подключиться к серверу Modbus."""
-        if not self.mb_client.is_open:
+    def write_thread(self, name, device):
+        """Очередь записи устройства; поток создается при первой записи."""
+        thread = self.write_threads.get(name)
+        if thread is None:
+            thread = WriteThread(name, device, self.write_verify)
+            thread.write_done.connect(self.handle_write_done)
+            thread.start()
+            self.write_threads[name] = thread
+        return thread
+
+    def write_tag_value(self, row, column_name, text):
+        """Запись значения, введенного в ячейку REAL/DWORD/WORD, в ПЛК строки."""
+        devices = self.devices()
+        name = self.tag_model.tag_settings[row].get("device", DEFAULT_DEVICE)
+        tag_type = self.tag_model.write_type(row)
+        if column_name != tag_type:
+            # Запись не того типа испортила бы соседние регистры или половину 32-битного значения
+            QMessageBox.warning(self, "Ошибка", f"Строка {row + 1}: тег типа {tag_type}, запись {column_name} невозможна.")
+            return
+        if not self.online or name not in devices:
+            QMessageBox.warning(self, "Ошибка", f"Нет связи с устройством '{name}'.")
+            return
+        try:
+            item = make_write(self.tag_model.address(row), column_name, text, row,
+                              self.tag_model.tag_settings[row].get("word_order"))
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", f"Строка {row + 1}: {e}")
+            return
+        self.write_thread(name, devices[name]).put([item])
+
+    def write_recipe(self):
+        """Записывает в ПЛК значения из CSV-файла (address, value, type, device) одной пачкой на устройство."""
+        if not self.online:
+            QMessageBox.warning(self, "Ошибка", "Запись возможна только в режиме online.")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self, "Рецепт", "", "CSV Files (*.csv);;All Files (*)")
+        if not file_path:
+            return
+        try:
+            recipe = load_recipe(file_path)
+        except (OSError, ValueError, csv.Error) as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось прочитать рецепт: {e}")
+            return
+
+        # Настройки строки таблицы с тем же адресом: устройство (если в рецепте нет столбца device) и порядок слов
+        table_settings = dict(zip(self.tag_model.addresses, self.tag_model.tag_settings))
+        devices = self.devices()
+        batches = {}
+        errors = []
+        for line, record in enumerate(recipe, start=1):
+            settings = table_settings.get(record["address"], {})
+            name = record["device"] or settings.get("device", DEFAULT_DEVICE)
             try:
-                self.mb_client = ModbusClient(host=self.ip, port=self.port, auto_open=True, timeout=1)
-                self.mb_client.open()
-                if self.mb_client.is_open:
+                if name not in devices:
+                    raise ValueError(f"неизвестное устройство '{name}'")
+                batches.setdefault(name, []).append(make_write(record["address"], record["type"], record["value"],
+                                                               word_order=settings.get("word_order")))
+            except ValueError as e:
+                errors.append(f"{line}: {e}")
+        if errors:
+            # Рецепт пишется только целиком: при ошибке в любой строке ничего не записывается
+            QMessageBox.warning(self, "Ошибка", "Рецепт не записан:\n" + "\n".join(errors[:20]))
+            return
+        for name, items in batches.items():
+            self.write_thread(name, devices[name]).put(items)
+        print(f"Recipe {file_path}: {len(recipe)} values queued for {len(batches)} devices")
+
+    def handle_write_done(self, results):
+        """Результаты пачки записи: об ошибках сообщаем, удачные записи покажет опрос."""
+        failed = [f"{item.address} ({item.type} = {item.value}): {error}" for item, error in results if error]
+        print(f"Written {len(results) - len(failed)} of {len(results)} values")
+        if failed:
+            QMessageBox.warning(self, "Ошибка записи", "\n".join(failed[:20]) +
+                                (f"\n... и еще {len(failed) - 20}" if len(failed) > 20 else ""))
+
+    def connect_to_modbus(self):
+        """Подключиться к серверу Modbus (соединение остается в общем пуле)."""
+        try:
+            with connection_pool.connection(self.ip, self.port, self.unit_id) as mb_client:
+                if mb_client.is_open or mb_client.open():
                     print("Connected to Modbus server.")
                     self.connection_status_label.setText(f"IP: {self.ip} - online")
-            except Exception as e:
-                print(f"Failed to connect to Modbus server: {e}")
-                self.connection_status_label.setText(f"IP: {self.ip} - offline")
+        except Exception as e:
+            print(f"Failed to connect to Modbus server: {e}")
+            self.connection_status_label.setText(f"IP: {self.ip} - offline")
 
     def disconnect_from_modbus(self):
         """Отключиться от сервера Modbus."""
-        if self.mb_client and self.mb_client.is_open:
-            self.mb_client.close()
-            print("Disconnected from Modbus server.")
+        connection_pool.close_all()
+        print("Disconnected from Modbus server.")
         self.connection_status_label.setText(f"IP: {self.ip} - offline")
 
     def handle_connection_lost(self, index):
         """Обработчик обрыва связи"""
-        self.connection_status_label.setText(f"IP: {self.ip} - offline")
+        self.update_connection_status()
         print(f"Connection lost at row {index}")
 
-    def update_connection_status(self):
+    def update_connection_status(self, *args):
         """Проверяет состояние подключения и обновляет метку состояния с индикатором."""
-        if self.online:
-            status_text = f"IP: {self.ip} - online"
-            color = "green"
-            print("Status: Online")
+        if self.online and len(self.threads) > 1:
+            # Несколько ПЛК: сколько из них на связи и какие нет
+            lost = [thread.device for thread in self.threads if not thread.breaker.is_closed]
+            status_text = f"Устройств на связи: {len(self.threads) - len(lost)} из {len(self.threads)}"
+            if lost:
+                status_text = f"{status_text}, нет связи: {', '.join(lost)}"
+            color = "green" if not lost else "red" if len(lost) == len(self.threads) else "orange"
+        elif self.online:
+            thread = self.threads[0] if self.threads else None
+            breaker = thread.breaker if thread else circuit_breakers.get(self.ip, self.port, self.unit_id)
+            if breaker.state == OPEN:
+                status_text = f"IP: {self.ip} - нет связи, повтор через {breaker.time_until_probe():.0f} с"
+                color = "red"
+            elif breaker.state == HALF_OPEN:
+                status_text = f"IP: {self.ip} - проверка связи"
+                color = "orange"
+            else:
+                status_text = f"IP: {self.ip} - online"
+                color = "green"
         else:
             status_text = f"IP: {self.ip} - offline"
             color = "red"
-            print("Status: Offline")
 
         # Обновляем статус с индикатором
         self.connection_status_label.setText(f"{status_text} <span style='color:{color};'>●</span>")
@@ -642,29 +910,21 @@ class MainWindow(QWidget):
         try:
             burner_number = int(self.burner_number_input.text())
             word = int(self.word_input.text())
-            if 0 <= burner_number <= 20 and 1 <= word <= 31:
-                # Вычисляем адрес Modbus
-                address = 1344 + (word - 1) * 2 + 64 * burner_number
-                self.address_input.setText(str(address))
-            else:
-                self.address_input.setText("0")  # При недопустимых значениях
+            # Вычисляем адрес Modbus
+            self.address_input.setText(str(burner_address(burner_number, word)))
         except ValueError:
-            self.address_input.setText("0")
+            self.address_input.setText("0")  # При недопустимых значениях
 
     def update_address_from_burner_word(self):
         """Пересчитывает адрес на основе номера горелки и слова."""
         address_text = self.address_input.text().strip()
 
-        # Проверяем, соответствует ли формат "число.число"
-        match = re.match(r"^(\d+)\.(\d+)$", address_text)
-        if match:
+        if "." in address_text:
             # Если адрес в формате "регистр.бит"
-            register = int(match.group(1))
-            bit_position = int(match.group(2))
-
-            if 0 <= bit_position <= 15:
+            parsed = parse_address(address_text)
+            if parsed is not None:
                 # Устанавливаем "Вычисленный адрес" для битового адреса
-                self.address_input.setText(f"{register}.{bit_position}")
+                self.address_input.setText(format_address(*parsed))
             else:
                 self.address_input.setText("Введите корректный адрес")
         else:
@@ -672,28 +932,18 @@ class MainWindow(QWidget):
             try:
                 burner_number = int(self.burner_number_input.text())
                 word = int(self.word_input.text())
-                if 0 <= burner_number <= 20 and 1 <= word <= 31:
-                    # Вычисляем адрес Modbus
-                    address = 1344 + (word - 1) * 2 + 64 * burner_number
-                    self.address_input.setText(str(address))
-                else:
-                    self.address_input.setText("Введите корректный адрес")
+                # Вычисляем адрес Modbus
+                self.address_input.setText(str(burner_address(burner_number, word)))
             except ValueError:
                 self.address_input.setText("Введите корректный адрес")
 
     def update_burner_word_from_address(self):
         """Пересчитывает номер горелки и слово на основе адреса."""
         try:
-            address = int(self.address_input.text())
-            if address >= 1344:
-                burner_number = (address - 1344) // 64
-                word = ((address - 1344) % 64) // 2 + 1
-                if 0 <= burner_number <= 20 and 1 <= word <= 31:
-                    self.burner_number_input.setText(str(burner_number))
-                    self.word_input.setText(str(word))
-                else:
-                    self.burner_number_input.setText("0")
-                    self.word_input.setText("0")
+            burner_and_word = burner_word(int(self.address_input.text()))
+            if burner_and_word is not None:
+                self.burner_number_input.setText(str(burner_and_word[0]))
+                self.word_input.setText(str(burner_and_word[1]))
             else:
                 self.burner_number_input.setText("0")
                 self.word_input.setText("0")
@@ -702,86 +952,215 @@ class MainWindow(QWidget):
             self.word_input.setText("0")
 
     def add_address(self):
-        # Отключаем сигналы, чтобы предотвратить срабатывание handle_item_changed
-        self.table.blockSignals(True)
-
         # Получаем текст из поля "Вычисленный адрес" и комментарий
         address_text = self.address_input.text().strip()
         comment_text = self.comment_input.text().strip() if hasattr(self, 'comment_input') else ""
 
-        # Проверяем, существует ли уже строка с таким адресом
-        for row in range(self.table.rowCount()):
-            if self.table.item(row, 0) and self.table.item(row, 0).text() == address_text:
-                QMessageBox.warning(self, "Ошибка", "Адрес уже существует в таблице.")
-                self.table.blockSignals(False)
-                return  # Выходим из функции, если адрес уже существует
+        # Проверяем, существует ли уже строка с таким адресом (по индексу адресов модели)
+        if self.tag_model.has_address(address_text):
+            QMessageBox.warning(self, "Ошибка", "Адрес уже существует в таблице.")
+            return  # Выходим из функции, если адрес уже существует
 
         # Добавляем новую строку в таблицу
-        row_position = self.table.rowCount()
-        self.table.insertRow(row_position)
-        self.table.setItem(row_position, 0, QTableWidgetItem(address_text))  # Адрес
-        self.table.setItem(row_position, 1, QTableWidgetItem("0.0"))  # REAL
-        self.table.setItem(row_position, 2, QTableWidgetItem("0"))  # DWORD
-        self.table.setItem(row_position, 3, QTableWidgetItem("0"))  # WORD
-        self.table.setItem(row_position, 4, QTableWidgetItem("Ошибка"))  # BOOL
-        self.table.setItem(row_position, 5, QTableWidgetItem(comment_text))  # Комментарий
-
-        # Включаем обработку сигналов обратно после завершения добавления
-        self.table.blockSignals(False)
-
-        # Если приложение в режиме online, запускаем поток для этого адреса
-        if self.online:
-            thread = CounterThread(row_position, address_text, self.ip, self.port, self.interval)
-            thread.updated_value.connect(self.update_table)
-            thread.connection_lost.connect(self.handle_connection_lost)
-            self.threads.insert(row_position, thread)
-            thread.start()
+        self.tag_model.append_row(address_text, comment_text)
+
+        # Если приложение в режиме online, перестраиваем план опроса с новым адресом
+        self.restart_all_threads()
+
+    def add_burner_range(self):
+        """Добавляет теги для диапазонов горелок и слов ("0-20", "3-9") одной вставкой."""
+        try:
+            burners = parse_ranges(self.burner_range_input.text() or "0-20", BURNERS)
+            words = parse_ranges(self.word_range_input.text(), WORDS)
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", f"Диапазон горелок или слов: {e}")
+            return
+        self.add_tags(generate_burner_tags(burners, words))
+
+    def import_tags(self):
+        """Импорт тегов из CSV или таблицы символов ПЛК (address/burner+word, comment/name, настройки)."""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Импорт тегов", "", "CSV Files (*.csv);;All Files (*)")
+        if not file_path:
+            return
+        try:
+            rows, errors = load_tag_csv(file_path, TAG_SETTING_KEYS)
+        except (OSError, ValueError, csv.Error) as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось прочитать {file_path}: {e}")
+            return
+        self.add_tags(rows, errors)
+
+    def add_tags(self, rows, errors=()):
+        """Добавляет строки (адрес, комментарий, настройки) без дубликатов одной вставкой в модель."""
+        started = time.perf_counter()
+        added, duplicates, invalid = merge_tags(self.tag_model.addresses, rows)
+        self.tag_model.append_rows([(address, comment) for address, comment, _ in added],
+                                   [settings for _, _, settings in added])
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"Added {len(added)} tags in {elapsed:.1f} ms ({len(duplicates)} duplicates, {len(invalid)} invalid)")
+        if added:
+            self.restart_all_threads()  # Один перезапуск опроса на весь импорт
+
+        problems = list(errors) + [f"недопустимый адрес '{address}'" for address in invalid]
+        message = f"Добавлено тегов: {len(added)} за {elapsed:.0f} мс"
+        if duplicates:
+            message += f"\nПропущено дубликатов: {len(duplicates)}"
+        if problems:
+            message += f"\nОшибки ({len(problems)}):\n" + "\n".join(problems[:20])
+        QMessageBox.information(self, "Добавление тегов", message)
 
     def remove_selected_address(self):
-        selected_row = self.table.currentRow()
+        selected_row = self.table.currentIndex().row()
         if selected_row >= 0:
-            # Останавливаем и удаляем соответствующий поток
-            if selected_row < len(self.threads):
-                thread = self.threads.pop(selected_row)
-                thread.stop()
-                thread.wait()
+            # Линии графика удаляемого тега убираются; линии остальных тегов ссылаются
+            # на номера тегов и после сдвига строк показывают те же теги
+            tag_id = self.tag_model.tag_id(selected_row)
+            self.plot_data = [key for key in self.plot_data if key[0] != tag_id]
+            if self.plot_window:
+                self.plot_window.remove_tag(tag_id)
 
             # Удаляем строку из таблицы
-            self.table.removeRow(selected_row)
+            self.tag_model.remove_row(selected_row)
 
-            # Обновляем индексы потоков
-            for i in range(selected_row, len(self.threads)):
-                self.threads[i].index = i  # Обновляем индекс потока
+            # Индексы строк сдвинулись, поэтому перестраиваем план опроса
+            self.restart_all_threads()
 
         else:
             QMessageBox.warning(self, "Ошибка", "Выберите строку для удаления.")
 
-    def handle_item_changed(self, item):
-        """Обработчик для изменений ячеек в таблице."""
-        row = item.row()
-        column = item.column()
-
-        # Получаем адрес и комментарий из основной таблицы
-        address = self.table.item(row, 0).text() if self.table.item(row, 0) else ""
-        comment = self.table.item(row, 5).text() if self.table.item(row, 5) else ""
-
-        # Если изменилось значение "REAL", "DWORD" или "WORD", обновляем текущее значение
-        if column in [1, 2, 3]:  # Индексы столбцов для REAL, DWORD, WORD
-            current_value = self.table.item(row, column).text()
+    def refresh_display(self):
+        """Кадр GUI: забирает из буфера только изменившиеся теги и обновляет таблицу."""
+        if (not self.online and self.replay_thread is None) or self.snapshot is None:
+            return  # Не обновляем таблицу в режиме "offline"
+        started = time.perf_counter()
+        values = self.snapshot.collect()
+        self.update_table(values)
+        self.update_poll_focus()
+        self.batch_histogram.record(len(values.index))
+        self.refresh_histogram.record(time.perf_counter() - started)
+        if self.plot_window:
+            for values in self.snapshot.collect_samples():
+                self.plot_window.append_samples(values, self.tag_model.tag_ids)
+        if self.replay_thread is not None:
+            self.refresh_replay_position()
+
+    def open_export_window(self):
+        """Окно экспорта архива; выбранные в таблице строки становятся списком тегов."""
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedIndexes()})
+        addresses = [self.tag_model.address(row) for row in rows if self.tag_model.address(row)]
+        self.export_window = ExportWindow(self.historian_settings.get("directory", "history"), addresses)
+        self.export_window.show()
+
+    def open_diagnostics_window(self):
+        """Окно с метриками опроса и отрисовки."""
+        if self.diagnostics_window is None:
+            from diagnostics_window import DiagnosticsWindow
+            self.diagnostics_window = DiagnosticsWindow()
+        self.diagnostics_window.show()
+        self.diagnostics_window.raise_()
+
+    def start_metrics_dump(self):
+        """Запускает периодическую запись метрик, если в конфигурации задан путь."""
+        self.metrics_timer.stop()
+        if self.metrics_settings.get("path"):
+            self.metrics_timer.start(int(max(1, self.metrics_settings.get("interval", 60)) * 1000))
+
+    def dump_metrics(self):
+        try:
+            metrics.dump(self.metrics_settings["path"])
+        except OSError as e:
+            print(f"Failed to write metrics: {e}")
+
+    def open_replay(self):
+        """Выбор папки архива и запуск воспроизведения."""
+        directory = QFileDialog.getExistingDirectory(self, "Папка архива", self.historian_settings.get("directory", ""))
+        if directory:
+            self.start_replay(directory)
+
+    def start_replay(self, directory):
+        """Воспроизводит архив через те же таблицу и графики, что и живой опрос."""
+        source = ReplaySource(directory, self.replay_speed_combo.currentData())
+        if not source.addresses:
+            QMessageBox.warning(self, "Ошибка", "В папке нет записей архива.")
+            return
 
-            # Проверяем, открыто ли окно "Графики" и обновляем значение
-            if self.plot_window and self.plot_window.isVisible():
-                self.plot_window.update_tag_value(f"{address} ({self.table.horizontalHeaderItem(column).text()})",
-                                                  current_value, comment)
+        # Воспроизведение заменяет опрос ПЛК
+        self.stop_replay()
+        if self.online:
+            self.update_connection_params(self.ip, self.port, self.interval, False)
+
+        # Таблица строится из адресов записи; комментарии и номера тегов (а с ними линии графика)
+        # переносятся по адресу
+        comments = dict(zip(self.tag_model.addresses, self.tag_model.comments))
+        tag_ids = dict(zip(self.tag_model.addresses, self.tag_model.tag_ids))
+        new_ids = self.tag_model.new_tag_ids(len(source.addresses))
+        self.tag_model.set_rows([(address, comments.get(address, "")) for address in source.addresses],
+                                tag_ids=[tag_ids.get(address, new_id)
+                                         for address, new_id in zip(source.addresses, new_ids)])
+        self.drop_missing_plot_lines()
+
+        self.snapshot = SnapshotBuffer(self.tag_model.rowCount())
+        self.update_plot_subscriptions()
+        if self.plot_window:
+            self.plot_window.clear_history()
+        self.replay_thread = ReplayThread(source, self.snapshot)
+        self.replay_thread.finished.connect(self.refresh_replay_position)
+        self.replay_thread.start()
+        self.replay_slider.setEnabled(True)
+        self.replay_stop_button.setEnabled(True)
+        self.config_path_label.setText(f"Воспроизведение: {directory}")
+        print(f"Replay started: {directory} ({len(source.addresses)} tags, {len(source.chunks)} chunks)")
+
+    def drop_missing_plot_lines(self):
+        """Убирает линии графика тегов, которых больше нет в таблице."""
+        self.plot_data = [key for key in self.plot_data if self.tag_model.row_of(key[0]) is not None]
+        if self.plot_window:
+            for key in list(self.plot_window.lines):
+                if self.tag_model.row_of(key[0]) is None:
+                    self.plot_window.remove_line(key)
+
+    def stop_replay(self):
+        if self.replay_thread is not None:
+            self.replay_thread.stop()
+            self.replay_thread = None
+            self.snapshot = None
+        self.replay_slider.setEnabled(False)
+        self.replay_stop_button.setEnabled(False)
+
+    def change_replay_speed(self):
+        if self.replay_thread is not None:
+            self.replay_thread.source.set_speed(self.replay_speed_combo.currentData())
+
+    def seek_replay(self):
+        """Перемотка на положение ползунка; история графика начинается заново."""
+        if self.replay_thread is None:
+            return
+        source = self.replay_thread.source
+        fraction = self.replay_slider.value() / REPLAY_SLIDER_STEPS
+        source.seek(source.start_time + fraction * (source.end_time - source.start_time))
+        self.snapshot.collect_samples()  # Выборки до перемотки на график не попадают
+        if self.plot_window:
+            self.plot_window.clear_history()
+        if self.replay_thread.isFinished():
+            self.replay_thread.start()  # Запись уже доиграна — продолжаем с нового места
 
-    def update_table(self, index, values):
-        if not self.online:
-            return  # Не обновляем таблицу в режиме "offline"
-        # Обновляем значения в таблице
-        self.table.setItem(index, 1, QTableWidgetItem(str(values[0])))
-        self.table.setItem(index, 2, QTableWidgetItem(str(values[1])))
-        self.table.setItem(index, 3, QTableWidgetItem(str(values[2])))
-        self.table.setItem(index, 4, QTableWidgetItem(values[3]))
+    def refresh_replay_position(self):
+        """Показывает время записи и двигает ползунок (если его не держит пользователь)."""
+        if self.replay_thread is None:
+            return
+        source = self.replay_thread.source
+        if source.position is None:
+            return
+        text = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(source.position))
+        if self.replay_thread.isFinished():
+            text += " (конец записи)"
+        self.replay_position_label.setText(text)
+        duration = source.end_time - source.start_time
+        if duration > 0 and not self.replay_slider.isSliderDown():
+            self.replay_slider.setValue(int((source.position - source.start_time) / duration * REPLAY_SLIDER_STEPS))
+
+    def update_table(self, values):
+        """Записывает пачку значений (CycleValues) в модель таблицы."""
+        self.tag_model.update_values(values.index, values.real, values.dword, values.word)
 
     def save_config(self):
         """Сохранение конфигурации без текущих значений REAL, DWORD, WORD и BOOL."""
@@ -795,26 +1174,45 @@ class MainWindow(QWidget):
             "connection": {
                 "ip": self.ip,
                 "port": self.port,
-                "interval": self.interval
+                "interval": self.interval,
+                "block_gap": self.block_gap,
+                "unit_id": self.unit_id,
+                "max_connections": self.max_connections,
+                "backend": self.backend,
+                "max_in_flight": self.max_in_flight,
+                "display_rate": self.display_rate,
+                "change_filter": self.change_filter,
+                "forced_refresh": self.forced_refresh,
+                "breaker_failures": self.breaker_failures,
+                "breaker_max_delay": self.breaker_max_delay,
+                "write_verify": self.write_verify,
+                "background_interval": self.background_interval
             },
             "window_size": [self.width(), self.height()],
             "table_data": [],
             "column_settings": {
-                "widths": [self.table.columnWidth(i) for i in range(self.table.columnCount())],
-                "visibility": [not self.table.isColumnHidden(i) for i in range(self.table.columnCount())]
+                "widths": [self.table.columnWidth(i) for i in range(self.tag_model.columnCount())],
+                "visibility": [not self.table.isColumnHidden(i) for i in range(self.tag_model.columnCount())]
             },
-            "plot_state": [(key[0], key[1]) for key in self.plot_window.lines] if self.plot_window else []
+            "plot_state": [(tag_id, column_name) for tag_id, column_name in self.plot_window.lines]
+            if self.plot_window else self.plot_data,
+            "plot_history": self.plot_history,
+            "poll_groups": self.poll_groups,
+            "devices": self.device_configs,
+            "historian": self.historian_settings,
+            "metrics": self.metrics_settings
         }
 
-        # Сохраняем только адреса и комментарии из таблицы
-        for row in range(self.table.rowCount()):
-            address_item = self.table.item(row, 0)
-            comment_item = self.table.item(row, 5)
-            if address_item and comment_item:
-                config_data["table_data"].append({
-                    "address": address_item.text(),
-                    "comment": comment_item.text()
-                })
+        # Сохраняем только номера тегов, адреса, комментарии и настройки тегов из таблицы
+        for tag_id, address, comment, settings in zip(self.tag_model.tag_ids, self.tag_model.addresses,
+                                                      self.tag_model.comments, self.tag_model.tag_settings):
+            row_data = {
+                "id": tag_id,
+                "address": address,
+                "comment": comment
+            }
+            row_data.update(settings)
+            config_data["table_data"].append(row_data)
 
         # Сохраняем данные в выбранный файл
         with open(file_path, 'w') as f:
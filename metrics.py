@@ -0,0 +1,148 @@
+"""Встроенные метрики опроса и отрисовки.
+
+Гистограммы и счетчики выделяются заранее; запись — поиск корзины bisect и
+несколько сложений, без блокировок и выделения памяти. У каждой гистограммы
+один писатель (поток опроса своего ПЛК или поток GUI), поэтому блокировка
+нужна только при создании метрик. Снимок (snapshot) собирается по запросу —
+в окне диагностики или при записи JSON.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Верхние границы корзин задержки, секунды (последняя корзина — все, что больше)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+# Верхние границы корзин размеров (число тегов в пакете обновления)
+SIZE_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# Исходы запроса к ПЛК
+OK = "ok"
+TIMEOUT = "timeout"
+ERROR = "error"
+EXCEPTION = "exception"  # ПЛК ответил исключением Modbus
+OUTCOMES = (OK, TIMEOUT, ERROR, EXCEPTION)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами; перцентили — по верхней границе корзины."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Верхняя граница корзины, в которую попадает percent% значений, но не больше максимума."""
+        if not self.count:
+            return None
+        target = self.count * percent / 100.0
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(self.bounds[bucket], self.max) if bucket < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        buckets = {f"<={bound:g}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]:g}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+class EndpointMetrics:
+    """Запросы к одному ПЛК: задержка успешных запросов и число запросов по исходам."""
+
+    __slots__ = ("latency", "outcomes")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+
+    def record(self, elapsed, outcome=OK):
+        self.outcomes[outcome] += 1
+        if outcome == OK:
+            self.latency.record(elapsed)
+
+    def snapshot(self):
+        return {"requests": sum(self.outcomes.values()), **self.outcomes, "latency_s": self.latency.snapshot()}
+
+
+class MetricsRegistry:
+    """Все метрики процесса.
+
+    endpoint(host, port) и histogram(name) возвращают объект, который вызывающий
+    держит у себя и пишет в него без обращения к реестру. Источники (add_source) —
+    функции, которые возвращают уже посчитанную статистику (например, группы опроса)
+    и вызываются только при снимке.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.endpoints = {}
+        self.histograms = {}
+        self.sources = {}
+
+    def endpoint(self, host, port):
+        key = f"{host}:{port}"
+        with self._lock:
+            if key not in self.endpoints:
+                self.endpoints[key] = EndpointMetrics()
+            return self.endpoints[key]
+
+    def histogram(self, name, bounds=LATENCY_BUCKETS):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(bounds)
+            return self.histograms[name]
+
+    def add_source(self, name, function):
+        with self._lock:
+            self.sources[name] = function
+
+    def remove_source(self, name):
+        with self._lock:
+            self.sources.pop(name, None)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = dict(self.endpoints)
+            histograms = dict(self.histograms)
+            sources = dict(self.sources)
+        return {
+            "time": time.time(),
+            "uptime_s": time.time() - self.started,
+            "endpoints": {key: endpoint.snapshot() for key, endpoint in endpoints.items()},
+            "histograms": {name: histogram.snapshot() for name, histogram in histograms.items()},
+            "sources": {name: function() for name, function in sources.items()},
+        }
+
+    def dump(self, path):
+        """Записывает снимок в JSON; файл заменяется целиком, читатель не увидит половину записи."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.snapshot(), f, indent=4)
+        os.replace(temporary, path)
+
+
+metrics = MetricsRegistry()
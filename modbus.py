@@ -1,36 +1,149 @@
 #!/usr/bin/env python3
 
-""" How-to add float support to ModbusClient. """
+""" Общий пул соединений Modbus TCP. """
+
+import select
+import threading
+import time
+from contextlib import contextmanager
 
 from pyModbusTCP.client import ModbusClient
-from pyModbusTCP.utils import (decode_ieee, encode_ieee, long_list_to_word,
-                               word_list_to_long)
-
-
-class FloatModbusClient(ModbusClient):
-    """A ModbusClient class with float support."""
-
-    def read_float(self, address, number=1):
-        """Read float(s) with read holding registers."""
-        reg_l = self.read_holding_registers(address, number * 2)
-        if reg_l:
-            results = []
-            for i in range(number):
-                reg1 = reg_l[i * 2]  # первый регистр
-                reg2 = reg_l[i * 2 + 1]  # второй регистр
-                # Объединение в 32-битное значение (little-endian)
-                float_value = (reg2 << 16) | reg1
-                decoded_value = decode_ieee(float_value)  # декодирование значения
-                results.append(round(decoded_value, 6))  # округление до 6 знаков после запятой
-            return results
-        else:
-            return None
-
-    def write_float(self, address, floats_list):
-        """Write float(s) with write multiple registers."""
-        b32_l = [encode_ieee(f) for f in floats_list]
-        b16_l = long_list_to_word(b32_l)
-        return self.write_multiple_registers(address, b16_l)
+
+# Ограничение по умолчанию на число одновременных соединений с одним ПЛК
+DEFAULT_MAX_CONNECTIONS = 2
+# Соединение, простоявшее дольше этого времени, проверяется перед выдачей
+DEFAULT_HEALTH_CHECK_INTERVAL = 10.0
+
+
+class PoolExhaustedError(Exception):
+    """Все соединения с ПЛК заняты, и свободное не появилось за отведенное время."""
+
+
+class ModbusConnectionPool:
+    """Пул соединений ModbusClient с ключом (host, port, unit_id).
+
+    Весь блокирующий код опроса берет соединения отсюда, поэтому на один ПЛК
+    открывается не больше max_connections сокетов независимо от числа тегов.
+    Бэкенд asyncio (async_acquisition) держит одно свое конвейерное соединение на ПЛК.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, timeout=1,
+                 health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._condition = threading.Condition()
+        self._idle = {}  # key -> список (client, время возврата в пул)
+        self._total = {}  # key -> число созданных и еще не закрытых соединений
+        self._owners = {}  # id(client) -> key
+
+        # Счетчики для статистики
+        self.opened = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def acquire(self, host, port, unit_id=1, wait=None):
+        """Выдает соединение из пула, при необходимости создавая новое."""
+        key = (host, int(port), int(unit_id))
+        wait = self.timeout * 5 if wait is None else wait
+        deadline = time.monotonic() + wait
+
+        with self._condition:
+            while True:
+                idle = self._idle.get(key)
+                while idle:
+                    client, released_at = idle.pop()
+                    if time.monotonic() - released_at < self.health_check_interval or self._is_healthy(client):
+                        self.reused += 1
+                        return client
+                    self._discard(key, client)
+
+                if self._total.get(key, 0) < self.max_connections:
+                    client = ModbusClient(host=host, port=int(port), unit_id=int(unit_id),
+                                          auto_open=True, timeout=self.timeout)
+                    self._total[key] = self._total.get(key, 0) + 1
+                    self._owners[id(client)] = key
+                    self.opened += 1
+                    return client
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(f"No free Modbus connection to {host}:{port} (unit {unit_id})")
+                self._condition.wait(remaining)
+
+    def release(self, client, broken=False):
+        """Возвращает соединение в пул; сломанное соединение закрывается."""
+        with self._condition:
+            key = self._owners.get(id(client))
+            if key is None:
+                client.close()
+                return
+            if broken or not client.is_open:
+                self._discard(key, client)
+            else:
+                self._idle.setdefault(key, []).append((client, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, host, port, unit_id=1):
+        """Контекстный менеджер: with pool.connection(ip, port) as client: ..."""
+        client = self.acquire(host, port, unit_id)
+        broken = False
+        try:
+            yield client
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(client, broken)
+
+    def close_all(self):
+        """Закрывает все свободные соединения (занятые закроются при возврате)."""
+        with self._condition:
+            for key, idle in self._idle.items():
+                for client, _ in idle:
+                    self._discard(key, client)
+            self._idle.clear()
+            self._condition.notify_all()
+
+    def stats(self):
+        """Счетчики пула для отображения в интерфейсе."""
+        with self._condition:
+            return {
+                "opened": self.opened,
+                "reused": self.reused,
+                "discarded": self.discarded,
+                "open": sum(self._total.values()),
+                "idle": sum(len(idle) for idle in self._idle.values()),
+            }
+
+    def _discard(self, key, client):
+        client.close()
+        self._owners.pop(id(client), None)
+        self._total[key] = max(0, self._total.get(key, 0) - 1)
+        self.discarded += 1
+
+    @staticmethod
+    def _is_healthy(client):
+        """Проверка простаивавшего соединения: сокет открыт и ПЛК его не закрыл."""
+        if not client.is_open:
+            # Сокет еще не открывался (auto_open) — откроется при первом запросе
+            return True
+        sock = getattr(client, "_sock", None)
+        if sock is None:
+            return True
+        try:
+            # У простаивающего сокета читать нечего: если он "читаем", то либо ПЛК
+            # закрыл соединение, либо в нем лежит ответ, который уже никто не ждет
+            readable, _, _ = select.select([sock], [], [], 0)
+            return not readable
+        except (OSError, ValueError):
+            return False
+
+
+# Общий пул процесса
+connection_pool = ModbusConnectionPool()
+
 
 # ip_cpu = '192.168.56.2'
-# port = '502'
\ No newline at end of file
+# port = '502'
@@ -1,13 +1,17 @@
 import json
-import numpy as np
+import time
 import pyqtgraph as pg
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtWidgets import QMainWindow, QVBoxLayout, QTableWidget, QPushButton, QWidget, QTableWidgetItem
 from pyqtgraph import AxisItem
 
-# Файл для хранения настроек и конфигурации таблицы
-config_file = 'config.json'
-table_config_file = 'table_config.json'
+from config_manager import table_config_file
+from decimation import HistorySeries
+from metrics import metrics
+from ring_buffer import DEFAULT_CAPACITY
+
+# Период перерисовки линий, мс: точки копятся в буферах, а рисуются не чаще этого
+REDRAW_INTERVAL = 50
 
 
 class CustomAxis(AxisItem):
@@ -16,9 +20,30 @@ class CustomAxis(AxisItem):
         return [f"{value:.1f}" for value in values]
 
 
+class TimeAxis(AxisItem):
+    """Ось времени: точки хранятся в монотонном времени, подписи — в настенном."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Смещение монотонных часов относительно системных, чтобы не копировать массивы времени
+        self.wall_offset = time.time() - time.monotonic()
+
+    def tickStrings(self, values, scale, spacing):
+        fmt = "%H:%M:%S" if spacing >= 1 else "%H:%M:%S.{ms}"
+        strings = []
+        for value in values:
+            wall = value + self.wall_offset
+            text = time.strftime(fmt, time.localtime(wall))
+            strings.append(text.replace("{ms}", f"{int(wall * 1000) % 1000:03d}"))
+        return strings
+
+
 class PlotWindow(QMainWindow):
-    def __init__(self, parent=None):
+    lines_changed = Signal()  # Набор линий изменился — нужно обновить подписки на выборки
+
+    def __init__(self, parent=None, capacity=DEFAULT_CAPACITY):
         super().__init__(parent)
+        self.capacity = capacity  # Точек истории каждой линии
 
         # Отложенный импорт
         if parent:
@@ -31,7 +56,7 @@ class PlotWindow(QMainWindow):
 
         # Виджет графика
         self.plot_widget = pg.PlotWidget(axisItems={'left': CustomAxis(orientation='left')})
-        self.plot_widget = pg.PlotWidget(title="")
+        self.plot_widget = pg.PlotWidget(title="", axisItems={'bottom': TimeAxis(orientation='bottom')})
         self.plot_widget.setBackground('w')  # Устанавливаем белый фон
         self.plot_widget.getAxis("left").setPen("k")  # Черная ось Y
         self.plot_widget.getAxis("bottom").setPen("k")  # Черная ось X
@@ -44,9 +69,25 @@ class PlotWindow(QMainWindow):
         # Отключаем автоматический префикс на оси Y
         self.plot_widget.getAxis('left').enableAutoSIPrefix(False)
 
-        # Словари для линий и данных
+        # Словари для линий и данных; ключ линии — (номер тега, столбец), номер тега не меняется
+        # при удалении строк основной таблицы (TagTableModel.tag_ids)
         self.lines = {}
-        self.y_data = {}
+        self.series = {}  # key -> HistorySeries с точками (время, значение)
+        self.dirty_lines = set()  # Линии, которые нужно перерисовать
+        self.redraw_histogram = metrics.histogram("plot.redraw_s")
+        self.keys_by_tag = {}  # Номер тега -> ключи линий этого тега
+        # Ключ линии -> ячейки (значение, комментарий) в таблице тегов графика; ячейки остаются
+        # теми же объектами при удалении других строк, поэтому номера строк пересчитывать не нужно
+        self.tag_items = {}
+        self.pending_values = {}  # Ключ линии -> последнее значение, еще не показанное в таблице
+
+        # Перерисовка с прореживанием под видимый диапазон и ширину графика
+        view_box = self.plot_widget.getViewBox()
+        view_box.sigXRangeChanged.connect(self.mark_all_dirty)
+        view_box.sigResized.connect(self.mark_all_dirty)
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.timeout.connect(self.redraw)
+        self.redraw_timer.start(REDRAW_INTERVAL)
 
         # Добавляем таблицу тегов и кнопку для удаления
         self.tag_list = QTableWidget(0, 3)
@@ -66,52 +107,24 @@ class PlotWindow(QMainWindow):
         central_widget.setLayout(layout)
         self.setCentralWidget(central_widget)
 
-    def update_tag_value(self, label, current_value, comment):
-        """Обновить текущее значение и комментарий для тега в таблице графиков."""
-        for row in range(self.tag_list.rowCount()):
-            if self.tag_list.item(row, 0).text() == label:  # Ищем тег по адресу
-                # Приводим значение к целому, если это не тип REAL
-                if "DWORD" in label or "WORD" in label:
-                    current_value = int(current_value)  # Приведение к целому
-                else:
-                    current_value = float(current_value)  # Для REAL оставляем как float
-
-                self.tag_list.setItem(row, 1, QTableWidgetItem(str(current_value)))  # Обновляем Current Value
-                self.tag_list.setItem(row, 2, QTableWidgetItem(comment))  # Обновляем Comment
-                break
-
+    def update_tag_comment(self, tag_id, comment):
+        """Обновить комментарий у всех линий тега tag_id."""
+        for key in self.keys_by_tag.get(tag_id, ()):
+            self.tag_items[key][1].setText(comment)
 
     def clear_and_load_graph_data(self, plot_state):
         """Очищает все текущие данные с графика и загружает новые данные из plot_state."""
         print("Очистка графиков и загрузка новых данных...")  # Отладка
         self.clear_all_graph_data()  # очищаем текущие графики
 
-        for row, column_name in plot_state:
-            # Извлекаем адрес и значение из основной таблицы
-            address_item = self.parent().table.item(row, 0)
-            if address_item:
-                address = address_item.text()
-                label = f"{address} ({column_name})"
-
-                # Проверяем, получен ли индекс столбца
-                column_index = self.parent().get_column_index(column_name)
-                if column_index is None:
-                    print(f"Ошибка: Индекс для столбца {column_name} не найден.")  # Отладка
-                    continue
-
-                # Получаем текущее значение и комментарий
-                current_value_item = self.parent().table.item(row, column_index)
-                current_value = float(current_value_item.text()) if current_value_item else 0.0
-                comment_item = self.parent().table.item(row, 5)
-                comment = comment_item.text() if comment_item else ""
-
-                print(
-                    f"Добавление линии на график: {label} со значением {current_value} и комментарием '{comment}'")  # Отладка
-
-                # Добавляем линию на график
-                self.add_line((row, column_name), label, current_value, comment)
-            else:
-                print(f"Ошибка: Адрес для строки {row} не найден.")  # Отладка
+        for tag_id, column_name in plot_state:
+            # Проверяем, получен ли индекс столбца
+            if self.parent().get_column_index(column_name) is None:
+                print(f"Ошибка: Индекс для столбца {column_name} не найден.")  # Отладка
+                continue
+            # Адрес, текущее значение и комментарий берутся из строки тега в основной таблице
+            if not self.parent().add_plot_line((tag_id, column_name)):
+                print(f"Ошибка: Тег {tag_id} не найден.")  # Отладка
 
     def closeEvent(self, event):
         """Обработчик закрытия окна для сохранения конфигурации графиков."""
@@ -122,7 +135,7 @@ class PlotWindow(QMainWindow):
     def save_plot_data(self):
         """Сохранение текущей конфигурации графиков в файл."""
         config = {
-            'plot_data': [(row, col) for row, col in self.plot_data],
+            'plot_data': [(tag_id, col) for tag_id, col in self.plot_data],
         }
         with open(table_config_file, 'w') as f:
             json.dump(config, f, indent=4)
@@ -131,8 +144,19 @@ class PlotWindow(QMainWindow):
         """Полностью очищает график и таблицу тегов."""
         self.plot_widget.clear()  # Удаляет все линии с графика
         self.lines.clear()  # Очищает словарь линий
-        self.y_data.clear()  # Очищает данные для графика
+        self.series.clear()  # Очищает данные для графика
+        self.dirty_lines.clear()
+        self.keys_by_tag.clear()
+        self.tag_items.clear()
+        self.pending_values.clear()
         self.tag_list.setRowCount(0)  # Очищает таблицу тегов
+        self.lines_changed.emit()
+
+    def clear_history(self):
+        """Очищает накопленные точки всех линий, оставляя сами линии (например, после перемотки)."""
+        for series in self.series.values():
+            series.clear()
+        self.mark_all_dirty()
 
     def add_line(self, key, label, current_value=0.0, comment=""):
         """Добавить линию на график и в список тегов."""
@@ -140,63 +164,110 @@ class PlotWindow(QMainWindow):
             color = pg.intColor(len(self.lines), hues=10)
             line = self.plot_widget.plot(pen=color, name=label)
             self.lines[key] = line
-            self.y_data[key] = np.zeros(1000)
+            self.series[key] = HistorySeries(self.capacity)
 
             # Добавляем строку с адресом, текущим значением и комментарием в таблицу тегов
             row_position = self.tag_list.rowCount()
             self.tag_list.insertRow(row_position)
-            self.tag_list.setItem(row_position, 0, QTableWidgetItem(label))  # Address
-            self.tag_list.setItem(row_position, 1, QTableWidgetItem(str(current_value)))  # Current Value
-            self.tag_list.setItem(row_position, 2, QTableWidgetItem(comment))  # Comment
+            label_item = QTableWidgetItem(label)
+            label_item.setData(Qt.UserRole, key)  # По ключу строка удаляется без поиска по тексту
+            value_item = QTableWidgetItem(str(current_value))
+            comment_item = QTableWidgetItem(comment)
+            self.tag_list.setItem(row_position, 0, label_item)  # Address
+            self.tag_list.setItem(row_position, 1, value_item)  # Current Value
+            self.tag_list.setItem(row_position, 2, comment_item)  # Comment
+            self.tag_items[key] = (value_item, comment_item)
+            self.keys_by_tag.setdefault(key[0], []).append(key)
+            self.lines_changed.emit()
 
     def remove_line(self, key):
         """Удалить линию с графика и из списка тегов."""
         if key in self.lines:
             self.plot_widget.removeItem(self.lines[key])
             del self.lines[key]
-            del self.y_data[key]
-
-            # Удалить тег из списка
-            for row in range(self.tag_list.rowCount()):
-                if self.tag_list.item(row, 0).text() == key[1]:  # Совпадение по метке
-                    self.tag_list.removeRow(row)
-                    break
-
+            del self.series[key]
+            self.dirty_lines.discard(key)
+            self.pending_values.pop(key, None)
+            tag_keys = self.keys_by_tag.get(key[0], [])
+            if key in tag_keys:
+                tag_keys.remove(key)
+            if not tag_keys:
+                self.keys_by_tag.pop(key[0], None)
+
+            # Удалить тег из списка: текущую строку знает сама ячейка
+            value_item, _ = self.tag_items.pop(key)
+            self.tag_list.removeRow(value_item.row())
+            self.lines_changed.emit()
+
+    def remove_tag(self, tag_id):
+        """Удалить все линии тега (например, после удаления его строки из основной таблицы)."""
+        for key in list(self.keys_by_tag.get(tag_id, ())):
+            self.remove_line(key)
 
     def delete_selected_tag(self):
         """Удалить выбранный тег из графика и списка тегов."""
         selected_row = self.tag_list.currentRow()
         if selected_row >= 0:
-            tag_label = self.tag_list.item(selected_row, 0).text()
-            for key in list(self.lines.keys()):
-                if self.lines[key].name() == tag_label:
-                    self.remove_line(key)
+            key = self.tag_list.item(selected_row, 0).data(Qt.UserRole)
+            self.remove_line(key)
 
-                    # Удаляем тег из plot_data в MainWindow
-                    self.parent().remove_tag_from_plot_data(key)
+            # Удаляем тег из plot_data в MainWindow
+            self.parent().remove_tag_from_plot_data(key)
 
-                    self.tag_list.removeRow(selected_row)
-                    break
-
-    def update_line_value(self, key, new_value):
+    def update_line_value(self, key, new_value, timestamp=None):
         """Обновить текущее значение для линии в таблице и на графике."""
         if key in self.lines:
-            # Сдвигаем данные влево и добавляем новое значение справа
-            self.y_data[key] = np.roll(self.y_data[key], -1)
-            self.y_data[key][-1] = new_value
-            self.lines[key].setData(np.arange(1000), self.y_data[key])
-
-            # Обновляем значение в таблице
-            for row in range(self.tag_list.rowCount()):
-                if self.tag_list.item(row, 0).text() == key[1]:  # Найти нужный тег по адресу
-                    self.tag_list.setItem(row, 1, QTableWidgetItem(str(new_value)))  # Обновить Current Value
-                    break
-
+            self.update_line(key, new_value, timestamp)
+            self.pending_values[key] = new_value
 
-    def update_line(self, key, new_value):
-        """Обновить линию на графике с новыми значениями."""
+    def update_line(self, key, new_value, timestamp=None):
+        """Добавить точку в историю линии; перерисовка — по таймеру redraw."""
         if key in self.lines:
-            # Сдвигаем данные влево и добавляем новое значение справа
-            self.y_data[key] = np.roll(self.y_data[key], -1)
-            self.y_data[key][-1] = new_value
-            self.lines[key].setData(np.arange(1000), self.y_data[key])
+            self.series[key].append(time.monotonic() if timestamp is None else timestamp, new_value)
+            self.dirty_lines.add(key)
+
+    def append_samples(self, values, tag_ids):
+        """Добавляет выборки опроса (CycleValues) в линии соответствующих тегов.
+
+        tag_ids — номера тегов строк основной таблицы (TagTableModel.tag_ids).
+        Каждая выборка попадает в историю ровно один раз со временем ее чтения.
+        """
+        columns = {"REAL": values.real, "DWORD": values.dword, "WORD": values.word}
+        for position, row in enumerate(values.index.tolist()):
+            if row >= len(tag_ids):
+                continue  # Строка удалена, пока шел опрос
+            for key in self.keys_by_tag.get(tag_ids[row], ()):
+                value = columns[key[1]][position].item()
+                self.series[key].append(values.timestamp, value)
+                self.dirty_lines.add(key)
+                self.pending_values[key] = value
+
+    def mark_all_dirty(self, *args):
+        """Видимый диапазон или размер изменились — все линии нужно пересчитать."""
+        self.dirty_lines.update(self.lines)
+
+    def redraw(self):
+        """Рисует измененные линии: не больше пары точек на пиксель видимого диапазона."""
+        if not self.isVisible():
+            return
+
+        # Текущие значения в таблице тегов — один раз за кадр, а не на каждую выборку
+        for key, value in self.pending_values.items():
+            self.tag_items[key][0].setText(str(value))
+        self.pending_values.clear()
+
+        if not self.dirty_lines:
+            return
+        view_box = self.plot_widget.getViewBox()
+        if view_box.autoRangeEnabled()[0]:
+            x_min = x_max = None  # Автомасштаб по X — показываем всю историю
+        else:
+            x_min, x_max = view_box.viewRange()[0]
+        pixels = max(1, int(view_box.width()))
+
+        started = time.perf_counter()
+        for key in self.dirty_lines:
+            if key in self.lines:
+                self.lines[key].setData(*self.series[key].decimate(x_min, x_max, pixels))
+        self.dirty_lines.clear()
+        self.redraw_histogram.record(time.perf_counter() - started)
@@ -0,0 +1,230 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+from pyModbusTCP.constants import EXP_DATA_ADDRESS, MB_EXCEPT_ERR, MB_TIMEOUT_ERR
+
+from decoding import decode_registers
+from metrics import OK, TIMEOUT, ERROR, EXCEPTION
+from tag_compiler import as_tag_table, HIGH_FIRST
+
+# Ограничение протокола Modbus: не более 125 регистров в одном запросе 0x03
+MAX_REGISTERS_PER_REQUEST = 125
+# Теги REAL/DWORD занимают два регистра, блок не короче одного такого тега
+TAG_REGISTER_COUNT = 2
+# Сколько "лишних" регистров можно прочитать, чтобы склеить два соседних диапазона
+DEFAULT_GAP_FILL = 8
+# Уровни деления блока, который ПЛК отверг с ILLEGAL_DATA_ADDRESS (split_blocks):
+# склеен с промежутками, без промежутков (только вплотную стоящие теги), по одному диапазону тега
+MERGED, GAP_FREE, EXACT = range(3)
+
+# Значения тегов за один цикл опроса: массивы индексов строк, REAL, DWORD и WORD,
+# плюс время чтения по time.monotonic()
+CycleValues = namedtuple("CycleValues", ["index", "real", "dword", "word", "timestamp"])
+
+
+class RegisterBlock:
+    """Непрерывный диапазон регистров, читаемый одним запросом."""
+
+    __slots__ = ("start", "count", "buffer_offset", "split")
+
+    def __init__(self, start, count, split=MERGED):
+        self.start = start
+        self.count = count
+        self.buffer_offset = 0  # Положение блока в общем буфере слов цикла
+        self.split = split  # Уровень деления после отказа ПЛК: MERGED, GAP_FREE или EXACT
+
+    @property
+    def end(self):
+        return self.start + self.count
+
+    def __repr__(self):
+        return f"RegisterBlock(start={self.start}, count={self.count})"
+
+
+def plan_blocks(starts, counts, max_count=MAX_REGISTERS_PER_REQUEST, gap_fill=DEFAULT_GAP_FILL, split=MERGED):
+    """Склеивает диапазоны регистров (starts, counts по возрастанию starts) в блоки не длиннее max_count.
+
+    Соседние диапазоны объединяются, если разрыв между ними не превышает gap_fill.
+    """
+    max_count = max(TAG_REGISTER_COUNT, min(int(max_count), MAX_REGISTERS_PER_REQUEST))
+    gap_fill = max(0, int(gap_fill))
+
+    blocks = []
+    current = None
+    for register, count in zip(starts.tolist(), counts.tolist()):
+        tag_end = register + count
+        if current is not None:
+            new_end = max(current.end, tag_end)
+            if register - current.end <= gap_fill and new_end - current.start <= max_count:
+                current.count = new_end - current.start
+                continue
+        current = RegisterBlock(register, count, split)
+        blocks.append(current)
+    return blocks
+
+
+def split_blocks(blocks, starts, counts, max_count=MAX_REGISTERS_PER_REQUEST):
+    """Делит блоки, которые ПЛК отверг с ILLEGAL_DATA_ADDRESS, на точные диапазоны тегов.
+
+    starts, counts — диапазоны регистров всех тегов (TagTable.register_ranges).
+    Сначала из блоков убираются промежутки между тегами (диапазоны соседних
+    отвергнутых блоков склеиваются заново, но только вплотную), при повторном
+    отказе каждый диапазон читается отдельно. Возвращает (блоки, которые
+    делятся, новые блоки); блок из одного диапазона делить уже нечего.
+    """
+    merged = np.zeros(len(starts), dtype=bool)
+    split = []
+    parts = []
+    for block in blocks:
+        inside = (starts >= block.start) & (starts < block.end)
+        if block.split == MERGED:
+            merged |= inside
+        elif block.split == GAP_FREE and inside.sum() > 1:
+            parts.extend(RegisterBlock(start, count, EXACT)
+                         for start, count in zip(starts[inside].tolist(), counts[inside].tolist()))
+        else:
+            continue
+        split.append(block)
+    parts.extend(plan_blocks(starts[merged], counts[merged], max_count, 0, GAP_FREE))
+    return split, parts
+
+
+class PollEngine:
+    """Опрашивает все теги таблицы склеенными блоками регистров."""
+
+    def __init__(self, tags, max_count=MAX_REGISTERS_PER_REQUEST, gap_fill=DEFAULT_GAP_FILL):
+        # tags: tag_compiler.TagTable или список пар (индекс строки, текст адреса)
+        self.tags = as_tag_table(tags)
+        self.invalid = self.tags.invalid
+        self.max_count = max_count
+        descriptors = self.tags.descriptors
+        self.tag_index = descriptors["row"].astype(np.int64)
+        self.tag_bits = descriptors["bit"].astype(np.int64)
+        self.tag_high_first = descriptors["word_order"] == HIGH_FIRST
+        self.tag_single = descriptors["count"] == 1
+        self.focus_rows = None  # Строки в фокусе (set_focus) или None — фокус не задан
+        self.focus_blocks = None  # Маска блоков с тегами в фокусе
+        self.requests_sent = 0  # Сколько запросов отправлено на самом деле
+        self.failed_reads = 0  # Сколько чтений блоков не удалось
+        self.layout(plan_blocks(*self.tags.register_ranges(), max_count, gap_fill))
+
+    def layout(self, blocks):
+        """Раскладывает теги по блокам и общему буферу слов: все блоки цикла декодируются одним проходом."""
+        descriptors = self.tags.descriptors
+        starts = np.array([block.start for block in blocks], dtype=np.int64)
+        buffer_offsets = np.cumsum([0] + [block.count for block in blocks])
+        for block, buffer_offset in zip(blocks, buffer_offsets.tolist()):
+            block.buffer_offset = buffer_offset
+        self.buffer_size = int(buffer_offsets[-1])
+        registers = descriptors["register"].astype(np.int64)
+        self.tag_block = np.searchsorted(starts, registers, side="right") - 1
+        self.tag_offsets = (buffer_offsets[self.tag_block] + registers - starts[self.tag_block]).astype(np.intp)
+        self.blocks = blocks
+        self.block_failed = np.zeros(len(blocks), dtype=bool)  # Не удалось ли последнее чтение блока
+        self.set_focus(self.focus_rows)
+
+    def set_focus(self, rows):
+        """Отмечает блоки, в которых есть хотя бы одна из строк rows; None снимает фокус."""
+        if rows is None:
+            self.focus_rows = self.focus_blocks = None
+            return
+        self.focus_rows = np.fromiter(rows, dtype=np.int64)
+        focus = np.zeros(len(self.blocks), dtype=bool)
+        focus[self.tag_block[np.isin(self.tag_index, self.focus_rows)]] = True
+        self.focus_blocks = focus  # Замена ссылки: поток опроса видит либо старую маску, либо новую
+
+    def split_rejected(self, rejected):
+        """Делит блоки с номерами rejected, которые ПЛК отверг с ILLEGAL_DATA_ADDRESS.
+
+        Новая раскладка остается до конца опроса, поэтому отвергнутый блок не повторяется.
+        """
+        split, parts = split_blocks([self.blocks[number] for number in sorted(rejected)],
+                                    *self.tags.register_ranges(), self.max_count)
+        if not split:
+            return
+        print(f"{len(split)} blocks rejected (illegal data address): "
+              f"{', '.join(f'{block.start}..{block.end - 1}' for block in split)}; split into {len(parts)} blocks")
+        removed = {id(block) for block in split}
+        blocks = [block for block in self.blocks if id(block) not in removed] + parts
+        blocks.sort(key=lambda block: block.start)
+        self.layout(blocks)
+
+    @property
+    def requests_before(self):
+        """Число запросов за цикл в старой модели (поток на тег: read_float + read_holding_registers)."""
+        return len(self.tags) * 2
+
+    @property
+    def requests_after(self):
+        """Число запросов за цикл после склейки."""
+        return len(self.blocks)
+
+    def poll_once(self, client, endpoint=None, block_mask=None):
+        """Читает все блоки (или только отмеченные в block_mask) и раздает слова тегам.
+
+        Возвращает (values, failed), где values — CycleValues прочитанных тегов,
+        failed — индексы тегов, блоки которых не удалось прочитать.
+        endpoint — необязательные metrics.EndpointMetrics ПЛК: время и исход каждого запроса.
+        """
+        if block_mask is not None and len(block_mask) != len(self.blocks):
+            block_mask = None  # Маска осталась от раскладки до деления блоков
+        responses = []
+        rejected = set()
+        for block_number, block in enumerate(self.blocks):
+            if block_mask is not None and not block_mask[block_number]:
+                responses.append(None)
+                continue
+            started = time.perf_counter()
+            words = client.read_holding_registers(block.start, block.count)
+            if isinstance(words, list):
+                outcome = OK
+            else:
+                error = getattr(client, "last_error", None)
+                outcome = TIMEOUT if error == MB_TIMEOUT_ERR else EXCEPTION if error == MB_EXCEPT_ERR else ERROR
+                if outcome == EXCEPTION and getattr(client, "last_except", None) == EXP_DATA_ADDRESS:
+                    rejected.add(block_number)
+            if endpoint is not None:
+                endpoint.record(time.perf_counter() - started, outcome)
+            responses.append(words)
+        return self.decode_cycle(responses, block_mask, rejected)
+
+    def decode_cycle(self, responses, block_mask=None, rejected=()):
+        """Декодирует ответы всех блоков цикла одним проходом NumPy.
+
+        responses — прочитанные слова для каждого блока в порядке self.blocks;
+        все, что не является списком нужной длины, считается ошибкой чтения.
+        Блоки, не отмеченные в block_mask, в этом цикле не читались: их теги
+        не попадают ни в значения, ни в failed. Блоки из rejected (ПЛК ответил
+        ILLEGAL_DATA_ADDRESS) после цикла делятся на точные диапазоны тегов.
+        """
+        timestamp = time.monotonic()
+        buffer = np.zeros(self.buffer_size, dtype=np.uint16)
+        block_ok = np.ones(len(self.blocks), dtype=bool)
+        failed = []
+        for block_number, (block, words) in enumerate(zip(self.blocks, responses)):
+            if block_mask is not None and not block_mask[block_number]:
+                block_ok[block_number] = False
+                continue
+            self.requests_sent += 1
+            if not isinstance(words, list) or len(words) < block.count:
+                # В журнал — только смена состояния блока, сами неудачи считаются в failed_reads
+                self.failed_reads += 1
+                if not self.block_failed[block_number]:
+                    self.block_failed[block_number] = True
+                    print(f"Failed to read block {block.start}..{block.end - 1}: {words}")
+                block_ok[block_number] = False
+                failed.extend(self.tag_index[self.tag_block == block_number].tolist())
+                continue
+            if self.block_failed[block_number]:
+                self.block_failed[block_number] = False
+                print(f"Block {block.start}..{block.end - 1} read again")
+            buffer[block.buffer_offset:block.buffer_offset + block.count] = words[:block.count]
+
+        valid = block_ok[self.tag_block]
+        real, dword, word = decode_registers(buffer, self.tag_offsets[valid], self.tag_bits[valid],
+                                             self.tag_high_first[valid], self.tag_single[valid])
+        values = CycleValues(self.tag_index[valid], real, dword, word, timestamp)
+        if rejected:
+            self.split_rejected(rejected)
+        return values, failed
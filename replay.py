@@ -0,0 +1,145 @@
+import threading
+import time
+
+import numpy as np
+
+from historian import list_chunks, open_chunk, tag_word_layout, word_from_raw
+from poll_engine import CycleValues
+
+# Сколько строк архива читается с диска за раз: память не зависит от длины записи
+READ_BLOCK_ROWS = 64 * 1024
+# Скорость 0 — воспроизведение без пауз, так быстро, как успевает получатель
+AS_FAST_AS_POSSIBLE = 0
+
+
+class ReplaySource:
+    """Воспроизведение архива (historian) вместо опроса ПЛК.
+
+    Записанные циклы отдаются в on_results как CycleValues — так же, как их
+    отдает опрос, поэтому таблица и графики работают без изменений. Номера
+    строк — позиции адресов в self.addresses (объединение адресов всех фрагментов).
+    Время в CycleValues монотонное: подписи оси графика покажут время записи.
+    Фрагменты читаются через np.memmap блоками по READ_BLOCK_ROWS строк.
+    """
+
+    def __init__(self, directory, speed=1.0):
+        self.directory = directory
+        self.speed = speed
+        self.is_running = True
+        self.position = None  # Время (Unix) последнего отданного цикла
+        self._wake = threading.Event()  # Прерывает ожидание при seek, смене скорости и остановке
+        self._seek_to = None
+        self._lock = threading.Lock()
+
+        # (путь, первое время, последнее время, номера строк для номеров тегов фрагмента,
+        #  (старшее слово первым, номер бита) для номеров тегов фрагмента)
+        self.chunks = []
+        self.addresses = []
+        rows_by_address = {}
+        for path in list_chunks(directory):
+            meta, columns = open_chunk(path)
+            if not meta["count"]:
+                continue
+            tags = meta["tags"]
+            remap = np.full(max(tags, default=-1) + 1, -1, dtype=np.int64)
+            for tag, address in tags.items():
+                if address not in rows_by_address:
+                    rows_by_address[address] = len(self.addresses)
+                    self.addresses.append(address)
+                remap[tag] = rows_by_address[address]
+            timestamps = columns["timestamp"]
+            self.chunks.append((path, float(timestamps[0]), float(timestamps[-1]), remap, tag_word_layout(meta)))
+
+    @property
+    def start_time(self):
+        return self.chunks[0][1] if self.chunks else None
+
+    @property
+    def end_time(self):
+        return self.chunks[-1][2] if self.chunks else None
+
+    def seek(self, timestamp):
+        """Переходит к времени записи timestamp (Unix); безопасно вызывать из любого потока."""
+        with self._lock:
+            self._seek_to = timestamp
+        self._wake.set()
+
+    def set_speed(self, speed):
+        """Меняет скорость воспроизведения: 1, N или AS_FAST_AS_POSSIBLE."""
+        self.speed = speed
+        self._wake.set()
+
+    def stop(self):
+        self.is_running = False
+        self._wake.set()
+
+    def run(self, on_results):
+        """Блокирующее воспроизведение до конца записи или stop()."""
+        wall_offset = time.time() - time.monotonic()
+        cycles = self._cycles(self.start_time)
+        base = None  # (монотонное время, время записи), от которых отсчитываются паузы
+        speed = self.speed
+        pending = None  # Цикл, который ждет своего времени
+        while self.is_running:
+            self._wake.clear()
+            with self._lock:
+                seek_to, self._seek_to = self._seek_to, None
+            if seek_to is not None:
+                cycles = self._cycles(seek_to)
+                base = None
+                pending = None
+            if speed != self.speed:
+                speed = self.speed
+                base = None
+
+            if pending is None:
+                try:
+                    pending = next(cycles)
+                except StopIteration:
+                    return
+            timestamp, values = pending
+
+            if speed:
+                if base is None:
+                    base = (time.monotonic(), timestamp)
+                delay = base[0] + (timestamp - base[1]) / speed - time.monotonic()
+                if delay > 0:
+                    # Ожидание прерывается seek, сменой скорости и остановкой — тогда все проверяется заново
+                    self._wake.wait(delay)
+                    continue
+            pending = None
+            self.position = timestamp
+            on_results(values._replace(timestamp=timestamp - wall_offset))
+
+    def _cycles(self, start):
+        """Генератор (время записи, CycleValues) начиная с времени start."""
+        for path, first, last, remap, (high_first, bits) in self.chunks:
+            if start is not None and last < start:
+                continue
+            _, columns = open_chunk(path)
+            timestamps = columns["timestamp"]
+            position = 0 if start is None or first >= start else int(np.searchsorted(timestamps, start, "left"))
+            count = len(timestamps)
+            while position < count:
+                stop = min(count, position + READ_BLOCK_ROWS)
+                t = np.array(timestamps[position:stop])
+                if stop < count:
+                    # Не разрезаем цикл пополам: блок заканчивается на последней смене времени
+                    boundary = int(np.flatnonzero(np.diff(t))[-1]) + 1 if len(t) > 1 and t[0] != t[-1] else len(t)
+                    stop = position + boundary
+                    t = t[:boundary]
+                tags = np.array(columns["tag"][position:stop])
+                raw = np.array(columns["raw"][position:stop])
+                value = np.array(columns["value"][position:stop])
+                rows = np.where(tags < len(remap), remap[np.minimum(tags, len(remap) - 1)], -1)
+
+                edges = np.concatenate(([0], np.flatnonzero(np.diff(t)) + 1, [len(t)]))
+                for lo, hi in zip(edges[:-1], edges[1:]):
+                    known = rows[lo:hi] >= 0
+                    index = rows[lo:hi][known]
+                    tag = tags[lo:hi][known]
+                    dword = raw[lo:hi][known]
+                    # WORD восстанавливается из raw с порядком слов и битом тега — так же, как при опросе
+                    word = word_from_raw(dword, high_first[tag], bits[tag])
+                    yield float(t[lo]), CycleValues(index, value[lo:hi][known], dword, word, float(t[lo]))
+                position = stop
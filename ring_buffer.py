@@ -0,0 +1,47 @@
+import numpy as np
+
+# Емкость кольцевого буфера графика по умолчанию (точек на линию)
+DEFAULT_CAPACITY = 1000
+
+
+class RingSeries:
+    """Кольцевой буфер пар (монотонное время, значение) фиксированной емкости.
+
+    Каждая точка пишется дважды — в позицию i и i + capacity, поэтому
+    последние capacity точек всегда лежат в массиве непрерывно и отдаются
+    срезом без копирования. Добавление точки — O(1).
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = max(1, int(capacity))
+        self._t = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._y = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._head = 0  # Позиция следующей записи в [0, capacity)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, value):
+        i = self._head
+        self._t[i] = self._t[i + self.capacity] = timestamp
+        self._y[i] = self._y[i + self.capacity] = value
+        self._head = i + 1 if i + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+
+    def view(self):
+        """Непрерывные срезы (t, y) от самой старой точки к самой новой, без копирования."""
+        start = self._head if self._count == self.capacity else 0
+        return self._t[start:start + self._count], self._y[start:start + self._count]
+
+    def last(self):
+        """Последняя точка (t, y) или None, если буфер пуст."""
+        if not self._count:
+            return None
+        i = (self._head - 1) % self.capacity
+        return self._t[i], self._y[i]
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
@@ -0,0 +1,199 @@
+import time
+from collections import deque
+
+import numpy as np
+
+from poll_engine import PollEngine, DEFAULT_GAP_FILL, MAX_REGISTERS_PER_REQUEST
+from tag_compiler import as_tag_table
+
+# Имя группы для тегов без собственного периода (опрашиваются с общим interval)
+DEFAULT_GROUP = "default"
+# Сколько последних циклов группы учитывается в статистике частоты и джиттера
+STATS_WINDOW = 200
+
+
+class PollGroup:
+    """Теги с общим периодом опроса и собственным дедлайном.
+
+    Дедлайны идут по монотонным часам с шагом period от первого цикла, поэтому
+    время чтения не накапливается в периоде. Если цикл не уложился в период,
+    пропущенные дедлайны не догоняются, а считаются в overruns.
+
+    Если задан фокус (DeadlineScheduler.set_focus), с периодом period читаются
+    только блоки с тегами в фокусе, а все блоки — не чаще background_period.
+    """
+
+    def __init__(self, name, period, engine):
+        self.name = name
+        self.period = period  # Секунды
+        self.engine = engine
+        self.deadline = None
+        self.background_period = None  # Секунды; None — фокус выключен, все блоки читаются каждый цикл
+        self.background_deadline = None
+        self.cycles = 0
+        self.overruns = 0
+        self._last_start = None
+        self._intervals = deque(maxlen=STATS_WINDOW)  # Фактические интервалы между началами циклов
+        self._durations = deque(maxlen=STATS_WINDOW)  # Длительность циклов (задержка ответа ПЛК)
+
+    def start(self, now):
+        self.deadline = now
+        self.background_deadline = now
+        self._last_start = None
+
+    def cycle_blocks(self, now):
+        """Маска блоков для цикла, который начинается сейчас; None — читать все блоки."""
+        focus = self.engine.focus_blocks
+        if self.background_period is None or focus is None or len(focus) != len(self.engine.blocks) \
+                or now >= self.background_deadline:
+            if self.background_period is not None:
+                self.background_deadline = now + self.background_period
+            return None
+        return focus
+
+    def skip(self, now):
+        """Цикл без запросов (в фокусе нет блоков группы): дедлайн сдвигается без учета в статистике."""
+        self.deadline += (int((now - self.deadline) // self.period) + 1) * self.period
+
+    def begin(self, now):
+        """Отмечает начало цикла опроса."""
+        if self._last_start is not None:
+            self._intervals.append(now - self._last_start)
+        self._last_start = now
+
+    def complete(self, now):
+        """Сдвигает дедлайн на следующий период, пропуская те, что уже прошли."""
+        self.cycles += 1
+        if self._last_start is not None:
+            self._durations.append(now - self._last_start)
+        missed = int((now - self.deadline) // self.period)
+        self.overruns += missed
+        self.deadline += (missed + 1) * self.period
+
+    def latencies(self):
+        """Длительности последних циклов (не больше STATS_WINDOW), секунды."""
+        return np.array(self._durations, dtype=np.float64)
+
+    def stats(self):
+        """Достигнутая частота, джиттер периода, длительность циклов и число пропущенных циклов."""
+        intervals = np.array(self._intervals, dtype=np.float64)
+        durations = np.array(self._durations, dtype=np.float64)
+        rate = 1.0 / intervals.mean() if len(intervals) else 0.0
+        jitter = intervals.std() * 1000 if len(intervals) else 0.0
+        return {
+            "name": self.name,
+            "period": self.period * 1000,
+            "tags": len(self.engine.tags),
+            "requests": self.engine.requests_after,
+            "requests_sent": self.engine.requests_sent,
+            "failed_reads": self.engine.failed_reads,
+            "focus": None if self.background_period is None or self.engine.focus_blocks is None
+            else int(self.engine.focus_blocks.sum()),
+            "cycles": self.cycles,
+            "rate": rate,
+            "jitter": jitter,
+            "latency": durations.mean() * 1000 if len(durations) else 0.0,
+            "latency_max": durations.max() * 1000 if len(durations) else 0.0,
+            "overruns": self.overruns,
+        }
+
+
+class DeadlineScheduler:
+    """Набор групп опроса; следующей опрашивается группа с самым ранним дедлайном."""
+
+    def __init__(self, groups, invalid=(), clock=time.monotonic):
+        self.groups = groups
+        self.invalid = list(invalid)  # Строки с недопустимыми адресами: не опрашиваются
+        self.clock = clock
+
+    def start(self):
+        now = self.clock()
+        for group in self.groups:
+            group.start(now)
+
+    def next_group(self):
+        """Группа с ближайшим дедлайном и сколько секунд до него осталось (<= 0 — пора)."""
+        group = min(self.groups, key=lambda g: g.deadline)
+        return group, group.deadline - self.clock()
+
+    def begin(self, group):
+        """Начало цикла группы; возвращает маску блоков для чтения или None — читать все.
+
+        Пустая маска значит, что в фокусе нет блоков группы: цикл пропущен, дедлайн уже сдвинут.
+        """
+        now = self.clock()
+        block_mask = group.cycle_blocks(now)
+        if block_mask is not None and not block_mask.any():
+            group.skip(now)
+            return block_mask
+        group.begin(now)
+        return block_mask
+
+    def complete(self, group):
+        group.complete(self.clock())
+
+    def set_focus(self, rows, background_period=None):
+        """Строки rows (видимые, на графике) опрашиваются с периодом своей группы, остальные —
+        не чаще background_period секунд. rows=None или пустой background_period выключает фокус.
+
+        Вызывается из любого потока: группы подхватывают новый фокус со следующего цикла.
+        """
+        for group in self.groups:
+            if rows is None or not background_period:
+                group.background_period = None
+                group.engine.set_focus(None)
+            else:
+                group.background_period = max(group.period, background_period)
+                group.engine.set_focus(rows)
+
+    @property
+    def requests_before(self):
+        return sum(group.engine.requests_before for group in self.groups)
+
+    @property
+    def requests_after(self):
+        return sum(group.engine.requests_after for group in self.groups)
+
+    @property
+    def blocks(self):
+        return [block for group in self.groups for block in group.engine.blocks]
+
+    @property
+    def rows(self):
+        """Строки таблицы всех опрашиваемых тегов."""
+        return [row for group in self.groups for row in group.engine.tags.rows.tolist()]
+
+    def stats(self):
+        return [group.stats() for group in self.groups]
+
+
+def build_groups(tags, interval, periods=None, max_count=MAX_REGISTERS_PER_REQUEST,
+                 gap_fill=DEFAULT_GAP_FILL):
+    """Раскладывает теги по группам опроса.
+
+    tags — tag_compiler.TagTable (или пары (индекс строки, адрес)); periods —
+    словарь индекс строки -> (имя группы, период в мс). Теги без записи
+    попадают в группу DEFAULT_GROUP с периодом interval. Блоки регистров
+    склеиваются только внутри группы.
+    """
+    tags = as_tag_table(tags)
+    periods = periods or {}
+    grouped = {}
+    for position, index in enumerate(tags.rows.tolist()):
+        name, period = periods.get(index, (DEFAULT_GROUP, interval))
+        grouped.setdefault((name, period), []).append(position)
+    if not grouped:
+        grouped[(DEFAULT_GROUP, interval)] = []  # Опрос без тегов: планировщику нужна хотя бы одна группа
+
+    groups = [PollGroup(name, max(1, period) / 1000.0,
+                        PollEngine(tags.select(np.array(positions, dtype=np.intp)), max_count=max_count,
+                                   gap_fill=gap_fill))
+              for (name, period), positions in grouped.items()]
+    groups.sort(key=lambda group: group.period)
+    return groups
+
+
+def format_group_stats(stats):
+    """Строка статистики групп для журнала и строки состояния."""
+    return "; ".join(f"{s['name']} {s['period']:.0f} мс: {s['rate']:.1f} Гц, джиттер {s['jitter']:.1f} мс, "
+                     f"пропущено {s['overruns']}" for s in stats)
@@ -0,0 +1,230 @@
+"""Локальный сервер Modbus TCP вместо ПЛК для нагрузочных испытаний и отладки.
+
+Отдает карту регистров (по умолчанию раскладка 21 горелка × 31 слово, как в
+MainWindow.calculate_address), значения REAL в ней медленно меняются. Можно
+добавить задержку и разброс ответа, обрывы соединения и ответы-исключения.
+Поддерживаются функции 0x03 (чтение), 0x06 и 0x10 (запись регистров).
+
+Запуск:
+    python simulator.py --port 5020 --latency 5 --jitter 2 --drop-rate 0.001 --exception-rate 0.001
+    python simulator.py --port 5020 --range 10000:10000
+"""
+import argparse
+import asyncio
+import random
+import struct
+import threading
+import time
+
+import numpy as np
+
+from tag_import import burner_address, BURNERS, WORDS
+
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+# Коды исключений Modbus
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+SERVER_DEVICE_FAILURE = 0x04
+
+# Раскладка горелок (tag_import.burner_address): по 31 слову на каждую из 21 горелки
+BURNER_RANGES = [(burner_address(burner, WORDS[0]), len(WORDS) * 2) for burner in BURNERS]
+# Как часто обновляются значения REAL, с
+DEFAULT_UPDATE_PERIOD = 0.1
+MAX_REGISTERS = 0x10000
+
+
+class ModbusSimulator:
+    """Сервер Modbus TCP с настраиваемой картой регистров и внесением неисправностей.
+
+    ranges — пары (первый регистр, число регистров); чтение вне них дает исключение
+    ILLEGAL_DATA_ADDRESS. latency и jitter — задержка ответа и ее разброс, с;
+    drop_rate — вероятность закрыть соединение вместо ответа; exception_rate —
+    вероятность ответить SERVER_DEVICE_FAILURE. Запросы одного соединения
+    обрабатываются параллельно, ответы сопоставляются по transaction ID.
+    """
+
+    def __init__(self, host="127.0.0.1", port=5020, ranges=None, latency=0.0, jitter=0.0, drop_rate=0.0,
+                 exception_rate=0.0, update_period=DEFAULT_UPDATE_PERIOD, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.exception_rate = exception_rate
+        self.update_period = update_period
+        self._random = random.Random(seed)
+        ranges = BURNER_RANGES if ranges is None else ranges
+
+        self.registers = np.zeros(MAX_REGISTERS, dtype=np.uint16)
+        self.defined = np.zeros(MAX_REGISTERS, dtype=bool)
+        for start, count in ranges:
+            self.defined[start:start + count] = True
+        # Первые регистры пар REAL: каждый второй регистр от начала диапазонов
+        self._pairs = np.concatenate([np.arange(start, start + count - 1, 2) for start, count in ranges]
+                                     or [np.zeros(0, dtype=np.int64)])
+        rng = np.random.default_rng(seed)
+        self._phase = rng.uniform(0, 2 * np.pi, len(self._pairs))
+        self._period = rng.uniform(5, 60, len(self._pairs))
+        self.update_values(0.0)
+
+        self.requests = 0
+        self.connections = 0
+        self.dropped = 0
+        self.exceptions = 0
+        self._loop = None
+        self._stop_event = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._started = time.monotonic()
+
+    def update_values(self, elapsed):
+        """Записывает в пары регистров значения REAL (синусоиды с разными периодами)."""
+        values = (100.0 * np.sin(2 * np.pi * elapsed / self._period + self._phase)).astype("<f4")
+        words = values.view("<u2").reshape(-1, 2)  # Младшее слово первым, как в decoding.decode_registers
+        self.registers[self._pairs] = words[:, 0]
+        self.registers[self._pairs + 1] = words[:, 1]
+
+    def start(self):
+        """Запускает сервер на фоновом потоке и ждет, пока он начнет принимать соединения."""
+        self._thread = threading.Thread(target=self.run, name="ModbusSimulator", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def run(self):
+        """Блокирующая работа сервера в текущем потоке."""
+        asyncio.run(self._main())
+
+    def stop(self):
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def stats(self):
+        return {"requests": self.requests, "connections": self.connections, "dropped": self.dropped,
+                "exceptions": self.exceptions}
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self._ready.set()
+        updater = asyncio.create_task(self._update_loop()) if self.update_period else None
+        try:
+            await self._stop_event.wait()
+        finally:
+            if updater is not None:
+                updater.cancel()
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _update_loop(self):
+        while True:
+            await asyncio.sleep(self.update_period)
+            self.update_values(time.monotonic() - self._started)
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        tasks = set()
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                transaction_id, protocol_id, length, unit_id = struct.unpack(">HHHB", header)
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+                if self.drop_rate and self._random.random() < self.drop_rate:
+                    self.dropped += 1
+                    break
+                task = asyncio.create_task(self._respond(writer, transaction_id, unit_id, pdu))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass  # Клиент отключился или сервер останавливается
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _respond(self, writer, transaction_id, unit_id, pdu):
+        delay = self.latency + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.exception_rate and self._random.random() < self.exception_rate:
+            response = self._exception(pdu[0], SERVER_DEVICE_FAILURE)
+        else:
+            response = self.handle(pdu)
+        if not writer.is_closing():
+            writer.write(struct.pack(">HHHB", transaction_id, 0, len(response) + 1, unit_id) + response)
+
+    def handle(self, pdu):
+        """Ответ (PDU) на запрос PDU по текущей карте регистров."""
+        function_code = pdu[0]
+        if function_code == READ_HOLDING_REGISTERS and len(pdu) >= 5:
+            address, count = struct.unpack(">HH", pdu[1:5])
+            if not 1 <= count <= 125:
+                return self._exception(function_code, ILLEGAL_DATA_VALUE)
+            if address + count > MAX_REGISTERS or not self.defined[address:address + count].all():
+                return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+            words = self.registers[address:address + count].astype(">u2").tobytes()
+            return struct.pack(">BB", function_code, len(words)) + words
+        if function_code == WRITE_SINGLE_REGISTER and len(pdu) >= 5:
+            address, value = struct.unpack(">HH", pdu[1:5])
+            if not self.defined[address]:
+                return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+            self.registers[address] = value
+            return pdu[:5]
+        if function_code == WRITE_MULTIPLE_REGISTERS and len(pdu) >= 6:
+            address, count, byte_count = struct.unpack(">HHB", pdu[1:6])
+            if not 1 <= count <= 123 or byte_count != 2 * count or len(pdu) < 6 + byte_count:
+                return self._exception(function_code, ILLEGAL_DATA_VALUE)
+            if address + count > MAX_REGISTERS or not self.defined[address:address + count].all():
+                return self._exception(function_code, ILLEGAL_DATA_ADDRESS)
+            self.registers[address:address + count] = np.frombuffer(pdu[6:6 + byte_count], dtype=">u2")
+            return pdu[:5]
+        return self._exception(function_code, ILLEGAL_FUNCTION)
+
+    def _exception(self, function_code, exception_code):
+        self.exceptions += 1
+        return struct.pack(">BB", function_code | 0x80, exception_code)
+
+
+def parse_range(text):
+    """Диапазон регистров 'первый:число'."""
+    start, count = text.split(":")
+    return int(start), int(count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный сервер Modbus TCP (симулятор ПЛК)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--range", action="append", type=parse_range, dest="ranges",
+                        help="диапазон регистров 'первый:число' (можно несколько); "
+                             "по умолчанию раскладка 21 горелка × 31 слово")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, мс")
+    parser.add_argument("--jitter", type=float, default=0.0, help="разброс задержки, ± мс")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="доля запросов, на которых рвется соединение")
+    parser.add_argument("--exception-rate", type=float, default=0.0, help="доля ответов-исключений")
+    parser.add_argument("--update-period", type=float, default=DEFAULT_UPDATE_PERIOD,
+                        help="период изменения значений, с (0 — значения не меняются)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    simulator = ModbusSimulator(args.host, args.port, args.ranges, args.latency / 1000.0, args.jitter / 1000.0,
+                                args.drop_rate, args.exception_rate, args.update_period, args.seed)
+    registers = int(simulator.defined.sum())
+    print(f"Modbus simulator on {args.host}:{args.port}: {registers} registers, latency {args.latency} ms "
+          f"± {args.jitter} ms, drop {args.drop_rate}, exceptions {args.exception_rate}", flush=True)
+    try:
+        simulator.run()
+    except KeyboardInterrupt:
+        pass
+    print(f"Stopped: {simulator.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Компилятор адресов тегов: текст адреса разбирается один раз в упакованную таблицу описателей.
+
+Описатель тега — запись NumPy TAG_DESCRIPTOR: строка таблицы, регистр, бит,
+тип данных, порядок слов, unit id и число регистров. Планирование блоков,
+опрос, декодирование и фильтр изменений работают с этими массивами целых
+чисел, а не с текстом адресов. Теги-биты одного регистра занимают один
+диапазон (register_ranges), поэтому регистр читается один раз на все его биты.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from decoding import NO_BIT
+
+# Типы данных тега; тип BIT получают адреса 'регистр.бит', остальные задаются ключом type строки
+TAG_TYPES = ("REAL", "DWORD", "WORD", "BIT")
+REAL, DWORD, WORD, BIT = range(len(TAG_TYPES))
+# Сколько регистров занимает тег каждого типа
+REGISTER_COUNTS = np.array([2, 2, 1, 1], dtype=np.uint8)
+# Порядок слов 32-битных значений (ключ word_order строки): в ПЛК младшее слово первым
+WORD_ORDERS = ("lo_hi", "hi_lo")
+LOW_FIRST, HIGH_FIRST = range(len(WORD_ORDERS))
+
+TAG_DESCRIPTOR = np.dtype([
+    ("row", "<i4"),
+    ("register", "<u2"),
+    ("bit", "i1"),
+    ("type", "u1"),
+    ("word_order", "u1"),
+    ("unit_id", "u1"),
+    ("count", "u1"),
+])
+
+
+@lru_cache(maxsize=65536)
+def parse_address(address):
+    """Разбирает адрес вида '6454' или '6564.1' в пару (регистр, бит)."""
+    match = re.match(r"^(\d+)(?:\.(\d+))?$", str(address).strip())
+    if not match:
+        return None
+    register = int(match.group(1))
+    bit_position = int(match.group(2)) if match.group(2) is not None else None
+    if register > 0xFFFF or (bit_position is not None and not 0 <= bit_position <= 15):
+        return None
+    return register, bit_position
+
+
+def format_address(register, bit_position=None):
+    """Обратное к parse_address: '6454' или '6564.1'."""
+    return str(register) if bit_position is None else f"{register}.{bit_position}"
+
+
+def compile_tag(address, settings=None, unit_id=1):
+    """Описатель одного тега без номера строки: (register, bit, type, word_order, unit_id, count) или None."""
+    parsed = parse_address(address)
+    if parsed is None:
+        return None
+    register, bit_position = parsed
+    settings = settings or {}
+    if bit_position is not None:
+        tag_type = BIT
+    else:
+        type_name = str(settings.get("type") or "REAL").upper()
+        if type_name not in TAG_TYPES or type_name == "BIT":
+            return None
+        tag_type = TAG_TYPES.index(type_name)
+    order_name = settings.get("word_order") or WORD_ORDERS[LOW_FIRST]
+    if order_name not in WORD_ORDERS:
+        return None
+    count = int(REGISTER_COUNTS[tag_type])
+    if register + count > 0x10000:
+        return None
+    return (register, NO_BIT if bit_position is None else bit_position, tag_type, WORD_ORDERS.index(order_name),
+            unit_id, count)
+
+
+class TagTable:
+    """Скомпилированные теги: массив описателей TAG_DESCRIPTOR и строки с недопустимыми адресами."""
+
+    __slots__ = ("descriptors", "invalid")
+
+    def __init__(self, descriptors, invalid=()):
+        self.descriptors = descriptors
+        self.invalid = list(invalid)
+
+    def __len__(self):
+        return len(self.descriptors)
+
+    @property
+    def rows(self):
+        return self.descriptors["row"]
+
+    def select(self, positions):
+        """Таблица из части тегов (positions — номера описателей); недопустимые строки не переносятся."""
+        return TagTable(self.descriptors[positions])
+
+    def register_ranges(self):
+        """Диапазоны регистров без повторов: (начала, длины) по возрастанию регистра.
+
+        Теги, начинающиеся с одного регистра (например, биты одного слова),
+        дают один диапазон длиной в самый длинный из них.
+        """
+        registers = self.descriptors["register"].astype(np.int64)
+        counts = self.descriptors["count"].astype(np.int64)
+        if not len(registers):
+            return registers, counts
+        order = np.argsort(registers, kind="stable")
+        registers, counts = registers[order], counts[order]
+        first = np.flatnonzero(np.r_[True, registers[1:] != registers[:-1]])
+        return registers[first], np.maximum.reduceat(counts, first)
+
+
+def compile_tags(addresses, tag_settings=None, unit_id=1):
+    """Компилирует пары (индекс строки, адрес) в TagTable.
+
+    tag_settings — настройки строк таблицы (ключи type и word_order), индексируются номером строки.
+    """
+    compiled = []
+    invalid = []
+    for index, address in addresses:
+        settings = tag_settings[index] if tag_settings is not None and index < len(tag_settings) else None
+        descriptor = compile_tag(address, settings, unit_id)
+        if descriptor is None:
+            invalid.append(index)
+        else:
+            compiled.append((index,) + descriptor)
+    return TagTable(np.array(compiled, dtype=TAG_DESCRIPTOR), invalid)
+
+
+def as_tag_table(tags):
+    """TagTable как есть, а пары (индекс строки, адрес) — после компиляции с настройками по умолчанию."""
+    return tags if isinstance(tags, TagTable) else compile_tags(tags)
@@ -0,0 +1,134 @@
+"""Массовое добавление тегов: генерация по раскладке горелок и импорт из CSV или таблицы символов.
+
+Функции только готовят строки (адрес, комментарий, настройки); в модель
+таблицы они добавляются одним вызовом TagTableModel.append_rows. Дубликаты
+ищутся по множеству нормализованных адресов, а не просмотром таблицы.
+"""
+import csv
+
+from tag_compiler import parse_address, format_address
+
+# Раскладка горелок: адрес = 1344 + (слово - 1) * 2 + 64 * горелка
+BURNER_BASE = 1344
+BURNER_STRIDE = 64
+BURNERS = range(0, 21)
+WORDS = range(1, 32)
+
+# Названия столбцов CSV (в нижнем регистре): адрес, комментарий и имя символа
+ADDRESS_COLUMNS = ("address", "адрес", "register", "регистр")
+COMMENT_COLUMNS = ("comment", "комментарий", "description", "описание")
+NAME_COLUMNS = ("name", "symbol", "имя", "символ")
+
+
+def burner_address(burner, word):
+    """Адрес слова word (1..31) горелки burner (0..20); ValueError вне раскладки."""
+    if burner not in BURNERS or word not in WORDS:
+        raise ValueError(f"горелка {burner}, слово {word} вне раскладки "
+                         f"(горелки {BURNERS[0]}-{BURNERS[-1]}, слова {WORDS[0]}-{WORDS[-1]})")
+    return BURNER_BASE + (word - 1) * 2 + BURNER_STRIDE * burner
+
+
+def burner_word(register):
+    """Обратное к burner_address: (горелка, слово) или None, если адрес вне раскладки."""
+    if register < BURNER_BASE:
+        return None
+    burner, offset = divmod(register - BURNER_BASE, BURNER_STRIDE)
+    word = offset // 2 + 1
+    if burner not in BURNERS or word not in WORDS:
+        return None
+    return burner, word
+
+
+def parse_ranges(text, allowed):
+    """Разбирает '0-20' или '1,3,5-7' в отсортированный список чисел из allowed; ValueError при ошибке."""
+    values = set()
+    for part in str(text).replace(" ", "").split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if last else first
+        except ValueError:
+            raise ValueError(f"не удалось разобрать '{part}'") from None
+        if first > last or first not in allowed or last not in allowed:
+            raise ValueError(f"'{part}' вне диапазона {allowed[0]}-{allowed[-1]}")
+        values.update(range(first, last + 1))
+    if not values:
+        raise ValueError("пустой диапазон")
+    return sorted(values)
+
+
+def generate_burner_tags(burners, words):
+    """Строки (адрес, комментарий, настройки) для всех сочетаний горелок и слов, по горелкам."""
+    return [(str(burner_address(burner, word)), f"Горелка {burner}, слово {word}", {})
+            for burner in burners for word in words]
+
+
+def normalize_address(address):
+    """Адрес в каноническом виде ('01344' -> '1344') или None, если он недопустим."""
+    parsed = parse_address(address)
+    return format_address(*parsed) if parsed is not None else None
+
+
+def _first(record, columns):
+    for column in columns:
+        if record.get(column):
+            return record[column]
+    return ""
+
+
+def load_tag_csv(path, setting_keys=()):
+    """Читает теги из CSV: адрес (или столбцы burner и word), комментарий или имя символа, настройки.
+
+    setting_keys — столбцы, которые переносятся в настройки тега (TAG_SETTING_KEYS).
+    Возвращает (строки, ошибки): строки — (адрес, комментарий, настройки), ошибки — тексты.
+    """
+    rows = []
+    errors = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        for line, record in enumerate(csv.DictReader(f, dialect=dialect), start=2):
+            record = {(key or "").strip().lower(): (value or "").strip() for key, value in record.items()
+                      if isinstance(value, str) or value is None}
+            address = _first(record, ADDRESS_COLUMNS)
+            try:
+                if not address and record.get("burner") and record.get("word"):
+                    address = str(burner_address(int(record["burner"]), int(record["word"])))
+            except ValueError as e:
+                errors.append(f"строка {line}: {e}")
+                continue
+            if not address:
+                continue
+            name, comment = _first(record, NAME_COLUMNS), _first(record, COMMENT_COLUMNS)
+            comment = f"{name}: {comment}" if name and comment else name or comment
+            settings = {key: record[key] for key in setting_keys if record.get(key)}
+            for key in ("period", "deadband", "deadband_pct"):
+                if key in settings:
+                    try:
+                        settings[key] = float(settings[key])
+                    except ValueError:
+                        errors.append(f"строка {line}: {key} '{settings.pop(key)}' не число")
+            rows.append((address, comment, settings))
+    return rows, errors
+
+
+def merge_tags(existing_addresses, rows):
+    """Отбирает новые строки: недопустимые адреса и дубликаты (в таблице и внутри rows) пропускаются.
+
+    Возвращает (новые строки с нормализованными адресами, дубликаты, недопустимые адреса).
+    """
+    index = {normalize_address(address) or address for address in existing_addresses}
+    added, duplicates, invalid = [], [], []
+    for address, comment, settings in rows:
+        normalized = normalize_address(address)
+        if normalized is None:
+            invalid.append(address)
+        elif normalized in index:
+            duplicates.append(address)
+        else:
+            index.add(normalized)
+            added.append((normalized, comment, settings))
+    return added, duplicates, invalid
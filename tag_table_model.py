@@ -0,0 +1,248 @@
+from collections import Counter
+
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
+
+from tag_compiler import parse_address
+from utils import dword_to_bit_string
+
+COLUMN_NAMES = ["Address", "REAL", "DWORD", "WORD", "BOOL", "Комментарий"]
+ADDRESS_COLUMN, REAL_COLUMN, DWORD_COLUMN, WORD_COLUMN, BOOL_COLUMN, COMMENT_COLUMN = range(len(COLUMN_NAMES))
+# Столбцы с числовыми значениями, которые можно выводить на график
+VALUE_COLUMNS = {"REAL": REAL_COLUMN, "DWORD": DWORD_COLUMN, "WORD": WORD_COLUMN}
+NO_VALUE_TEXT = "Ошибка"  # Текст BOOL, пока значение тега не прочитано
+# Необязательные настройки тега в table_data конфигурации (хранятся в модели, в таблице не показываются):
+# устройство (имя из devices), тип данных и порядок слов (tag_compiler), группа и период опроса, мс;
+# абсолютная и относительная (%) зона нечувствительности
+TAG_SETTING_KEYS = ("device", "type", "word_order", "group", "period", "deadband", "deadband_pct")
+
+
+class TagTableModel(QAbstractTableModel):
+    """Модель основной таблицы тегов.
+
+    Значения хранятся столбцами в массивах NumPy, строки для отображения
+    формируются только когда их запрашивает представление. У каждой строки
+    есть постоянный номер тега (tag_ids): он не меняется при удалении других
+    строк, поэтому графики и конфигурация ссылаются на теги по нему. Если включен
+    writable, редактируется ячейка типа тега (write_type): введенный текст не
+    меняет модель, а уходит сигналом write_requested на запись в ПЛК.
+    """
+
+    write_requested = Signal(int, str, str)  # Строка, столбец (REAL/DWORD/WORD) и введенный текст
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.addresses = []
+        self.comments = []
+        self.tag_settings = []  # Для каждой строки словарь заданных TAG_SETTING_KEYS
+        self.address_counts = Counter()  # Хеш-индекс адресов для проверки дубликатов без просмотра таблицы
+        self.tag_ids = []  # Постоянный номер тега каждой строки
+        self.rows_by_id = {}  # Номер тега -> строка
+        self.next_tag_id = 0
+        self.real = np.zeros(0, dtype=np.float64)
+        self.dword = np.zeros(0, dtype=np.uint32)
+        self.word = np.zeros(0, dtype=np.int64)
+        self.valid = np.zeros(0, dtype=bool)  # Было ли значение прочитано с момента сброса
+        self.writable = False  # Можно ли вводить значения (есть связь с ПЛК)
+
+    # --- Интерфейс QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.addresses)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMN_NAMES)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return COLUMN_NAMES[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() in (ADDRESS_COLUMN, COMMENT_COLUMN):
+            flags |= Qt.ItemIsEditable
+        elif self.writable and index.column() == VALUE_COLUMNS.get(self.write_type(index.row())):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        row, column = index.row(), index.column()
+        if column == ADDRESS_COLUMN:
+            return self.addresses[row]
+        if column == COMMENT_COLUMN:
+            return self.comments[row]
+        if column == REAL_COLUMN:
+            return str(float(self.real[row]))
+        if column == DWORD_COLUMN:
+            return str(int(self.dword[row]))
+        if column == WORD_COLUMN:
+            return str(int(self.word[row]))
+        if column == BOOL_COLUMN:
+            if not self.valid[row]:
+                return NO_VALUE_TEXT
+            dword = int(self.dword[row])
+            return dword_to_bit_string([dword & 0xFFFF, dword >> 16])
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        if index.column() == ADDRESS_COLUMN:
+            self.address_counts[self.addresses[index.row()]] -= 1
+            self.addresses[index.row()] = str(value).strip()
+            self.address_counts[self.addresses[index.row()]] += 1
+        elif index.column() == COMMENT_COLUMN:
+            self.comments[index.row()] = str(value)
+        elif self.writable and index.column() == VALUE_COLUMNS.get(self.write_type(index.row())):
+            # Значение в таблице обновит опрос после записи
+            self.write_requested.emit(index.row(), COLUMN_NAMES[index.column()], str(value))
+            return False
+        else:
+            return False
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    # --- Работа со строками ---
+
+    def set_rows(self, rows, tag_settings=None, tag_ids=None):
+        """Полностью заменяет содержимое таблицы списком пар (адрес, комментарий).
+
+        tag_settings — необязательный список словарей настроек (TAG_SETTING_KEYS) для тех же строк.
+        tag_ids — номера тегов строк (например, из конфигурации); если их нет или они
+        повторяются, строки получают новые номера.
+        """
+        self.beginResetModel()
+        if tag_ids is not None and len(tag_ids) == len(rows) and len(set(tag_ids)) == len(tag_ids):
+            self.tag_ids = [int(tag_id) for tag_id in tag_ids]
+            self.next_tag_id = max(self.tag_ids, default=-1) + 1
+        else:
+            self.tag_ids = self.new_tag_ids(len(rows))
+        self.rows_by_id = {tag_id: row for row, tag_id in enumerate(self.tag_ids)}
+        self.addresses = [str(address) for address, _ in rows]
+        self.comments = [str(comment) for _, comment in rows]
+        self.tag_settings = [dict(settings) for settings in tag_settings] if tag_settings is not None \
+            else [{} for _ in rows]
+        self.address_counts = Counter(self.addresses)
+        count = len(self.addresses)
+        self.real = np.zeros(count, dtype=np.float64)
+        self.dword = np.zeros(count, dtype=np.uint32)
+        self.word = np.zeros(count, dtype=np.int64)
+        self.valid = np.zeros(count, dtype=bool)
+        self.endResetModel()
+
+    def append_row(self, address, comment=""):
+        """Добавляет строку в конец таблицы и возвращает ее номер."""
+        return self.append_rows([(address, comment)])
+
+    def append_rows(self, rows, tag_settings=None):
+        """Добавляет строки (адрес, комментарий) одной вставкой и возвращает номер первой из них."""
+        first = len(self.addresses)
+        if not rows:
+            return first
+        count = len(rows)
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        addresses = [str(address) for address, _ in rows]
+        self.addresses.extend(addresses)
+        self.comments.extend(str(comment) for _, comment in rows)
+        self.tag_settings.extend(dict(settings) for settings in (tag_settings or [{}] * count))
+        self.address_counts.update(addresses)
+        for row, tag_id in enumerate(self.new_tag_ids(count), start=first):
+            self.tag_ids.append(tag_id)
+            self.rows_by_id[tag_id] = row
+        self.real = np.concatenate([self.real, np.zeros(count, dtype=np.float64)])
+        self.dword = np.concatenate([self.dword, np.zeros(count, dtype=np.uint32)])
+        self.word = np.concatenate([self.word, np.zeros(count, dtype=np.int64)])
+        self.valid = np.concatenate([self.valid, np.zeros(count, dtype=bool)])
+        self.endInsertRows()
+        return first
+
+    def remove_row(self, row):
+        if not 0 <= row < len(self.addresses):
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.address_counts[self.addresses[row]] -= 1
+        del self.addresses[row]
+        del self.comments[row]
+        del self.tag_settings[row]
+        del self.rows_by_id[self.tag_ids.pop(row)]
+        for following in range(row, len(self.tag_ids)):
+            self.rows_by_id[self.tag_ids[following]] = following
+        self.real = np.delete(self.real, row)
+        self.dword = np.delete(self.dword, row)
+        self.word = np.delete(self.word, row)
+        self.valid = np.delete(self.valid, row)
+        self.endRemoveRows()
+
+    # --- Значения ---
+
+    def update_values(self, rows, real, dword, word):
+        """Записывает пачку значений и сообщает представлению одним dataChanged."""
+        rows = np.asarray(rows, dtype=np.intp)
+        if rows.size == 0:
+            return
+        in_range = rows < len(self.addresses)  # Строка могла быть удалена, пока шел опрос
+        if not in_range.all():
+            rows, real, dword, word = rows[in_range], real[in_range], dword[in_range], word[in_range]
+            if rows.size == 0:
+                return
+        self.real[rows] = real
+        self.dword[rows] = dword
+        self.word[rows] = word
+        self.valid[rows] = True
+        self.dataChanged.emit(self.index(int(rows.min()), REAL_COLUMN),
+                              self.index(int(rows.max()), BOOL_COLUMN), [Qt.DisplayRole])
+
+    def reset_values(self):
+        """Обнуляет значения всех тегов."""
+        if not self.addresses:
+            return
+        self.real[:] = 0.0
+        self.dword[:] = 0
+        self.word[:] = 0
+        self.valid[:] = False
+        self.dataChanged.emit(self.index(0, REAL_COLUMN),
+                              self.index(len(self.addresses) - 1, BOOL_COLUMN), [Qt.DisplayRole])
+
+    def value(self, row, column_name):
+        """Числовое значение тега для столбца REAL/DWORD/WORD."""
+        column = VALUE_COLUMNS.get(column_name)
+        if column is None or not 0 <= row < len(self.addresses):
+            return 0.0
+        if column == REAL_COLUMN:
+            return float(self.real[row])
+        if column == DWORD_COLUMN:
+            return int(self.dword[row])
+        return int(self.word[row])
+
+    def write_type(self, row):
+        """Столбец REAL/DWORD/WORD, через который пишется тег строки: его type, для битов — WORD."""
+        parsed = parse_address(self.addresses[row])
+        if parsed is not None and parsed[1] is not None:
+            return "WORD"
+        return str(self.tag_settings[row].get("type") or "REAL").upper()
+
+    def new_tag_ids(self, count):
+        first = self.next_tag_id
+        self.next_tag_id += count
+        return list(range(first, first + count))
+
+    def tag_id(self, row):
+        return self.tag_ids[row] if 0 <= row < len(self.tag_ids) else None
+
+    def row_of(self, tag_id):
+        """Строка тега с номером tag_id или None, если тег удален."""
+        return self.rows_by_id.get(tag_id)
+
+    def has_address(self, address):
+        return self.address_counts[str(address)] > 0
+
+    def address(self, row):
+        return self.addresses[row] if 0 <= row < len(self.addresses) else ""
+
+    def comment(self, row):
+        return self.comments[row] if 0 <= row < len(self.comments) else ""
@@ -0,0 +1,24 @@
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator import ModbusSimulator  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def simulator():
+    """Симулятор ПЛК с раскладкой горелок по умолчанию (BURNER_RANGES); значения не меняются."""
+    server = ModbusSimulator(port=free_port(), update_period=0, seed=1)
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,27 @@
+from acquisition import build_pollers, poll_periods
+from devices import load_devices, DEFAULT_DEVICE
+
+DEFAULTS = {"ip": "127.0.0.1", "port": 502, "unit_id": 1, "interval": 100, "backend": "threads", "block_gap": 0,
+            "max_in_flight": 1}
+
+
+def test_poll_periods_tag_period_wins_over_group():
+    settings = [{"group": "slow"}, {"group": "slow", "period": 250}, {"group": "fast"}, {"period": 50}, {}]
+    assert poll_periods(settings, {"slow": 1000}, 200) == {
+        0: ("slow", 1000), 1: ("slow", 250), 2: ("fast", 200), 3: ("period", 50)}
+
+
+def test_group_without_period_uses_device_interval():
+    devices = load_devices([{"name": "slow_plc", "interval": 500}], DEFAULTS)
+    settings = [{"group": "g"}, {"group": "g", "device": "slow_plc"}, {"group": "h", "device": "slow_plc"}]
+    created = {}
+
+    def factory(name, device, tags, periods, **kwargs):
+        created[name] = periods
+        return name
+
+    build_pollers([(0, "1344"), (1, "1346"), (2, "1348")], settings, devices, {"h": 2000}, 100,
+                  change_filter=False, factory=factory)
+    assert created[DEFAULT_DEVICE][0] == ("g", 100)
+    assert created["slow_plc"][1] == ("g", 500)
+    assert created["slow_plc"][2] == ("h", 2000)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from change_filter import ChangeFilter
+from poll_engine import CycleValues
+
+
+def cycle(timestamp, real=(), dword=(), word=(), rows=None):
+    rows = np.arange(len(real)) if rows is None else np.asarray(rows)
+    return CycleValues(rows, np.array(real, dtype=np.float64), np.array(dword, dtype=np.uint32),
+                       np.array(word, dtype=np.int64), timestamp)
+
+
+def sent(change_filter, values):
+    return change_filter.filter(values).index.tolist()
+
+
+def test_first_cycle_passes_everything():
+    change_filter = ChangeFilter([(0, "1344"), (1, "1346")])
+    assert sent(change_filter, cycle(0.0, [1.0, 2.0], [1, 2], [1, 2])) == [0, 1]
+
+
+def test_absolute_deadband():
+    change_filter = ChangeFilter([(0, "1344")], {0: (0.5, None)})
+    assert sent(change_filter, cycle(0.0, [10.0], [1], [1])) == [0]
+    assert sent(change_filter, cycle(1.0, [10.4], [2], [2])) == []
+    assert sent(change_filter, cycle(2.0, [10.6], [3], [3])) == [0]
+    # Сравнение идет с последним переданным значением, а не с прошлым циклом
+    assert sent(change_filter, cycle(3.0, [10.9], [4], [4])) == []
+    assert sent(change_filter, cycle(4.0, [11.2], [5], [5])) == [0]
+
+
+def test_percent_deadband():
+    change_filter = ChangeFilter([(0, "1344")], {0: (None, 5.0)})
+    assert sent(change_filter, cycle(0.0, [200.0], [1], [1])) == [0]
+    assert sent(change_filter, cycle(1.0, [209.0], [2], [2])) == []
+    assert sent(change_filter, cycle(2.0, [211.0], [3], [3])) == [0]
+
+
+def test_nan_transition_is_a_change():
+    change_filter = ChangeFilter([(0, "1344")], {0: (100.0, None)})
+    sent(change_filter, cycle(0.0, [1.0], [1], [1]))
+    assert sent(change_filter, cycle(1.0, [np.nan], [0x7FC00000], [0])) == [0]
+    assert sent(change_filter, cycle(2.0, [1.0], [1], [1])) == [0]
+
+
+def test_exact_comparison_of_raw_registers():
+    change_filter = ChangeFilter([(0, "1344")])
+    sent(change_filter, cycle(0.0, [1.0], [0x3F800000], [0]))
+    assert sent(change_filter, cycle(1.0, [1.0], [0x3F800000], [0])) == []
+    # Младший бит float32 меняет DWORD, хотя округленный REAL тот же
+    assert sent(change_filter, cycle(2.0, [1.0], [0x3F800001], [1])) == [0]
+
+
+def test_bit_tags_compare_bit_value():
+    change_filter = ChangeFilter([(0, "1344.3")])
+    sent(change_filter, cycle(0.0, [0.0], [0b1000], [1]))
+    # Другие биты регистра изменились, сам бит — нет
+    assert sent(change_filter, cycle(1.0, [0.0], [0b1001], [1])) == []
+    assert sent(change_filter, cycle(2.0, [0.0], [0b0001], [0])) == [0]
+
+
+def test_forced_refresh():
+    change_filter = ChangeFilter([(0, "1344"), (1, "1346")], forced_refresh=10.0)
+    sent(change_filter, cycle(0.0, [1.0, 2.0], [1, 2], [1, 2]))
+    assert sent(change_filter, cycle(9.0, [1.0, 2.0], [1, 2], [1, 2])) == []
+    assert sent(change_filter, cycle(9.5, [1.0, 3.0], [1, 3], [1, 3])) == [1]
+    assert sent(change_filter, cycle(10.0, [1.0, 3.0], [1, 3], [1, 3])) == [0]
+    assert change_filter.stats() == {"delivered": 4, "suppressed": 4}
@@ -0,0 +1,120 @@
+from block_acquisition import BlockPollBackend
+from circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, BREAKER_CHECK_INTERVAL, CLOSED, OPEN, HALF_OPEN
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def breaker(clock, **settings):
+    settings = {"failure_threshold": 3, "base_delay": 1.0, "max_delay": 8.0, "jitter": 0.0, **settings}
+    return CircuitBreaker(clock=clock, **settings)
+
+
+def test_opens_after_threshold():
+    clock = Clock()
+    b = breaker(clock)
+    assert b.record_failure() == CLOSED
+    assert b.record_failure() == CLOSED
+    assert b.state == CLOSED and b.allow()
+    assert b.record_failure() == CLOSED
+    assert b.state == OPEN and b.trips == 1
+    assert not b.allow()
+    assert b.time_until_probe() == 1.0
+
+
+def test_success_resets_failure_count():
+    clock = Clock()
+    b = breaker(clock)
+    b.record_failure()
+    b.record_failure()
+    b.record_success()
+    b.record_failure()
+    b.record_failure()
+    assert b.state == CLOSED
+
+
+def test_single_probe_after_delay():
+    clock = Clock()
+    b = breaker(clock, failure_threshold=1)
+    b.record_failure()
+    clock.now = 0.999
+    assert not b.allow()
+    clock.now = 1.0
+    assert b.allow()
+    assert b.state == HALF_OPEN
+    # Пока проба не завершилась, остальные опросчики ждут
+    assert not b.allow()
+    assert b.time_until_probe() == 0.0
+    assert b.record_success() == HALF_OPEN
+    assert b.state == CLOSED and b.allow()
+
+
+def test_backoff_doubles_up_to_max_delay():
+    clock = Clock()
+    b = breaker(clock, failure_threshold=1)
+    b.record_failure()
+    delays = []
+    for _ in range(6):
+        delays.append(b.time_until_probe())
+        clock.now = b.next_probe
+        assert b.allow()
+        assert b.record_failure() == HALF_OPEN
+        assert b.state == OPEN
+    assert delays == [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]
+    assert b.trips == 1  # Неудачные пробы не считаются новыми размыканиями
+    clock.now = b.next_probe
+    b.allow()
+    b.record_success()
+    b.record_failure()
+    assert b.time_until_probe() == 1.0  # После восстановления пауза снова базовая
+
+
+def test_jitter_spreads_delay():
+    clock = Clock()
+    delays = set()
+    for _ in range(20):
+        b = breaker(clock, failure_threshold=1, jitter=0.2)
+        b.record_failure()
+        delays.add(b.time_until_probe())
+        assert 0.8 <= b.time_until_probe() <= 1.2
+    assert len(delays) > 1
+
+
+def test_registry_shares_breaker_per_plc():
+    registry = CircuitBreakerRegistry()
+    first = registry.get("10.0.0.1", "502", 1)
+    assert registry.get("10.0.0.1", 502) is first
+    assert registry.get("10.0.0.1", 502, 2) is not first
+    registry.configure(failure_threshold=7)
+    configured = registry.get("10.0.0.1", 502)
+    assert configured is not first and configured.failure_threshold == 7
+
+
+class RecordingEvent:
+    """Заменяет _wake опросчика: запоминает паузы и останавливает его после нескольких ожиданий."""
+
+    def __init__(self, backend, count):
+        self.backend = backend
+        self.count = count
+        self.timeouts = []
+
+    def wait(self, timeout):
+        self.timeouts.append(timeout)
+        if len(self.timeouts) >= self.count:
+            self.backend.is_running = False
+
+    def set(self):
+        pass
+
+
+def test_poll_waits_while_other_poller_probes():
+    backend = BlockPollBackend([(0, "1344")], "127.0.0.1", 15020)  # Соединение не открывается
+    backend.breaker.state = HALF_OPEN  # Пробу уже шлет другой поток опроса этого ПЛК
+    backend._wake = RecordingEvent(backend, 5)
+    backend.run()
+    assert backend._wake.timeouts == [BREAKER_CHECK_INTERVAL] * 5
@@ -0,0 +1,50 @@
+import numpy as np
+
+from decimation import HistorySeries, minmax_decimate, POINTS_PER_PIXEL
+
+
+def filled(capacity, count, spikes=()):
+    series = HistorySeries(capacity)
+    y = np.sin(np.arange(count) / 50.0)
+    for position, value in spikes:
+        y[position] = value
+    for i, value in enumerate(y.tolist()):
+        series.append(float(i), value)
+    return series
+
+
+def test_minmax_decimate_keeps_peaks_and_order():
+    t = np.arange(10000, dtype=np.float64)
+    y = np.zeros(10000)
+    y[1234], y[8765] = 50.0, -50.0
+    td, yd = minmax_decimate(t, y, 100)
+    assert len(td) <= POINTS_PER_PIXEL * 100
+    assert 50.0 in yd and -50.0 in yd
+    assert (np.diff(td) >= 0).all()
+
+
+def test_small_range_is_returned_as_is():
+    series = filled(1000, 500)
+    t, y = series.decimate(100.0, 200.0, pixels=1000)
+    assert t.tolist() == [float(i) for i in range(99, 202)]  # Плюс точка за каждым краем
+
+
+def test_decimate_keeps_spikes_at_every_level():
+    spikes = [(70000, 40.0), (123457, -40.0), (199000, 30.0)]
+    series = filled(100000, 200000, spikes)
+    assert series.capacity >= 100000
+    for pixels in (50, 300, 2000, 20000):
+        t, y = series.decimate(pixels=pixels)
+        assert len(t) <= POINTS_PER_PIXEL * (pixels + 1)
+        assert (np.diff(t) >= 0).all()
+        # Первый выброс уже вытеснен из истории, остальные видны на любом масштабе
+        assert 40.0 not in y
+        assert -40.0 in y and 30.0 in y
+
+
+def test_decimate_visible_range():
+    series = filled(100000, 200000, [(150000, 99.0), (190000, -99.0)])
+    t, y = series.decimate(140000.0, 160000.0, pixels=200)
+    assert 99.0 in y and -99.0 not in y
+    assert t[0] >= 139000.0 and t[-1] <= 161000.0
+    assert (np.diff(t) >= 0).all()
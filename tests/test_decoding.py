@@ -0,0 +1,58 @@
+import struct
+import warnings
+
+import numpy as np
+
+from decoding import decode_registers, format_bit_strings, NO_BIT
+from utils import dword_to_bit_string
+
+
+def real_words(value):
+    """Слова REAL в порядке ПЛК: младшее первым."""
+    return list(struct.unpack("<HH", struct.pack("<f", value)))
+
+
+def test_real_and_dword_low_word_first():
+    words = real_words(21.5) + real_words(-3.25)
+    real, dword, word = decode_registers(words, [0, 2])
+    assert real.tolist() == [21.5, -3.25]
+    assert dword.tolist() == [struct.unpack("<I", struct.pack("<f", v))[0] for v in (21.5, -3.25)]
+    assert word.tolist() == [words[0], words[2]]
+
+
+def test_high_first_swaps_words_but_word_is_first_register():
+    low, high = real_words(21.5)
+    real, dword, word = decode_registers([high, low, high, low], [0, 2], high_first=[True, False])
+    assert real[0] == 21.5
+    assert dword.tolist() == [(high << 16) | low, (low << 16) | high]
+    assert word.tolist() == [high, high]
+
+
+def test_single_register_tag_at_end_of_block():
+    # WORD последним в блоке: второго регистра нет, старшее слово 0
+    real, dword, word = decode_registers([1, 2, 0xBEEF], [0, 2], single=[False, True])
+    assert dword.tolist() == [(2 << 16) | 1, 0xBEEF]
+    assert word.tolist() == [1, 0xBEEF]
+    _, dword, word = decode_registers([0xBEEF], [0], high_first=[True], single=[True])
+    assert dword.tolist() == [0xBEEF << 16]
+    assert word.tolist() == [0xBEEF]
+
+
+def test_bits_take_value_from_first_register():
+    words = [0b1010, 0xFFFF]
+    _, dword, word = decode_registers(words, [0, 0, 0], [NO_BIT, 1, 2], single=[False, True, True])
+    assert word.tolist() == [0b1010, 1, 0]
+    assert dword.tolist() == [0xFFFF000A, 0b1010, 0b1010]
+
+
+def test_nan_registers_decode_without_warning():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        real, dword, _ = decode_registers([0x0001, 0x7F80, 0x0000, 0x7FC0], [0, 2])
+    assert np.isnan(real).all()
+    assert dword.tolist() == [0x7F800001, 0x7FC00000]
+
+
+def test_format_bit_strings_matches_utils():
+    values = [0, 1, 0xDEADBEEF, 0xFFFFFFFF, 0x00010002]
+    assert format_bit_strings(values) == [dword_to_bit_string([v & 0xFFFF, v >> 16]) for v in values]
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from export import _aggregate, _Resampler, RESAMPLE_METHODS
+
+
+def stream(method, t, columns, values, block, period=1.0, column_count=5):
+    resampler = _Resampler(period, method, column_count)
+    parts = [resampler.feed(t[i:i + block], columns[i:i + block], values[i:i + block])
+             for i in range(0, len(t), block)]
+    parts.append(resampler.flush())
+    parts = [part for part in parts if part is not None]
+    return (np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]),
+            {name: np.concatenate([p[2][name] for p in parts]) for name in parts[0][2]})
+
+
+@pytest.mark.parametrize("method", RESAMPLE_METHODS)
+@pytest.mark.parametrize("block", [1, 7, 100, 10000])
+def test_streaming_matches_whole_interval(method, block):
+    rng = np.random.default_rng(0)
+    t = np.sort(rng.uniform(0, 20, 2000))
+    columns = rng.integers(0, 5, len(t))
+    values = rng.normal(size=len(t))
+
+    buckets, tags, expected = _aggregate(np.floor(t).astype(np.int64), columns, values, method, 5)
+    got_t, got_tags, got = stream(method, t, columns, values, block)
+    assert np.array_equal(got_t, buckets.astype(np.float64))
+    assert np.array_equal(got_tags, tags)
+    for name in expected:
+        assert np.allclose(got[name], expected[name])
+
+
+def test_open_bucket_keeps_no_rows():
+    # Один час в одной корзине: накопленные значения, а не строки
+    resampler = _Resampler(3600.0, "mean", 3)
+    for second in range(0, 900):
+        t = np.full(3, float(second))
+        assert resampler.feed(t, np.arange(3), np.full(3, 2.0)) is None
+    assert not any(isinstance(value, np.ndarray) and len(value) > 3 for value in vars(resampler).values())
+    t, tags, result = resampler.flush()
+    assert tags.tolist() == [0, 1, 2]
+    assert result["value"].tolist() == [2.0, 2.0, 2.0]
+
+
+def test_local_offsets_follow_dst(monkeypatch):
+    import time
+    from export import local_offsets
+
+    monkeypatch.setenv("TZ", "Europe/Berlin")
+    time.tzset()
+    try:
+        # 2026-03-29 01:00 UTC — переход на летнее время в Берлине
+        t = np.array([1774746000.0 - 1.5, 1774746000.0 + 0.5])
+        assert local_offsets(t).astype(np.int64).tolist() == [3600, 7200]
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+
+def test_late_rows_are_not_dropped():
+    resampler = _Resampler(1.0, "mean", 2)
+    assert resampler.feed(np.array([0.1, 0.2]), np.array([0, 1]), np.array([1.0, 2.0])) is None
+    t, tags, result = resampler.feed(np.array([1.1]), np.array([0]), np.array([3.0]))
+    assert (t.tolist(), tags.tolist(), result["value"].tolist()) == ([0.0, 0.0], [0, 1], [1.0, 2.0])
+    # Блок заканчивается в открытой корзине, но в нем есть строка уже отданной корзины
+    t, tags, result = resampler.feed(np.array([0.5, 1.2, 0.9]), np.array([1, 0, 0]), np.array([4.0, 5.0, 6.0]))
+    assert (t.tolist(), tags.tolist(), result["value"].tolist()) == ([0.0, 0.0], [0, 1], [6.0, 4.0])
+    t, tags, result = resampler.flush()
+    assert (t.tolist(), tags.tolist(), result["value"].tolist()) == ([1.0], [0], [4.0])
+
+
+def test_block_with_unsorted_buckets_is_emitted_in_time_order():
+    resampler = _Resampler(1.0, "last", 1)
+    t, tags, result = resampler.feed(np.array([3.5, 1.5, 4.5, 2.5]), np.zeros(4, dtype=np.int64),
+                                     np.array([3.0, 1.0, 4.0, 2.0]))
+    assert t.tolist() == [1.0, 2.0, 3.0]
+    assert result["value"].tolist() == [1.0, 2.0, 3.0]
+    t, _, result = resampler.flush()
+    assert (t.tolist(), result["value"].tolist()) == ([4.0], [4.0])
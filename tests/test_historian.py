@@ -0,0 +1,66 @@
+import csv
+
+import numpy as np
+
+from export import export_history
+from historian import Historian, list_chunks, open_chunk
+from poll_engine import CycleValues
+from replay import ReplaySource, AS_FAST_AS_POSSIBLE
+
+# Два ПЛК: строки 0-1 опрашивает первый, 2-3 — второй
+ADDRESSES = ["1344", "1346", "2344", "2346"]
+
+
+def cycle(rows, timestamp):
+    rows = np.array(rows)
+    return CycleValues(rows, rows + timestamp, rows.astype(np.uint32), rows.astype(np.int64), timestamp)
+
+
+def record_interleaved(directory):
+    """Циклы двух устройств с чередующимся временем, поставленные в очередь не по времени."""
+    historian = Historian(str(directory))
+    historian.set_tags(dict(enumerate(ADDRESSES)))
+    # Второе устройство отдает свои циклы пачкой позже первого, как поток с медленным ПЛК
+    for timestamp in np.arange(1000.0, 1010.0, 1.0):
+        historian.append(cycle([0, 1], timestamp))
+    for timestamp in np.arange(1000.5, 1010.5, 1.0):
+        historian.append(cycle([2, 3], timestamp))
+    historian.start()  # Все циклы уже в очереди: писатель пишет их одной пачкой
+    historian.stop()
+    assert historian.written == 40
+    return historian._wall_offset
+
+
+def test_batch_from_two_devices_is_written_in_time_order(tmp_path):
+    record_interleaved(tmp_path)
+    (path,) = list_chunks(str(tmp_path))
+    _, columns = open_chunk(path)
+    assert (np.diff(columns["timestamp"]) >= 0).all()
+
+    source = ReplaySource(str(tmp_path), speed=AS_FAST_AS_POSSIBLE)
+    cycles = []
+    source.run(cycles.append)
+    assert len(cycles) == 20
+    assert sum(len(values.index) for values in cycles) == 40
+    assert [sorted(values.index.tolist()) for values in cycles] == [[0, 1], [2, 3]] * 10
+
+
+def test_resampled_export_keeps_rows_of_both_devices(tmp_path):
+    offset = record_interleaved(tmp_path / "history")
+    output = tmp_path / "export.csv"
+    # Корзины по 2 с: в каждую попадают по два цикла каждого устройства
+    written = export_history(str(tmp_path / "history"), str(output), resample=2.0, method="mean",
+                            chunk_rows=4)
+    with open(output, newline="", encoding="utf-8") as f:
+        exported = {(float(row[1]), row[2]): float(row[3]) for row in list(csv.reader(f))[1:]}
+
+    expected = {}
+    for first, rows in ((1000.0, [0, 1]), (1000.5, [2, 3])):
+        for timestamp in np.arange(first, first + 10.0, 1.0):
+            bucket = float(np.floor((timestamp + offset) / 2.0) * 2.0)
+            for row in rows:
+                expected.setdefault((round(bucket, 3), ADDRESSES[row]), []).append(row + timestamp)
+    assert written == len(exported) == len(expected)
+    assert exported.keys() == expected.keys()
+    for key, values in expected.items():
+        assert abs(exported[key] - np.mean(values)) < 1e-6, key
@@ -0,0 +1,85 @@
+import socket
+import threading
+
+import pytest
+
+from modbus import ModbusConnectionPool, PoolExhaustedError
+
+
+def listener():
+    """Слушающий сокет вместо ПЛК: пулу достаточно, чтобы TCP-соединение открылось."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    return server
+
+
+def opened(pool, port, unit_id=1):
+    client = pool.acquire("127.0.0.1", port, unit_id, wait=0)
+    assert client.open()
+    return client
+
+
+def test_released_connection_is_reused():
+    with listener() as server:
+        port = server.getsockname()[1]
+        pool = ModbusConnectionPool()
+        client = opened(pool, port)
+        pool.release(client)
+        assert pool.acquire("127.0.0.1", port) is client
+        assert pool.stats() == {"opened": 1, "reused": 1, "discarded": 0, "open": 1, "idle": 0}
+        pool.release(client)
+        pool.close_all()
+        assert pool.stats()["open"] == 0
+
+
+def test_broken_connection_is_discarded():
+    with listener() as server:
+        port = server.getsockname()[1]
+        pool = ModbusConnectionPool()
+        client = opened(pool, port)
+        pool.release(client, broken=True)
+        assert not client.is_open
+        assert pool.acquire("127.0.0.1", port) is not client
+        assert pool.stats()["discarded"] == 1 and pool.stats()["opened"] == 2
+
+
+def test_error_inside_connection_block_discards():
+    with listener() as server:
+        pool = ModbusConnectionPool()
+        with pytest.raises(RuntimeError):
+            with pool.connection("127.0.0.1", server.getsockname()[1]) as client:
+                client.open()
+                raise RuntimeError("decode failed")
+        assert pool.stats()["discarded"] == 1 and pool.stats()["open"] == 0
+
+
+def test_max_connections_per_plc():
+    with listener() as server:
+        port = server.getsockname()[1]
+        pool = ModbusConnectionPool(max_connections=2)
+        first = opened(pool, port)
+        second = opened(pool, port)
+        with pytest.raises(PoolExhaustedError):
+            pool.acquire("127.0.0.1", port, wait=0)
+        # Другой unit_id — другой ключ пула со своим ограничением
+        pool.release(opened(pool, port, unit_id=2))
+
+        threading.Timer(0.1, pool.release, (second,)).start()
+        assert pool.acquire("127.0.0.1", port, wait=2) is second
+        assert pool.stats()["opened"] == 3
+        pool.release(first)
+        pool.release(second)
+        pool.close_all()
+
+
+def test_idle_connection_closed_by_plc_is_replaced():
+    with listener() as server:
+        port = server.getsockname()[1]
+        pool = ModbusConnectionPool(health_check_interval=0)
+        client = opened(pool, port)
+        pool.release(client)
+        peer, _ = server.accept()
+        peer.close()  # ПЛК закрыл соединение, пока оно лежало в пуле
+        assert pool.acquire("127.0.0.1", port) is not client
+        assert pool.stats()["discarded"] == 1
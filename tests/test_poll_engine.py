@@ -0,0 +1,202 @@
+import asyncio
+import struct
+
+import numpy as np
+from pyModbusTCP.client import ModbusClient
+from pyModbusTCP.constants import EXP_DATA_ADDRESS, MB_EXCEPT_ERR
+
+from async_acquisition import AsyncPollBackend, ModbusExceptionResponse
+from poll_engine import plan_blocks, PollEngine, DEFAULT_GAP_FILL, GAP_FREE, EXACT, MAX_REGISTERS_PER_REQUEST
+from simulator import BURNER_RANGES
+from tag_compiler import compile_tags
+from tag_import import generate_burner_tags, BURNERS, WORDS
+
+
+class MapClient:
+    """ПЛК с картой регистров ranges: чтение за ее пределами отвергается с ILLEGAL_DATA_ADDRESS."""
+
+    def __init__(self, ranges):
+        self.ranges = ranges
+        self.requests = 0
+        self.last_error = self.last_except = 0
+
+    def read_holding_registers(self, start, count):
+        self.requests += 1
+        if any(first <= start and start + count <= first + size for first, size in self.ranges):
+            return list(range(start, start + count))
+        self.last_error, self.last_except = MB_EXCEPT_ERR, EXP_DATA_ADDRESS
+        return None
+
+
+class AsyncMapClient(MapClient):
+    """То же для бэкенда asyncio: отказ приходит исключением Modbus."""
+
+    async def read_holding_registers(self, start, count):
+        words = MapClient.read_holding_registers(self, start, count)
+        if words is None:
+            raise ModbusExceptionResponse(0x03, EXP_DATA_ADDRESS)
+        return words
+
+
+def ranges(blocks):
+    return [(block.start, block.count) for block in blocks]
+
+
+def test_rejected_merged_block_is_split_without_gaps():
+    # Две области ПЛК, между ними промежуток в 8 регистров — блок склеивается через него
+    tags = [(row, str(register)) for row, register in enumerate(list(range(100, 112, 2)) + list(range(120, 132, 2)))]
+    engine = PollEngine(tags)
+    assert ranges(engine.blocks) == [(100, 32)]
+    client = MapClient([(100, 12), (120, 12)])
+
+    values, failed = engine.poll_once(client)
+    assert not len(values.index) and len(failed) == 12  # Первый цикл: ПЛК отвергает блок с промежутком
+    assert ranges(engine.blocks) == [(100, 12), (120, 12)]
+    assert all(block.split == GAP_FREE for block in engine.blocks)
+
+    requests = client.requests
+    values, failed = engine.poll_once(client)
+    assert not failed and len(values.index) == 12
+    assert client.requests - requests == 2  # Деление запомнено, лишних запросов нет
+
+
+def test_async_backend_splits_rejected_blocks():
+    tags = [(row, str(register)) for row, register in enumerate(list(range(100, 112, 2)) + list(range(120, 132, 2)))]
+    backend = AsyncPollBackend(tags, "127.0.0.1")
+    backend.connection = AsyncMapClient([(100, 12), (120, 12)])
+    engine = backend.scheduler.groups[0].engine
+
+    async def two_cycles():
+        return await backend.poll_once(engine), await backend.poll_once(engine)
+
+    (_, failed_first), (values, failed) = asyncio.run(two_cycles())
+    assert len(failed_first) == 12
+    assert not failed and sorted(values.index.tolist()) == list(range(12))
+    assert ranges(engine.blocks) == [(100, 12), (120, 12)]
+
+
+def test_gap_free_block_is_split_per_tag():
+    # Теги стоят вплотную, но 1406 уже вне карты ПЛК
+    engine = PollEngine([(0, "1402"), (1, "1404"), (2, "1406")], gap_fill=0)
+    assert len(engine.blocks) == 1
+    client = MapClient([(1344, 62)])
+    engine.poll_once(client)
+    engine.poll_once(client)
+    assert ranges(engine.blocks) == [(1402, 2), (1404, 2), (1406, 2)]
+    assert all(block.split == EXACT for block in engine.blocks)
+    values, failed = engine.poll_once(client)
+    assert sorted(values.index.tolist()) == [0, 1]
+    assert failed == [2]  # Только тег вне карты, остальные читаются
+
+
+
+def burner_tags():
+    rows = generate_burner_tags(BURNERS, WORDS)
+    return compile_tags(list(enumerate(address for address, _, _ in rows)))
+
+
+def test_rejected_blocks_are_split_to_simulator_ranges(simulator):
+    engine = PollEngine(burner_tags(), gap_fill=DEFAULT_GAP_FILL)
+    assert len(engine.blocks) < len(BURNER_RANGES)  # Склейка захватывает промежутки между горелками
+    client = ModbusClient(host=simulator.host, port=simulator.port, timeout=1.0)
+
+    values, failed = engine.poll_once(client)
+    assert failed  # Первый цикл: ПЛК отвергает блоки с промежутками
+    assert ranges(engine.blocks) == BURNER_RANGES
+    assert all(block.split == GAP_FREE for block in engine.blocks)
+
+    requests = simulator.requests
+    values, failed = engine.poll_once(client)
+    assert not failed
+    assert len(values.index) == len(BURNERS) * len(WORDS)
+    assert simulator.requests - requests == len(BURNER_RANGES)  # Деление запомнено, лишних запросов нет
+    client.close()
+
+
+def test_async_backend_splits_rejected_blocks_on_simulator(simulator):
+    backend = AsyncPollBackend(burner_tags(), simulator.host, simulator.port)
+    engine = backend.scheduler.groups[0].engine
+
+    async def two_cycles():
+        try:
+            first = await backend.poll_once(engine)
+            second = await backend.poll_once(engine)
+        finally:
+            await backend.connection.close()
+        return first, second
+
+    (_, failed_first), (values, failed) = asyncio.run(two_cycles())
+    assert failed_first
+    assert not failed
+    assert ranges(engine.blocks) == BURNER_RANGES
+    assert sorted(values.index.tolist()) == list(range(len(BURNERS) * len(WORDS)))
+
+class FlakyClient:
+    """Клиент, у которого чтения по очереди удаются или нет."""
+
+    def __init__(self, results):
+        self.results = list(results)
+
+    def read_holding_registers(self, start, count):
+        return [0] * count if self.results.pop(0) else None
+
+
+def test_failed_block_is_logged_on_state_change_only(capsys):
+    engine = PollEngine([(0, "100")])
+    client = FlakyClient([False, False, False, True, False])
+    for _ in range(5):
+        engine.poll_once(client)
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split(" ")[0] for line in lines] == ["Failed", "Block", "Failed"]
+    assert engine.failed_reads == 4
+
+
+def test_plan_blocks_merges_within_gap_fill():
+    starts, counts = np.array([100, 102, 110, 121]), np.array([2, 2, 1, 2])
+    assert ranges(plan_blocks(starts, counts, gap_fill=8)) == [(100, 11), (121, 2)]
+    assert ranges(plan_blocks(starts, counts, gap_fill=10)) == [(100, 23)]
+    assert ranges(plan_blocks(starts, counts, gap_fill=0)) == [(100, 4), (110, 1), (121, 2)]
+
+
+def test_plan_blocks_respects_max_count():
+    starts = np.arange(0, 300, 2)
+    blocks = plan_blocks(starts, np.full(len(starts), 2), gap_fill=0)
+    assert ranges(blocks) == [(0, 124), (124, 124), (248, 52)]
+    assert all(block.count <= MAX_REGISTERS_PER_REQUEST for block in blocks)
+    assert ranges(plan_blocks(starts[:10], np.full(10, 2), max_count=6, gap_fill=0)) == \
+        [(0, 6), (6, 6), (12, 6), (18, 2)]
+    # Блок не короче одного тега, даже если max_count меньше
+    assert ranges(plan_blocks(np.array([0, 2]), np.array([2, 2]), max_count=1)) == [(0, 2), (2, 2)]
+
+
+def test_plan_blocks_overlapping_ranges():
+    # REAL на 1344 и WORD на 1345 перекрываются; блок не укорачивается
+    assert ranges(plan_blocks(np.array([1344, 1345]), np.array([2, 1]), gap_fill=0)) == [(1344, 2)]
+    assert ranges(plan_blocks(np.array([]), np.array([]))) == []
+
+
+def test_poll_decodes_simulator_registers(simulator):
+    addresses = ["1344", "1346", "1348", "1350", "1352.3", "1404", "1420", "1423"]
+    settings = [{}, {"word_order": "hi_lo"}, {"type": "DWORD"}, {"type": "WORD"}, {}, {"type": "DWORD",
+                "word_order": "hi_lo"}, {}, {"type": "WORD", "word_order": "hi_lo"}]
+    engine = PollEngine(compile_tags(list(enumerate(addresses)), settings))
+    client = ModbusClient(host=simulator.host, port=simulator.port, timeout=1.0)
+    values, failed = engine.poll_once(client)
+    client.close()
+    assert not failed
+
+    registers = simulator.registers.astype(np.int64)
+    for row, real, dword, word in zip(values.index.tolist(), values.real.tolist(), values.dword.tolist(),
+                                      values.word.tolist()):
+        register = int(addresses[row].split(".")[0])
+        first, second = registers[register], registers[register + 1]
+        if settings[row].get("type") == "WORD" or "." in addresses[row]:
+            second = 0  # WORD и биты занимают один регистр
+        low, high = (second, first) if settings[row].get("word_order") == "hi_lo" else (first, second)
+        assert dword == (high << 16) | low, addresses[row]
+        if "." in addresses[row]:
+            assert word == (first >> int(addresses[row].split(".")[1])) & 1
+        else:
+            assert word == first
+        if not settings[row].get("type"):
+            assert real == round(struct.unpack("<f", struct.pack("<HH", low, high))[0], 6)
@@ -0,0 +1,128 @@
+import json
+import os
+
+import numpy as np
+from pyModbusTCP.client import ModbusClient
+
+import replay
+from export import export_history
+from historian import Historian
+from poll_engine import CycleValues, PollEngine
+from replay import ReplaySource, AS_FAST_AS_POSSIBLE
+from tag_compiler import compile_tags
+
+# Горелка 0 симулятора: REAL и DWORD с обоими порядками слов, WORD и биты
+ADDRESSES = ["1344", "1346", "1348", "1350", "1352", "1354", "1354.3", "1355.0"]
+TAG_SETTINGS = [{}, {"word_order": "hi_lo"}, {"type": "DWORD"}, {"type": "DWORD", "word_order": "hi_lo"},
+                {"type": "WORD", "word_order": "hi_lo"}, {"type": "WORD"}, {"word_order": "hi_lo"}, {}]
+
+
+def cycle(rows, dwords, timestamp):
+    rows = np.asarray(rows, dtype=np.int64)
+    dword = np.asarray(dwords, dtype=np.uint32)
+    return CycleValues(rows, dword.astype(np.float64), dword, (dword & 0xFFFF).astype(np.int64), timestamp)
+
+
+def record(directory, chunks):
+    """Пишет фрагменты [(адреса, [словари адрес -> DWORD по циклам])] в архив."""
+    historian = Historian(str(directory))
+    historian.start()
+    timestamp = 1000.0
+    for addresses, cycles in chunks:
+        historian.set_tags(dict(enumerate(addresses)))
+        for dwords in cycles:
+            rows = [addresses.index(address) for address in dwords]
+            historian.append(cycle(rows, list(dwords.values()), timestamp))
+            timestamp += 0.1
+    historian.stop()
+
+
+def replay_all(source):
+    cycles = []
+    source.run(cycles.append)
+    return [{source.addresses[row]: dword for row, dword in zip(values.index.tolist(), values.dword.tolist())}
+            for values in cycles]
+
+
+def test_replay_chunks_with_different_tags_and_seek(tmp_path):
+    # Второй фрагмент: другой набор тегов и другие номера строк для тех же адресов
+    first = [{"1344": 1, "1346": 2, "1348": 3}, {"1344": 4, "1346": 5, "1348": 6}]
+    second = [{"1348": 7, "1400": 8, "1344": 9}, {"1348": 10, "1400": 11, "1344": 12}]
+    record(tmp_path, [(["1344", "1346", "1348"], first), (["1348", "1400", "1344"], second)])
+
+    source = ReplaySource(str(tmp_path), speed=AS_FAST_AS_POSSIBLE)
+    assert source.addresses == ["1344", "1346", "1348", "1400"]
+    assert len(source.chunks) == 2
+    assert replay_all(source) == first + second
+
+    # Переход к началу второго фрагмента
+    source = ReplaySource(str(tmp_path), speed=AS_FAST_AS_POSSIBLE)
+    source.seek(source.chunks[1][1])
+    assert replay_all(source) == second
+    assert source.position == source.end_time
+
+
+def test_read_blocks_do_not_split_cycles(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, "READ_BLOCK_ROWS", 5)
+    cycles = [{"1344": n, "1346": n + 100, "1348": n + 200} for n in range(7)]
+    record(tmp_path, [(["1344", "1346", "1348"], cycles)])
+    assert replay_all(ReplaySource(str(tmp_path), speed=AS_FAST_AS_POSSIBLE)) == cycles
+
+
+def test_bits_are_restored_from_raw_registers(tmp_path):
+    record(tmp_path, [(["1344.2", "1344"], [{"1344.2": 0b0100, "1344": 0x00010004}])])
+    cycles = []
+    ReplaySource(str(tmp_path), speed=AS_FAST_AS_POSSIBLE).run(cycles.append)
+    assert cycles[0].word.tolist() == [1, 4]
+
+
+def record_burner(simulator, directory):
+    """Один цикл опроса симулятора, записанный в архив; возвращает CycleValues опроса."""
+    engine = PollEngine(compile_tags(list(enumerate(ADDRESSES)), TAG_SETTINGS))
+    client = ModbusClient(host=simulator.host, port=simulator.port, timeout=1.0)
+    values, failed = engine.poll_once(client)
+    client.close()
+    assert not failed and len(values.index) == len(ADDRESSES)
+
+    historian = Historian(str(directory))
+    historian.start()
+    historian.set_tags(dict(enumerate(ADDRESSES)),
+                       {row: settings["word_order"] for row, settings in enumerate(TAG_SETTINGS)
+                        if "word_order" in settings})
+    historian.append(values)
+    historian.stop()
+    order = np.argsort(values.index)
+    return values._replace(index=values.index[order], real=values.real[order], dword=values.dword[order],
+                           word=values.word[order])
+
+
+def test_replay_restores_word_with_tag_word_order(simulator, tmp_path):
+    live = record_burner(simulator, tmp_path / "history")
+    assert live.word[3] != live.dword[3] & 0xFFFF  # 1350 hi_lo: WORD — старшая половина DWORD
+
+    source = ReplaySource(str(tmp_path / "history"), speed=AS_FAST_AS_POSSIBLE)
+    assert source.addresses == ADDRESSES
+    cycles = []
+    source.run(cycles.append)
+    assert len(cycles) == 1
+    replayed = cycles[0]
+    order = np.argsort(replayed.index)
+    assert np.array_equal(replayed.index[order], live.index)
+    assert np.array_equal(replayed.dword[order], live.dword)
+    assert np.array_equal(replayed.word[order], live.word)
+    assert np.array_equal(replayed.real[order], live.real, equal_nan=True)
+
+
+def test_export_word_column_matches_live(simulator, tmp_path):
+    live = record_burner(simulator, tmp_path / "history")
+    output = tmp_path / "export"
+    assert export_history(str(tmp_path / "history"), str(output), fmt="columns") == len(ADDRESSES)
+
+    with open(os.path.join(output, "meta.json")) as f:
+        meta = json.load(f)
+    assert meta["addresses"] == ADDRESSES
+    columns = {name: np.fromfile(output / f"{name}.bin", dtype=dtype) for name, dtype in meta["columns"].items()}
+    order = np.argsort(columns["tag"])
+    assert np.array_equal(columns["tag"][order], live.index)
+    assert np.array_equal(columns["raw"][order], live.dword)
+    assert np.array_equal(columns["word"][order], live.word)
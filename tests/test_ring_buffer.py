@@ -0,0 +1,43 @@
+import numpy as np
+
+from ring_buffer import RingSeries
+
+
+def test_view_before_wraparound():
+    series = RingSeries(5)
+    assert series.last() is None
+    for i in range(3):
+        series.append(float(i), i * 10.0)
+    t, y = series.view()
+    assert t.tolist() == [0.0, 1.0, 2.0]
+    assert y.tolist() == [0.0, 10.0, 20.0]
+    assert series.last() == (2.0, 20.0)
+
+
+def test_wraparound_keeps_latest_points_in_order():
+    series = RingSeries(4)
+    for i in range(11):
+        series.append(float(i), -float(i))
+        t, y = series.view()
+        assert t.tolist() == [float(j) for j in range(max(0, i - 3), i + 1)]
+        assert y.tolist() == (-t).tolist()
+        assert series.last() == (float(i), -float(i))
+    assert len(series) == 4
+
+
+def test_view_is_not_a_copy():
+    series = RingSeries(3)
+    for i in range(7):
+        series.append(float(i), float(i))
+    t, _ = series.view()
+    assert np.shares_memory(t, series._t)
+
+
+def test_clear():
+    series = RingSeries(3)
+    for i in range(5):
+        series.append(float(i), float(i))
+    series.clear()
+    assert len(series) == 0 and series.last() is None
+    series.append(9.0, 1.0)
+    assert series.view()[0].tolist() == [9.0]
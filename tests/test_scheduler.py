@@ -0,0 +1,188 @@
+import numpy as np
+
+from scheduler import DeadlineScheduler, build_groups, DEFAULT_GROUP
+
+
+class Clock:
+    """Часы планировщика, которые двигает тест."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def scheduler_for(periods, clock):
+    tags = [(row, str(1344 + 2 * row)) for row in range(len(periods))]
+    groups = build_groups(tags, 100, {row: period for row, period in enumerate(periods) if period})
+    return DeadlineScheduler(groups, clock=clock)
+
+
+def run_until(scheduler, clock, end):
+    """Опрашивает группы по дедлайнам до времени end; каждый цикл длится 1 мс. Возвращает имена групп."""
+    order = []
+    while True:
+        group, delay = scheduler.next_group()
+        clock.now += max(0.0, delay)
+        if clock.now >= end:
+            return order
+        scheduler.begin(group)
+        clock.now += 0.001
+        scheduler.complete(group)
+        order.append(group.name)
+
+
+def test_build_groups_by_period():
+    groups = build_groups([(0, "1344"), (1, "1346"), (2, "1348"), (3, "1350")], 100,
+                          {1: ("fast", 50), 2: ("slow", 1000), 3: ("fast", 50)})
+    assert [(group.name, group.period) for group in groups] == [("fast", 0.05), (DEFAULT_GROUP, 0.1),
+                                                                ("slow", 1.0)]
+    assert [group.engine.tags.rows.tolist() for group in groups] == [[1, 3], [0], [2]]
+
+
+def test_earliest_deadline_first():
+    clock = Clock()
+    scheduler = scheduler_for([None, ("fast", 50), ("slow", 250)], clock)
+    scheduler.start()
+    order = run_until(scheduler, clock, 100.499)
+    assert order.count("fast") == 10
+    assert order.count(DEFAULT_GROUP) == 5
+    assert order.count("slow") == 2
+    assert all(group.overruns == 0 for group in scheduler.groups)
+
+
+def test_deadlines_do_not_drift():
+    clock = Clock()
+    scheduler = scheduler_for([None], clock)
+    scheduler.start()
+    group = scheduler.groups[0]
+    for cycle in range(1, 6):
+        scheduler.begin(group)
+        clock.now += 0.03  # Время чтения не накапливается в периоде
+        scheduler.complete(group)
+        assert abs(group.deadline - (100.0 + 0.1 * cycle)) < 1e-9
+        clock.now = group.deadline
+
+
+def test_overrun_skips_missed_deadlines():
+    clock = Clock()
+    scheduler = scheduler_for([None], clock)
+    scheduler.start()
+    group = scheduler.groups[0]
+    scheduler.begin(group)
+    clock.now += 0.35  # Цикл занял три с половиной периода
+    scheduler.complete(group)
+    assert group.overruns == 3
+    assert abs(group.deadline - 100.4) < 1e-9
+    assert group.stats()["overruns"] == 3
+    assert group.cycles == 1
+
+
+class RecordingClient:
+    """Клиент Modbus, который запоминает начала прочитанных блоков и время чтения."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.reads = []
+        self.times = {}  # Начало блока -> времена чтений
+
+    def read_holding_registers(self, start, count):
+        self.reads.append(start)
+        self.times.setdefault(start, []).append(self.clock())
+        return [0] * count
+
+    def intervals(self, start):
+        return np.diff(self.times.get(start, [])).round(6).tolist()
+
+
+def focused_scheduler(clock):
+    # Три блока: 100..103, 200..201 и 300..301 (строки 0-1, 2 и 3)
+    groups = build_groups([(0, "100"), (1, "102"), (2, "200"), (3, "300")], 100, gap_fill=0)
+    return DeadlineScheduler(groups, clock=clock)
+
+
+def poll_until(scheduler, clock, end, client):
+    """Цикл опроса, как в BlockPollBackend.run, до времени end."""
+    while True:
+        group, delay = scheduler.next_group()
+        clock.now += max(0.0, delay)
+        if clock.now >= end:
+            return
+        block_mask = scheduler.begin(group)
+        if block_mask is not None and not block_mask.any():
+            continue
+        group.engine.poll_once(client, block_mask=block_mask)
+        clock.now += 0.001
+        scheduler.complete(group)
+
+
+def test_engine_focus_marks_blocks_with_focused_rows():
+    clock = Clock()
+    group = focused_scheduler(clock).groups[0]
+    engine = group.engine
+    assert [block.start for block in engine.blocks] == [100, 200, 300]
+    engine.set_focus([1, 3])
+    assert engine.focus_blocks.tolist() == [True, False, True]
+    client = RecordingClient(clock)
+    values, failed = engine.poll_once(client, block_mask=engine.focus_blocks)
+    assert client.reads == [100, 300]
+    assert values.index.tolist() == [0, 1, 3] and failed == []
+    engine.set_focus(None)
+    assert engine.focus_blocks is None
+
+
+def test_focus_blocks_fast_background_at_its_deadline():
+    clock = Clock()
+    scheduler = focused_scheduler(clock)
+    scheduler.start()
+    scheduler.set_focus([2], background_period=1.0)
+    client = RecordingClient(clock)
+    poll_until(scheduler, clock, 103.5, client)
+    # Блок в фокусе — каждый период группы, остальные — не чаще раза в секунду
+    assert set(client.intervals(200)) == {0.1}
+    assert client.times[100] == client.times[300]
+    assert len(client.times[100]) == 4
+    assert all(1.0 <= interval <= 1.1 for interval in client.intervals(100))
+    assert scheduler.groups[0].stats()["focus"] == 1
+    assert scheduler.groups[0].overruns == 0
+
+
+def test_focus_none_restores_full_polling():
+    clock = Clock()
+    scheduler = focused_scheduler(clock)
+    scheduler.start()
+    scheduler.set_focus([2], background_period=1.0)
+    client = RecordingClient(clock)
+    poll_until(scheduler, clock, 100.35, client)
+    assert client.reads == [100, 200, 300, 200, 200, 200]
+    scheduler.set_focus(None)
+    client.reads.clear()
+    poll_until(scheduler, clock, 100.65, client)
+    assert client.reads == [100, 200, 300] * 3
+    assert scheduler.groups[0].background_period is None
+    assert scheduler.groups[0].stats()["focus"] is None
+
+
+def test_background_period_not_shorter_than_group_period():
+    clock = Clock()
+    scheduler = focused_scheduler(clock)
+    scheduler.set_focus([0], background_period=0.01)
+    assert scheduler.groups[0].background_period == 0.1
+    scheduler.set_focus([0], background_period=None)
+    assert scheduler.groups[0].background_period is None
+
+
+def test_group_without_focused_blocks_is_skipped():
+    clock = Clock()
+    groups = build_groups([(0, "100"), (1, "200")], 100, {1: ("slow", 500)}, gap_fill=0)
+    scheduler = DeadlineScheduler(groups, clock=clock)
+    scheduler.start()
+    scheduler.set_focus([0], background_period=1.0)
+    client = RecordingClient(clock)
+    poll_until(scheduler, clock, 103.5, client)
+    assert set(client.intervals(100)) == {0.1}
+    # Группа slow читается только в фоновых циклах; пропущенные не считаются в статистике
+    assert client.intervals(200) == [1.5, 1.5]
+    slow = scheduler.groups[1]
+    assert slow.cycles == 3 and slow.overruns == 0
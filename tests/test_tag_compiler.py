@@ -0,0 +1,52 @@
+import pytest
+
+from decoding import NO_BIT
+from tag_compiler import (compile_tag, compile_tags, format_address, parse_address, BIT, DWORD, HIGH_FIRST,
+                          LOW_FIRST, REAL, WORD)
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("6454", (6454, None)), (" 6564.1 ", (6564, 1)), ("0.15", (0, 15)), ("65535", (65535, None)),
+    ("65536", None), ("12.16", None), ("12.", None), ("-1", None), ("abc", None), ("", None),
+])
+def test_parse_address(address, expected):
+    assert parse_address(address) == expected
+
+
+def test_format_address_is_inverse_of_parse():
+    for address in ("6454", "6564.1", "0.0"):
+        assert format_address(*parse_address(address)) == address
+
+
+def test_compile_tag_types_and_word_order():
+    assert compile_tag("1344") == (1344, NO_BIT, REAL, LOW_FIRST, 1, 2)
+    assert compile_tag("1344", {"type": "dword", "word_order": "hi_lo"}, unit_id=3) == \
+        (1344, NO_BIT, DWORD, HIGH_FIRST, 3, 2)
+    assert compile_tag("1344", {"type": "WORD"}) == (1344, NO_BIT, WORD, LOW_FIRST, 1, 1)
+    # Бит задается только адресом, тип строки для него не важен
+    assert compile_tag("1344.7", {"type": "REAL"}) == (1344, 7, BIT, LOW_FIRST, 1, 1)
+
+
+@pytest.mark.parametrize("address, settings", [
+    ("1344", {"type": "BIT"}), ("1344", {"type": "LREAL"}), ("1344", {"word_order": "big"}),
+    ("65535", {}), ("65535", {"type": "DWORD"}), ("x1344", {}),
+])
+def test_compile_tag_rejects(address, settings):
+    assert compile_tag(address, settings) is None
+
+
+def test_compile_tags_keeps_rows_and_invalid():
+    table = compile_tags([(0, "1344"), (1, "bad"), (3, "1350"), (5, "65535")],
+                         [{}, {}, {}, {"type": "WORD", "word_order": "hi_lo"}, {}, {"type": "WORD"}])
+    assert table.rows.tolist() == [0, 3, 5]
+    assert table.invalid == [1]
+    assert table.descriptors["type"].tolist() == [REAL, WORD, WORD]
+    assert table.descriptors["word_order"].tolist() == [LOW_FIRST, HIGH_FIRST, LOW_FIRST]
+
+
+def test_register_ranges_read_shared_register_once():
+    table = compile_tags([(0, "1350.1"), (1, "1344"), (2, "1350"), (3, "1350.0"), (4, "1345")],
+                         [{}, {}, {"type": "WORD"}, {}, {}])
+    starts, counts = table.register_ranges()
+    assert starts.tolist() == [1344, 1345, 1350]
+    assert counts.tolist() == [2, 2, 1]
@@ -0,0 +1,42 @@
+import pytest
+
+from tag_import import (burner_address, burner_word, generate_burner_tags, merge_tags, parse_ranges, BURNERS,
+                        WORDS)
+
+
+def test_parse_ranges():
+    assert parse_ranges("0-20", BURNERS) == list(range(21))
+    assert parse_ranges(" 1, 3,5-7 ,3", WORDS) == [1, 3, 5, 6, 7]
+
+
+@pytest.mark.parametrize("text", ["", ",", "7-5", "0-31", "a-3"])
+def test_parse_ranges_errors(text):
+    with pytest.raises(ValueError):
+        parse_ranges(text, WORDS)
+
+
+def test_burner_layout():
+    assert burner_address(0, 1) == 1344
+    assert burner_address(2, 3) == 1344 + 4 + 128
+    assert burner_word(1344 + 4 + 128) == (2, 3)
+    assert burner_word(1000) is None
+    with pytest.raises(ValueError):
+        burner_address(21, 1)
+    assert [address for address, _, _ in generate_burner_tags([0, 1], [1, 2])] == ["1344", "1346", "1408", "1410"]
+
+
+def test_merge_detects_duplicates_by_normalized_address():
+    rows = [("01344", "уже в таблице", {}), ("1346", "новый", {"period": 100.0}), ("1346.0", "бит", {}),
+            ("1346", "повтор в импорте", {}), ("abc", "ошибка", {}), ("1348.16", "нет такого бита", {})]
+    added, duplicates, invalid = merge_tags(["1344", "1350"], rows)
+    assert added == [("1346", "новый", {"period": 100.0}), ("1346.0", "бит", {})]
+    assert duplicates == ["01344", "1346"]
+    assert invalid == ["abc", "1348.16"]
+
+
+def test_merge_large_import_against_large_table():
+    existing = [str(burner_address(burner, word)) for burner in BURNERS for word in WORDS]
+    rows = generate_burner_tags(BURNERS, WORDS) + [("65000", "", {})]
+    added, duplicates, invalid = merge_tags(existing, rows)
+    assert added == [("65000", "", {})]
+    assert len(duplicates) == len(existing) and invalid == []
@@ -0,0 +1,51 @@
+from tag_table_model import TagTableModel
+
+
+def model_with(addresses, tag_ids=None):
+    model = TagTableModel()
+    model.set_rows([(address, "") for address in addresses], tag_ids=tag_ids)
+    return model
+
+
+def test_tag_ids_survive_row_removal():
+    model = model_with(["1344", "1346", "1348", "1350"])
+    assert model.tag_ids == [0, 1, 2, 3]
+    model.remove_row(1)
+    assert model.addresses == ["1344", "1348", "1350"]
+    assert model.tag_ids == [0, 2, 3]
+    assert model.rows_by_id == {0: 0, 2: 1, 3: 2}
+    assert model.row_of(1) is None
+    assert model.row_of(3) == 2
+    assert model.tag_id(1) == 2
+
+
+def test_removed_ids_are_not_reused():
+    model = model_with(["1344", "1346"])
+    model.remove_row(1)
+    first = model.append_rows([("1346", ""), ("1348", "")])
+    assert first == 1
+    assert model.tag_ids == [0, 2, 3]
+    assert model.rows_by_id == {0: 0, 2: 1, 3: 2}
+
+
+def test_values_follow_removed_rows():
+    model = model_with(["1344", "1346", "1348"])
+    model.update_values([0, 1, 2], [1.0, 2.0, 3.0], [1, 2, 3], [1, 2, 3])
+    model.remove_row(0)
+    assert model.value(model.row_of(2), "REAL") == 3.0
+    assert model.address_counts["1344"] == 0
+
+
+def test_tag_ids_from_config():
+    model = model_with(["1344", "1346"], tag_ids=[10, 4])
+    assert model.row_of(4) == 1
+    assert model.append_row("1348") == 2 and model.tag_id(2) == 11
+    # Повторяющиеся номера в конфигурации заменяются новыми
+    model = model_with(["1344", "1346"], tag_ids=[5, 5])
+    assert len(set(model.tag_ids)) == 2
+
+
+def test_write_type():
+    model = TagTableModel()
+    model.set_rows([("1344", ""), ("1346", ""), ("1348.3", "")], [{}, {"type": "dword"}, {"type": "REAL"}])
+    assert [model.write_type(row) for row in range(3)] == ["REAL", "DWORD", "WORD"]
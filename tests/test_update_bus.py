@@ -0,0 +1,64 @@
+import numpy as np
+
+import update_bus
+from poll_engine import CycleValues
+from update_bus import SnapshotBuffer
+
+
+def cycle(rows, real, timestamp=0.0):
+    rows = np.asarray(rows)
+    return CycleValues(rows, np.asarray(real, dtype=np.float64), rows.astype(np.uint32), rows.astype(np.int64),
+                       timestamp)
+
+
+def test_collect_returns_only_changed_rows():
+    snapshot = SnapshotBuffer(4)
+    assert snapshot.collect().index.tolist() == []
+    snapshot.write(cycle([0, 2], [1.0, 2.0]))
+    values = snapshot.collect()
+    assert values.index.tolist() == [0, 2]
+    assert values.real.tolist() == [1.0, 2.0]
+    assert snapshot.collect().index.tolist() == []
+
+
+def test_many_cycles_between_frames_give_latest_value():
+    snapshot = SnapshotBuffer(3)
+    for value in range(10):
+        snapshot.write(cycle([1], [float(value)], timestamp=float(value)))
+    snapshot.write(cycle([2], [5.0], timestamp=10.0))
+    values = snapshot.collect()
+    assert values.index.tolist() == [1, 2]
+    assert values.real.tolist() == [9.0, 5.0]
+    assert values.timestamp == 10.0
+
+
+def test_rewritten_row_is_reported_again():
+    snapshot = SnapshotBuffer(2)
+    snapshot.write(cycle([0, 1], [1.0, 1.0]))
+    snapshot.collect()
+    snapshot.write(cycle([1], [1.0]))  # То же значение, но новый цикл — новый номер обновления
+    assert snapshot.collect().index.tolist() == [1]
+
+
+def test_samples_only_for_subscribed_rows():
+    snapshot = SnapshotBuffer(3)
+    snapshot.write(cycle([0, 1], [1.0, 2.0], timestamp=1.0))
+    snapshot.subscribe([1, 2, 7])
+    snapshot.write(cycle([0, 1], [3.0, 4.0], timestamp=2.0))
+    snapshot.write(cycle([0], [5.0], timestamp=3.0))
+    snapshot.write(cycle([1, 2], [6.0, 7.0], timestamp=4.0))
+    samples = snapshot.collect_samples()
+    assert [(s.timestamp, s.index.tolist(), s.real.tolist()) for s in samples] == [
+        (2.0, [1], [4.0]), (4.0, [1, 2], [6.0, 7.0])]
+    assert snapshot.collect_samples() == []
+
+
+def test_pending_samples_are_capped(monkeypatch):
+    monkeypatch.setattr(update_bus, "MAX_PENDING_SAMPLES", 5)
+    snapshot = SnapshotBuffer(1)
+    snapshot.subscribe([0])
+    for value in range(12):
+        snapshot.write(cycle([0], [float(value)], timestamp=float(value)))
+    samples = snapshot.collect_samples()
+    # GUI не успевал забирать выборки: остаются самые новые
+    assert [s.timestamp for s in samples] == [7.0, 8.0, 9.0, 10.0, 11.0]
@@ -0,0 +1,59 @@
+import pytest
+
+from write_queue import make_write, parse_value, register_runs, WriteQueue
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("010", 10), ("0", 0), ("-12", -12), ("+7", 7), ("0x1F", 31), ("0X1f", 31), ("-0x10", -16), ("0b101", 5),
+])
+def test_parse_value_is_decimal_unless_prefixed(text, expected):
+    assert parse_value(text, "WORD") == expected
+
+
+@pytest.mark.parametrize("text", ["0o17", "1.5", "", "0x", "abc"])
+def test_parse_value_rejects_other_integers(text):
+    with pytest.raises(ValueError):
+        parse_value(text, "DWORD")
+
+
+def test_parse_value_real_accepts_decimal_comma():
+    assert parse_value("1,25", "REAL") == 1.25
+
+
+def test_make_write_word_order():
+    assert make_write("1350", "DWORD", "0x00010002").words == [2, 1]
+    assert make_write("1350", "DWORD", "0x00010002", word_order="hi_lo").words == [1, 2]
+
+
+def test_register_runs():
+    assert register_runs([], 123) == []
+    assert register_runs([5, 3, 4, 4, 10], 123) == [(3, 3), (10, 1)]
+    assert register_runs([3, 10], 123, gap_fill=6) == [(3, 8)]
+    assert register_runs([3, 10], 123, gap_fill=5) == [(3, 1), (10, 1)]
+    assert register_runs(range(10), 4) == [(0, 4), (4, 4), (8, 2)]
+
+
+@pytest.mark.parametrize("text", ["1e40", "-3.5e38"])
+def test_make_write_real_out_of_float32_range(text):
+    with pytest.raises(ValueError):
+        make_write("1344", "REAL", text)
+    assert make_write("1344", "REAL", "inf").words == [0, 0x7F80]
+
+
+def test_stop_writes_queued_items(simulator):
+    results = []
+    queue = WriteQueue(simulator.host, simulator.port, on_done=results.extend)
+    items = [make_write(str(1344 + 2 * i), "DWORD", str(1000 + i), row=i) for i in range(20)]
+    queue.start()
+    for item in items:
+        queue.put([item])
+    queue.stop()
+    assert sorted(item.row for item, _ in results) == list(range(20))
+    assert all(error is None for _, error in results)
+    assert simulator.registers[1344:1384:2].tolist() == [1000 + i for i in range(20)]
+
+    # После остановки запись не выполняется, но результат приходит
+    late = make_write("1344", "WORD", "7", row=99)
+    queue.put([late])
+    assert results[-1] == (late, "очередь записи остановлена")
+    assert simulator.registers[1344] == 1000
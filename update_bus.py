@@ -0,0 +1,91 @@
+import threading
+
+import numpy as np
+
+from poll_engine import CycleValues
+
+# Частота обновления таблицы по умолчанию, кадров в секунду
+DEFAULT_DISPLAY_RATE = 25
+# Сколько циклов с выборками подписанных тегов хранится, если GUI не успевает их забрать
+MAX_PENDING_SAMPLES = 10000
+
+
+class SnapshotBuffer:
+    """Двойной буфер последних значений тегов с номером обновления на каждый тег.
+
+    Поток опроса пишет в задний буфер (write), GUI с частотой кадров забирает
+    его копию (collect) и получает только теги, изменившиеся с прошлого кадра.
+    Сколько бы циклов опроса ни прошло между кадрами, GUI обновляется один раз.
+
+    Для тегов, на которые есть подписка (например, выведенных на график),
+    дополнительно сохраняется каждая выборка с временем чтения (collect_samples).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._timestamp = 0.0
+        self._back = self._allocate(size)
+        self._front = self._allocate(size)
+        self._seen = np.zeros(size, dtype=np.int64)  # Последний номер, отданный GUI
+        self._subscribed = np.zeros(size, dtype=bool)
+        self._samples = []  # CycleValues подписанных тегов в порядке поступления
+
+    @staticmethod
+    def _allocate(size):
+        return {
+            "real": np.zeros(size, dtype=np.float64),
+            "dword": np.zeros(size, dtype=np.uint32),
+            "word": np.zeros(size, dtype=np.int64),
+            "sequence": np.zeros(size, dtype=np.int64),
+        }
+
+    def subscribe(self, rows):
+        """Задает строки, для которых нужна каждая выборка, а не только последнее значение."""
+        subscribed = np.zeros(self.size, dtype=bool)
+        rows = [row for row in rows if 0 <= row < self.size]
+        subscribed[rows] = True
+        with self._lock:
+            self._subscribed = subscribed
+
+    def write(self, values):
+        """Записывает значения цикла опроса (CycleValues); вызывается из потока опроса."""
+        index = values.index
+        if len(index) == 0:
+            return
+        with self._lock:
+            self._sequence += 1
+            self._timestamp = values.timestamp
+            back = self._back
+            back["real"][index] = values.real
+            back["dword"][index] = values.dword
+            back["word"][index] = values.word
+            back["sequence"][index] = self._sequence
+
+            wanted = self._subscribed[index]
+            if wanted.any():
+                self._samples.append(CycleValues(index[wanted], values.real[wanted], values.dword[wanted],
+                                                 values.word[wanted], values.timestamp))
+                if len(self._samples) > MAX_PENDING_SAMPLES:
+                    del self._samples[:len(self._samples) - MAX_PENDING_SAMPLES]
+
+    def collect(self):
+        """Забирает изменения с прошлого вызова как CycleValues; вызывается из GUI."""
+        front = self._front
+        with self._lock:
+            # Под блокировкой только копирование, разбор изменений идет без нее
+            for name, array in self._back.items():
+                np.copyto(front[name], array)
+            timestamp = self._timestamp
+
+        changed = np.flatnonzero(front["sequence"] > self._seen)
+        self._seen[changed] = front["sequence"][changed]
+        return CycleValues(changed, front["real"][changed], front["dword"][changed], front["word"][changed],
+                           timestamp)
+
+    def collect_samples(self):
+        """Забирает все выборки подписанных тегов, накопленные с прошлого вызова."""
+        with self._lock:
+            samples, self._samples = self._samples, []
+        return samples
@@ -0,0 +1,272 @@
+"""Запись значений в ПЛК: очередь, склейка соседних регистров и проверка чтением.
+
+Записи копятся в очереди и уходят пачкой на отдельном потоке со своим
+соединением из пула, поэтому не ждут цикла опроса. В пачке последняя запись
+в регистр заменяет предыдущие, соседние регистры склеиваются в один запрос
+0x10 (write_multiple_registers), биты ('регистр.бит') пишутся через
+чтение-изменение-запись всего регистра. После записи диапазоны читаются
+обратно, и каждая запись получает результат: None или текст ошибки.
+"""
+import csv
+import struct
+import threading
+from collections import namedtuple
+
+from circuit_breaker import circuit_breakers
+from modbus import connection_pool
+from poll_engine import MAX_REGISTERS_PER_REQUEST
+from tag_compiler import parse_address, WORD_ORDERS, HIGH_FIRST
+
+# Ограничение протокола Modbus: не более 123 регистров в одном запросе 0x10
+MAX_REGISTERS_PER_WRITE = 123
+# Сколько лишних регистров можно прочитать, чтобы склеить чтения для битов и проверки
+READ_GAP_FILL = 8
+# Типы значения: столбцы таблицы, в которые можно вводить значение
+WRITE_TYPES = ("REAL", "DWORD", "WORD")
+
+# Одна запись: строка таблицы (или None), адрес и тип как ввел пользователь, разобранное значение;
+# регистр, бит (None для целых слов) и слова для записи (для бита — None, value равно 0 или 1)
+WriteItem = namedtuple("WriteItem", ["row", "address", "type", "value", "register", "bit", "words"])
+
+
+def parse_value(text, value_type):
+    """Текст из ячейки таблицы в число для типа value_type; ValueError, если не подходит.
+
+    Целые числа десятичные ('010' — это 10); шестнадцатеричные и двоичные — только с префиксом 0x/0b.
+    """
+    text = str(text).strip()
+    try:
+        if value_type == "REAL":
+            return float(text.replace(",", "."))
+        return int(text, 0 if text.lstrip("+-")[:2].lower() in ("0x", "0b") else 10)
+    except ValueError:
+        raise ValueError(f"'{text}' не подходит для {value_type}") from None
+
+
+def make_write(address, value_type, value, row=None, word_order=None):
+    """Разбирает адрес и значение в WriteItem; ValueError с понятным текстом при ошибке.
+
+    word_order — порядок слов тега (tag_compiler.WORD_ORDERS), по умолчанию младшее слово первым.
+    """
+    parsed = parse_address(address)
+    if parsed is None:
+        raise ValueError(f"недопустимый адрес '{address}'")
+    if value_type not in WRITE_TYPES:
+        raise ValueError(f"неизвестный тип '{value_type}'")
+    register, bit = parsed
+    value = parse_value(value, value_type) if isinstance(value, str) else value
+
+    if bit is not None:
+        if value not in (0, 1):
+            raise ValueError(f"бит {address}: допустимы только 0 и 1")
+        return WriteItem(row, address, value_type, int(value), register, bit, None)
+    if value_type == "REAL":
+        try:
+            words = list(struct.unpack("<HH", struct.pack("<f", value)))  # Младшее слово первым, как при чтении
+        except OverflowError:
+            raise ValueError(f"REAL вне диапазона float32 (±3.4e38): {value}") from None
+    elif value_type == "DWORD":
+        if not 0 <= value <= 0xFFFFFFFF:
+            raise ValueError(f"DWORD вне диапазона 0..4294967295: {value}")
+        words = [value & 0xFFFF, value >> 16]
+    else:
+        if not -0x8000 <= value <= 0xFFFF:
+            raise ValueError(f"WORD вне диапазона -32768..65535: {value}")
+        words = [value & 0xFFFF]
+    if len(words) == 2 and word_order == WORD_ORDERS[HIGH_FIRST]:
+        words.reverse()
+    if register + len(words) > 0x10000:
+        raise ValueError(f"адрес {address} вне карты регистров")
+    return WriteItem(row, address, value_type, value, register, None, words)
+
+
+def load_recipe(path):
+    """Читает рецепт из CSV: столбцы address, value и необязательные type (REAL по умолчанию) и device.
+
+    Возвращает список словарей {"address", "value", "type", "device"}.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        rows = []
+        for line, record in enumerate(csv.DictReader(f, dialect=dialect), start=2):
+            record = {(key or "").strip().lower(): (value or "").strip() for key, value in record.items()}
+            if not record.get("address"):
+                continue
+            if "value" not in record:
+                raise ValueError(f"строка {line}: нет столбца value")
+            rows.append({"address": record["address"], "value": record["value"],
+                         "type": (record.get("type") or "REAL").upper(), "device": record.get("device") or None})
+    return rows
+
+
+def register_runs(registers, max_count, gap_fill=0):
+    """Склеивает отсортированные номера регистров в диапазоны (start, count) не длиннее max_count."""
+    runs = []
+    for register in sorted(registers):
+        if runs:
+            start, count = runs[-1]
+            if register < start + count:
+                continue
+            if register - (start + count) <= gap_fill and register - start < max_count:
+                runs[-1] = (start, register - start + 1)
+                continue
+        runs.append((register, 1))
+    return runs
+
+
+class WriteQueue:
+    """Очередь записи в один ПЛК со своим потоком.
+
+    put() можно вызывать из любого потока; все, что накопилось, пока шла
+    предыдущая пачка, уходит следующей пачкой. on_done(results) вызывается из
+    потока записи со списком пар (WriteItem, None или текст ошибки) — результат
+    получает каждая запись, в том числе поставленная после stop().
+    """
+
+    def __init__(self, host, port=502, unit_id=1, verify=True, max_count=MAX_REGISTERS_PER_WRITE, on_done=None):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.verify = verify
+        self.max_count = max(1, min(int(max_count), MAX_REGISTERS_PER_WRITE))
+        self.on_done = on_done
+        self.breaker = circuit_breakers.get(host, port, unit_id)
+        self.is_running = True
+        self._lock = threading.Lock()
+        self._pending = []
+        self._wake = threading.Event()
+        self._thread = None
+
+        # Счетчики для статистики
+        self.written = 0
+        self.write_requests = 0
+        self.read_requests = 0
+
+    def put(self, items):
+        with self._lock:
+            if self.is_running:
+                self._pending.extend(items)
+                items = None
+        if items and self.on_done:
+            self.on_done([(item, "очередь записи остановлена") for item in items])
+        self._wake.set()
+
+    def start(self):
+        """Запускает запись на отдельном потоке."""
+        self._thread = threading.Thread(target=self.run, name="WriteQueue", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        """Блокирующий цикл записи в текущем потоке; после stop() дописывает очередь и выходит."""
+        running = True
+        while running:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                items, self._pending = self._pending, []
+                running = self.is_running
+            if items:
+                results = self.write_batch(items)
+                if self.on_done:
+                    self.on_done(results)
+
+    def stop(self):
+        """Останавливает запись: то, что уже в очереди, записывается, новые записи отклоняются."""
+        with self._lock:
+            self.is_running = False
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def write_batch(self, items):
+        """Записывает пачку и возвращает список (WriteItem, None или текст ошибки)."""
+        if not self.breaker.is_closed:
+            return [(item, "нет связи с ПЛК") for item in items]
+        try:
+            with connection_pool.connection(self.host, self.port, self.unit_id) as mb_client:
+                return self.execute(mb_client, items)
+        except Exception as e:
+            return [(item, f"ошибка соединения: {e}") for item in items]
+
+    def execute(self, client, items):
+        """Склейка, чтение регистров для битов, запись диапазонов и проверка чтением."""
+        errors = {}  # Номер записи в items -> текст ошибки
+
+        # Регистры битов, которые в пачке не записываются целиком до этого бита, нужно сначала прочитать
+        full = set()
+        to_read = set()
+        for item in items:
+            if item.bit is None:
+                full.update(range(item.register, item.register + len(item.words)))
+            elif item.register not in full:
+                to_read.add(item.register)
+        current, failed = self.read_registers(client, to_read)
+
+        # Слова для записи в порядке поступления: последняя запись в регистр побеждает
+        words = {}
+        owners = {}  # Регистр -> номера записей, которые его меняют
+        for number, item in enumerate(items):
+            if item.bit is None:
+                for offset, word in enumerate(item.words):
+                    words[item.register + offset] = word
+                    owners.setdefault(item.register + offset, []).append(number)
+                continue
+            if item.register in failed and item.register not in words:
+                errors[number] = f"не удалось прочитать регистр {item.register}"
+                continue
+            base = words.get(item.register, current.get(item.register, 0))
+            mask = 1 << item.bit
+            words[item.register] = (base & ~mask) | (mask if item.value else 0)
+            owners.setdefault(item.register, []).append(number)
+
+        runs = register_runs(words, self.max_count)
+        for start, count in runs:
+            values = [words[register] for register in range(start, start + count)]
+            self.write_requests += 1
+            if not client.write_multiple_registers(start, values):
+                message = f"ошибка записи {start}..{start + count - 1}: {client.last_error_as_txt}"
+                for register in range(start, start + count):
+                    for number in owners.get(register, ()):
+                        errors.setdefault(number, message)
+
+        if self.verify:
+            written = {register for register, numbers in owners.items()
+                       if not any(number in errors for number in numbers)}
+            readback, failed = self.read_registers(client, written)
+            for number, item in enumerate(items):
+                if number in errors:
+                    continue
+                if item.bit is None:
+                    registers = range(item.register, item.register + len(item.words))
+                    if any(register in failed for register in registers):
+                        errors[number] = "не удалось прочитать для проверки"
+                    elif [readback[register] for register in registers] != \
+                            [words[register] for register in registers]:
+                        errors[number] = f"прочитано {[readback[register] for register in registers]}"
+                elif item.register in failed:
+                    errors[number] = "не удалось прочитать для проверки"
+                elif (readback[item.register] >> item.bit) & 1 != (words[item.register] >> item.bit) & 1:
+                    errors[number] = f"бит не изменился (регистр {readback[item.register]})"
+
+        self.written += len(items) - len(errors)
+        print(f"Write {self.host}:{self.port}: {len(items)} values -> {len(runs)} write requests"
+              f"{' + read-back' if self.verify else ''}, {len(errors)} failed")
+        return [(item, errors.get(number)) for number, item in enumerate(items)]
+
+    def read_registers(self, client, registers):
+        """Читает регистры склеенными диапазонами; возвращает (регистр -> слово, множество непрочитанных)."""
+        values = {}
+        failed = set()
+        for start, count in register_runs(registers, MAX_REGISTERS_PER_REQUEST, READ_GAP_FILL):
+            self.read_requests += 1
+            words = client.read_holding_registers(start, count)
+            if isinstance(words, list) and len(words) == count:
+                values.update(zip(range(start, start + count), words))
+            else:
+                failed.update(register for register in registers if start <= register < start + count)
+        return values, failed
+
+    def stats(self):
+        return {"written": self.written, "write_requests": self.write_requests, "read_requests": self.read_requests}